@@ -0,0 +1,19 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from veldaos.core.daemon import DaemonClient
+
+# Start the daemon once with: python -m veldaos.core.daemon serve
+
+def main():
+    client = DaemonClient()
+    success = client.run(
+        "chrome",
+        "Type 'python --version' and read the output",
+        on_progress=lambda event: print(event["event"], event.get("action", ""))
+    )
+    print("Done" if success else "Failed")
+
+if __name__ == "__main__":
+    main()
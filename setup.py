@@ -15,6 +15,9 @@ setup(
         "langchain-openai>=0.0.2",
         "numpy>=1.24.0",
     ],
+    entry_points={
+        "console_scripts": ["veldaos=veldaos.core.daemon:main"],
+    },
     author="Natnael",
     author_email="nattygirma28@gmail.com",
     description="AI Agent System for OS Automation with OCR and LLM",
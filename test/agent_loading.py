@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.core.sandbox import SandboxError
+from veldaos.marketplace.registry import AgentRegistry
+
+AGENT_SOURCE = '''from veldaos.core.agent import BaseAgent
+from . import helper
+from .lib.text import shout
+
+
+class Agent(BaseAgent):
+    def initialize(self):
+        pass
+
+    def process_screenshot(self, screenshot):
+        return None
+
+    def handle_action_result(self, action, success):
+        pass
+
+    def cleanup(self):
+        pass
+
+    def get_status(self):
+        return {"greeting": shout(helper.GREETING), "module": __name__.rsplit(".", 1)[0]}
+'''
+
+FILES = {
+    "agent.py": AGENT_SOURCE,
+    "helper.py": "GREETING = 'hello'\n",
+    "lib/__init__.py": "",
+    "lib/text.py": "def shout(text):\n    return text.upper()\n",
+}
+
+
+def write_agent(agents_dir: Path, agent_id: str, archive: bool, files=FILES) -> Path:
+    metadata = json.dumps({"id": agent_id, "name": agent_id, "version": "1.0.0"})
+    if archive:
+        path = agents_dir / agent_id / f"{agent_id}-1.0.0.zip"
+        path.parent.mkdir(parents=True)
+        with zipfile.ZipFile(path, "w") as package:
+            package.writestr("metadata.json", metadata)
+            for name, source in files.items():
+                package.writestr(name, source)
+    else:
+        path = agents_dir / agent_id
+        for name, source in {"metadata.json": metadata, **files}.items():
+            (path / name).parent.mkdir(parents=True, exist_ok=True)
+            (path / name).write_text(source)
+    return path
+
+
+def load_both(registry: AgentRegistry, agent_id: str):
+    """get_status of the agent loaded in this process and in a sandbox, or the error each raised."""
+    results = []
+    try:
+        results.append(registry.create(agent_id).get_status())
+    except Exception as e:
+        results.append(type(e).__name__)
+    sandboxed = registry.sandboxed(agent_id)
+    try:
+        sandboxed.launch()
+        status = sandboxed.get_status()
+        status.pop("sandbox")
+        results.append(status)
+    except SandboxError as e:
+        # The sandbox reports the agent's exception as "Failed to load ...: <type>: <message>"
+        results.append(str(e).split(": ")[1])
+    finally:
+        sandboxed.shutdown()
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        agents_dir = Path(tmp)
+        registry = AgentRegistry(str(agents_dir))
+        for archive in (False, True):
+            agent_id = f"multi-{'zip' if archive else 'dir'}"
+            registry.register(write_agent(agents_dir, agent_id, archive))
+            in_process, in_sandbox = load_both(registry, agent_id)
+            assert in_process == in_sandbox, (in_process, in_sandbox)
+            assert in_process["greeting"] == "HELLO"
+            print(f"ok: {agent_id} loads the same in process and in a sandbox: {in_process}")
+
+        # An absolute import of the agent's own module fails the same way on both paths
+        absolute = dict(FILES, **{"agent.py": AGENT_SOURCE.replace("from . import helper", "import helper")})
+        registry.register(write_agent(agents_dir, "absolute", False, absolute))
+        results = load_both(registry, "absolute")
+        assert results == ["ModuleNotFoundError", "ModuleNotFoundError"], results
+        print("ok: absolute imports of agent modules are rejected on both paths")
+
+
+if __name__ == "__main__":
+    main()
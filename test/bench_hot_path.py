@@ -0,0 +1,174 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from pydantic import BaseModel
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.core import AgentSession
+from veldaos.core.elements import Action
+from veldaos.core.memory import StepRecord
+from veldaos.core.utils.pytesseractocr import PyTesseractOCR
+
+
+def fake_ocr_data(words: int, seed: int = 0) -> Dict[str, List]:
+    """An image_to_data-style dict for a dense screen: rows of words, plus tesseract's empty entries."""
+    rng = random.Random(seed)
+    data = {"text": [], "left": [], "top": [], "width": [], "height": []}
+    x, y = 10, 10
+    for i in range(words):
+        width = rng.randint(20, 90)
+        for key, value in (("text", f"word{i}" if i % 7 else " "), ("left", x), ("top", y + rng.randint(-2, 2)),
+                           ("width", width), ("height", 14)):
+            data[key].append(value)
+        x += width + rng.choice((4, 6, 8, 30))
+        if x > 1800:
+            x, y = 10, y + 22
+    return data
+
+
+# The dict-based implementation this replaced, kept here as the baseline
+
+def legacy_elements(ocr_data: Dict[str, List]) -> List[Dict]:
+    text_elements = []
+    for i, text in enumerate(ocr_data['text']):
+        if text.strip():
+            text_elements.append({'text': text, 'x': ocr_data['left'][i], 'y': ocr_data['top'][i],
+                                  'width': ocr_data['width'][i], 'height': ocr_data['height'][i]})
+    return text_elements
+
+
+def legacy_merge_overlapping(text_elements: List[Dict]) -> List[Dict]:
+    merged_elements = []
+    used_indices = set()
+    for i, elem1 in enumerate(text_elements):
+        if i in used_indices:
+            continue
+        x1, y1, w1, h1 = elem1['x'], elem1['y'], elem1['width'], elem1['height']
+        text1 = elem1['text']
+        for j, elem2 in enumerate(text_elements[i+1:], start=i+1):
+            if j in used_indices:
+                continue
+            x2, y2, w2, h2 = elem2['x'], elem2['y'], elem2['width'], elem2['height']
+            text2 = elem2['text']
+            if (x1 + w1 + 10 >= x2 - 10 and x1 - 10 <= x2 + w2 + 10) or (x2 + w2 + 10 >= x1 - 10 and x2 - 10 <= x1 + w1 + 10):
+                overlap_height = min(y1 + h1, y2 + h2) - max(y1, y2)
+                if overlap_height > 0 and overlap_height / min(h1, h2) > 0:
+                    new_x = min(x1, x2)
+                    new_y = min(y1, y2)
+                    elem1 = {'text': text1 + ' ' + text2, 'x': new_x, 'y': new_y,
+                             'width': max(x1 + w1, x2 + w2) - new_x, 'height': min(y1 + h1, y2 + h2) - new_y}
+                    used_indices.add(j)
+        merged_elements.append(elem1)
+        used_indices.add(i)
+    return merged_elements
+
+
+def legacy_merge_close(text_elements: List[Dict]) -> List[Dict]:
+    merged_elements = []
+    used_indices = set()
+    for i, elem1 in enumerate(text_elements):
+        if i in used_indices:
+            continue
+        x1, y1, w1, h1 = elem1['x'], elem1['y'], elem1['width'], elem1['height']
+        text1 = elem1['text']
+        for j, elem2 in enumerate(text_elements[i+1:], start=i+1):
+            if j in used_indices:
+                continue
+            x2, y2, w2, h2 = elem2['x'], elem2['y'], elem2['width'], elem2['height']
+            text2 = elem2['text']
+            if min(abs(x1 - (x2 + w2)), abs(x2 - (x1 + w1))) <= 10 and abs(y1 - y2 - 5) < max(h1, h2) / 2:
+                new_x = min(x1, x2)
+                new_y = min(y1, y2)
+                elem1 = {'text': text1 + ' ' + text2, 'x': new_x, 'y': new_y,
+                         'width': max(x1 + w1, x2 + w2) - new_x, 'height': max(y1 + h1, y2 + h2) - new_y}
+                used_indices.add(j)
+        merged_elements.append(elem1)
+        used_indices.add(i)
+    return merged_elements
+
+
+def legacy_execute_action(os_interaction, action: Dict) -> bool:
+    if action["action"] == "click":
+        return os_interaction.click(action["parameters"]["x"], action["parameters"]["y"])
+    elif action["action"] == "type":
+        return os_interaction.type_text(action["parameters"]["text"], interval=0.1)
+    return False
+
+
+class LegacyStepRecord(BaseModel):
+    step: int
+    action: Dict[str, Any]
+    success: bool
+    new_text: List[str] = []
+
+
+class NullOS:
+    def click(self, x: int, y: int) -> bool:
+        return True
+
+    def type_text(self, text: str, interval: float = 0.0) -> bool:
+        return True
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[float, int, int]:
+    """Best time per call (ms), plus allocated blocks and peak bytes of one call."""
+    best = min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    blocks = sum(stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, blocks, peak
+
+
+def report(name: str, legacy: Tuple[float, int, int], current: Tuple[float, int, int]) -> None:
+    print(f"{name}")
+    print(f"  dicts    {legacy[0]:9.3f} ms  {legacy[1]:8d} live blocks  {legacy[2] / 1024:9.1f} KiB peak")
+    print(f"  slots    {current[0]:9.3f} ms  {current[1]:8d} live blocks  {current[2] / 1024:9.1f} KiB peak")
+    print(f"  speedup  {legacy[0] / current[0]:9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict and __slots__ hot-path types")
+    parser.add_argument("--words", type=int, default=2000, help="OCR words on the synthetic screen")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--actions", type=int, default=10000, help="Actions per _execute_action run")
+    args = parser.parse_args()
+
+    ocr = PyTesseractOCR()
+    data = fake_ocr_data(args.words)
+
+    # perform_ocr minus tesseract itself and the debug images
+    legacy = measure(lambda: legacy_merge_close(legacy_merge_overlapping(legacy_elements(data))), args.repeat)
+    current = measure(lambda: ocr.merge_close_text(ocr.merge_overlapping_boxes(ocr.elements_from_data(data))),
+                      args.repeat)
+    report(f"perform_ocr post-processing, {args.words} words", legacy, current)
+
+    session = AgentSession("bench", NullOS(), None)
+    raw = [{"action": "click", "parameters": {"x": i, "y": i}} if i % 2 else
+           {"action": "type", "parameters": {"text": "hello"}} for i in range(args.actions)]
+    actions = [Action.from_llm(dict(item, parameters=dict(item["parameters"]))) for item in raw]
+    os_interaction = NullOS()
+    legacy = measure(lambda: [legacy_execute_action(os_interaction, action) for action in raw], args.repeat)
+    current = measure(lambda: [session._execute_action(action) for action in actions], args.repeat)
+    report(f"_execute_action, {args.actions} actions", legacy, current)
+
+    legacy = measure(lambda: [LegacyStepRecord(step=i, action=action, success=True, new_text=["ok"])
+                              for i, action in enumerate(raw)], args.repeat)
+    current = measure(lambda: [StepRecord(i, action, True, ["ok"]) for i, action in enumerate(actions)],
+                      args.repeat)
+    report(f"SessionMemory step records, {args.actions} steps", legacy, current)
+
+
+if __name__ == "__main__":
+    main()
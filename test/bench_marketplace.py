@@ -0,0 +1,144 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from marketplace_server import StandInMarketplace
+from veldaos.marketplace.marketplace import Marketplace
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def report(name: str, seconds: float, detail: str = "") -> None:
+    print(f"{name:28} {seconds * 1000:10.1f} ms  {detail}")
+
+
+def served(server: StandInMarketplace, before: dict) -> str:
+    """Requests and bytes the server handled since before (a copy of server.stats)."""
+    requests = sum(count for key, count in server.stats.items() if key.isdigit()) - \
+        sum(count for key, count in before.items() if key.isdigit())
+    return f"{requests} requests, {(server.stats['bytes'] - before.get('bytes', 0)) / 1024:.0f} KiB"
+
+
+def bench_catalog(server: StandInMarketplace, agents_dir: str, page_size: int) -> Marketplace:
+    marketplace = Marketplace(server.url, agents_dir)
+
+    before = dict(server.stats)
+    with Timer() as t:
+        first = next(marketplace.iter_available_agents(page_size=page_size))
+    report("catalog first agent", t.seconds, f"({first.id}) {served(server, before)}")
+    marketplace.client.cache.clear()
+
+    before = dict(server.stats)
+    with Timer() as t:
+        agents = marketplace.get_available_agents()
+    report("catalog cold", t.seconds, f"{len(agents)} agents, {served(server, before)}")
+
+    before = dict(server.stats)
+    with Timer() as t:
+        marketplace.get_available_agents(revalidate=True)
+    report("catalog revalidate", t.seconds, f"(304s) {served(server, before)}")
+    return marketplace
+
+
+def bench_search(marketplace: Marketplace, repeat: int) -> None:
+    for query in ("summarizer", "pdf summ", "invoce", "email cap:ocr price<5"):
+        times = []
+        for _ in range(repeat):
+            with Timer() as t:
+                results = marketplace.search_agents(query)
+            times.append(t.seconds)
+        report(f"search {query!r}", statistics.median(times), f"p50, {len(results)} results")
+
+
+def bench_install(server: StandInMarketplace, marketplace: Marketplace, agent_ids, workers: int) -> None:
+    before = dict(server.stats)
+    with Timer() as t:
+        results = marketplace.install_agents(agent_ids, max_workers=workers)
+    installed = sum(results.values())
+    report("install", t.seconds, f"{installed}/{len(agent_ids)} agents, {installed / t.seconds:.1f}/s, "
+                                 f"{served(server, before)}")
+
+
+def bench_update(server: StandInMarketplace, marketplace: Marketplace, agent_ids, workers: int) -> None:
+    # Half of the installed agents get a new version
+    for agent_id in agent_ids[::2]:
+        server.release(agent_id)
+
+    before = dict(server.stats)
+    with Timer() as t:
+        outdated = [agent_id for agent_id in agent_ids
+                    if marketplace.get_agent_details(agent_id, revalidate=True).version != "1.0.0"]
+    report("update check (per agent)", t.seconds, f"{len(outdated)} outdated, {served(server, before)}")
+    before = dict(server.stats)
+    with Timer() as t:
+        updates = marketplace.check_updates()
+    report("update check (bulk)", t.seconds, f"{len(updates)} outdated, {served(server, before)}")
+    marketplace.get_available_agents(revalidate=True)
+    before = dict(server.stats)
+    with Timer() as t:
+        updates = marketplace.check_updates(local_only=True)
+    report("update check (catalog)", t.seconds, f"{len(updates)} outdated, {served(server, before)}")
+
+    agent_ids = [agent.id for agent in updates]
+    before = dict(server.stats)
+    with Timer() as t, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(marketplace.update_agent, agent_ids))
+    updated = sum(results)
+    report("update (delta)", t.seconds, f"{updated}/{len(agent_ids)} agents, {updated / t.seconds:.1f}/s, "
+                                        f"{served(server, before)}")
+
+    before = dict(server.stats)
+    with Timer() as t:
+        results = [marketplace.switch_version(agent_id, "1.0.0") for agent_id in agent_ids]
+    report("rollback (from store)", t.seconds, f"{sum(results)}/{len(agent_ids)} agents, {served(server, before)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the marketplace client against a local stand-in server")
+    parser.add_argument("--agents", type=int, default=2000, help="Catalog size")
+    parser.add_argument("--installs", type=int, default=50, help="Agents to install and update")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent installs and updates")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--package-kb", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per search query")
+    args = parser.parse_args()
+
+    server = StandInMarketplace(args.agents, args.package_kb, args.latency_ms / 1000, args.error_rate)
+    server.start()
+    # Build every package digest up front, so the timings are the client's, not the stand-in's
+    server.page(None, 0)
+    print(f"stand-in at {server.url}: {args.agents} agents, {args.latency_ms} ms latency, "
+          f"{args.error_rate:.0%} errors")
+    try:
+        with tempfile.TemporaryDirectory() as agents_dir:
+            marketplace = bench_catalog(server, agents_dir, args.page_size)
+            bench_search(marketplace, args.repeat)
+            agent_ids = [f"agent-{i}" for i in range(min(args.installs, args.agents))]
+            bench_install(server, marketplace, agent_ids, args.workers)
+            bench_update(server, marketplace, agent_ids, args.workers)
+            print(f"store: {marketplace.store.usage()}")
+            print(f"client stats: {marketplace.client.stats}")
+            marketplace.client.close()
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
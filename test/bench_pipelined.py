@@ -0,0 +1,135 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.core import AgentSession
+from veldaos.core.frame import Frame
+from veldaos.core.screen_analyzer import ScreenAnalyzer
+
+
+class SimulatedScreen:
+    """
+    OS interaction stand-in with a 1080p screen. Capture and PNG encoding are
+    real. Depending on the scenario the screen stays put, a dialog opens as
+    soon as something is clicked, or, while the success condition runs (after
+    a speculative capture), a cursor sprite moves or a dialog opens late.
+    """
+
+    def __init__(self, scenario: str, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.scenario = scenario
+        self.screen = np.full((1080, 1920, 3), 235, dtype=np.uint8)
+        # Text-like texture, so PNG encoding costs what it would on a real desktop
+        self.screen[100:980:20, 100:1800] = rng.integers(0, 255, (44, 1700, 3), dtype=np.uint8)
+        self.clicks = 0
+        self.captures = 0
+
+    def _open_dialog(self):
+        top = 200 + 30 * (self.clicks % 10)
+        self.screen[top:top + 400, 600:1300] = (self.clicks * 37) % 255
+
+    def _after_click(self):
+        if self.scenario == "dialog":
+            self._open_dialog()
+
+    def during_condition(self):
+        if self.scenario == "cursor":
+            x = 200 + 40 * self.clicks % 1500
+            self.screen[500:519, x:x + 12] = 0
+        elif self.scenario == "late":
+            self._open_dialog()
+
+    def capture_frame(self, region=None) -> Frame:
+        self.captures += 1
+        return Frame.from_array(self.screen.copy())
+
+    def take_screenshot(self, region=None) -> bytes:
+        self.captures += 1
+        buffer = io.BytesIO()
+        Image.fromarray(self.screen).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def click(self, x: int, y: int) -> bool:
+        self.clicks += 1
+        self._after_click()
+        return True
+
+    def wait(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class SlowOCR:
+    """Takes seconds for a full 1080p frame and proportionally less for a smaller crop, like tesseract."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = 0
+
+    def perform_ocr(self, screenshot: bytes):
+        self.calls += 1
+        # Width and height from the PNG header
+        width, height = int.from_bytes(screenshot[16:20], "big"), int.from_bytes(screenshot[20:24], "big")
+        time.sleep(self.seconds * width * height / (1920 * 1080))
+        return [{"text": "Next", "x": 900, "y": 500, "width": 60, "height": 20}]
+
+
+class SlowLLM:
+    class Message:
+        content = '{"action": "click", "parameters": {"element": 0}}'
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def get_response(self, *args, **kwargs):
+        time.sleep(self.seconds)
+        return self.Message()
+
+
+def run(scenario: str, pipelined: bool, args) -> float:
+    screen = SimulatedScreen(scenario)
+    ocr = SlowOCR(args.ocr_ms / 1000)
+    analyzer = ScreenAnalyzer(None, ocr_handler=ocr, llm_handler=SlowLLM(args.llm_ms / 1000))
+    session = AgentSession("bench", screen, analyzer)
+
+    def not_done() -> bool:
+        time.sleep(args.condition_ms / 2000)
+        screen.during_condition()
+        time.sleep(args.condition_ms / 2000)
+        return False
+
+    start = time.perf_counter()
+    session.loop("Click next", max_attempts=args.steps, success_condition=not_done, pipelined=pipelined)
+    per_step = (time.perf_counter() - start) / args.steps
+    print(f"{scenario:8} {'pipelined' if pipelined else 'sequential':10} {per_step * 1000:8.1f} ms/step  "
+          f"({ocr.calls} OCR runs, {screen.captures} captures)")
+    return per_step
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and pipelined AgentSession.loop step times")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--ocr-ms", type=float, default=150.0)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--condition-ms", type=float, default=200.0, help="Time the success condition takes")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    for scenario in ("static", "cursor", "dialog", "late"):
+        sequential = run(scenario, False, args)
+        pipelined = run(scenario, True, args)
+        print(f"{scenario:8} {'gain':10} {(sequential - pipelined) * 1000:8.1f} ms/step")
+
+
+if __name__ == "__main__":
+    main()
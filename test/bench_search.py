@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.marketplace.marketplace import AgentPackage
+from veldaos.marketplace.search import SearchIndex, parse_query
+
+WORDS = ("pdf summarizer email inbox calendar scheduler invoice spreadsheet browser research code review "
+         "translate slack meeting notes excel form filler crm sales support ticket jira github deploy test "
+         "screenshot ocr writer social media twitter linkedin image resize photo video transcript").split()
+CAPABILITIES = ("ocr", "browser", "email", "files", "code", "vision", "voice", "calendar")
+
+
+def synthetic_catalog(count: int, seed: int = 0) -> List[AgentPackage]:
+    rng = random.Random(seed)
+    agents = []
+    for i in range(count):
+        name = " ".join(rng.sample(WORDS, 2)).title() + f" {i}"
+        agents.append(AgentPackage(
+            id=f"agent-{i}", name=name, version="1.0.0",
+            description=" ".join(rng.choices(WORDS, k=12)) + f" tag{rng.randrange(count // 10 + 1)}",
+            author=f"author{rng.randrange(2000)}", price=rng.choice((0.0, 0.0, 1.99, 4.99, 9.99, 29.0)),
+            download_url=f"https://example.invalid/agent-{i}.zip",
+            capabilities=rng.sample(CAPABILITIES, rng.randint(1, 3)), requirements={},
+            rating=round(rng.uniform(1, 5), 1), downloads=rng.randrange(100000),
+        ))
+    return agents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SearchIndex build and query latency")
+    parser.add_argument("--agents", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200, help="Runs per query")
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.agents)
+    start = time.perf_counter()
+    index = SearchIndex(catalog)
+    print(f"build: {args.agents} agents in {time.perf_counter() - start:.2f} s")
+
+    queries = ["summarizer", "pdf summ", "invoce", "email cap:ocr", "meeting notes price<5 rating>=4",
+               "tag42", "sc", "", "cap:voice rating>4.5"]
+    for query in queries:
+        text, filters = parse_query(query)
+        index.search(text, **filters)  # Warm up (sorts the term list once)
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(text, **filters)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        print(f"{query!r:36} p50 {statistics.median(times):7.3f} ms  p99 {times[int(len(times) * 0.99) - 1]:7.3f} ms"
+              f"  {len(results)} results")
+
+    # Incremental sync: one changed agent, one new, one removed
+    changed = catalog[:]
+    changed[0] = changed[0].model_copy(update={"description": "now with quantum spreadsheet support"})
+    changed.append(synthetic_catalog(1, seed=1)[0].model_copy(update={"id": "agent-new"}))
+    del changed[1]
+    start = time.perf_counter()
+    updated, removed = index.sync(changed)
+    print(f"sync: {updated} updated, {removed} removed in {(time.perf_counter() - start) * 1000:.1f} ms")
+    assert index.search("quantum")[0].id == "agent-0"
+
+
+if __name__ == "__main__":
+    main()
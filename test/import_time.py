@@ -0,0 +1,100 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be pulled in by a plain `import veldaos.core`
+HEAVY_MODULES = ("cv2", "numpy", "PIL", "pyautogui", "keyboard", "mouse", "openai", "pytesseract")
+
+# What any import of veldaos.core has to pay for: the packages it needs
+# eagerly, and defining a pydantic model (which imports the rest of pydantic).
+# Import time varies a lot between machines, so the budget is a ratio against
+# this, measured on the same machine in the same run.
+BASELINE = ("import asyncio, concurrent.futures, loguru; from pydantic import BaseModel; "
+            "type('Model', (BaseModel,), {'__annotations__': {'name': str}})")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(statement: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Run an import statement in a fresh interpreter with -X importtime.
+
+    Returns:
+        (cumulative microseconds of everything the statement imported,
+         {top-level module: cumulative microseconds})
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [project_root, os.getenv("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr}")
+
+    total = 0
+    started = False
+    imported: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, name = int(match.group(2)), match.group(4)
+        if name == "site" and not started:
+            # Everything up to here is interpreter startup, paid by any script
+            started = True
+            continue
+        if not started:
+            continue
+        top = name.split(".")[0]
+        imported[top] = max(imported.get(top, 0), cumulative)
+        if len(match.group(3)) == 1:
+            total += cumulative
+    return total, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of veldaos.core")
+    parser.add_argument("--module", default="veldaos.core", help="Module to import")
+    parser.add_argument("--max-ratio", type=float, default=1.5,
+                        help="Maximum import time as a multiple of importing its dependencies alone")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Also fail above this absolute import time")
+    parser.add_argument("--runs", type=int, default=5, help="Runs to take the best of")
+    args = parser.parse_args()
+
+    best = baseline = None
+    imported: Dict[str, int] = {}
+    for _ in range(args.runs):
+        # Interleaved, so both see the same machine load
+        total, imported = measure(f"import {args.module}")
+        best = total if best is None else min(best, total)
+        total, _ = measure(BASELINE)
+        baseline = total if baseline is None else min(baseline, total)
+
+    failures: List[str] = []
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+    if heavy:
+        failures.append(f"heavy modules imported eagerly: {', '.join(heavy)}")
+    ratio = best / baseline
+    if ratio > args.max_ratio:
+        failures.append(f"{ratio:.2f}x its dependencies exceeds the {args.max_ratio:.2f}x budget")
+    if args.budget_ms is not None and best / 1000 > args.budget_ms:
+        failures.append(f"{best / 1000:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    print(f"import {args.module}: {best / 1000:.1f} ms (best of {args.runs}), "
+          f"{ratio:.2f}x its dependencies alone ({baseline / 1000:.1f} ms)")
+    for name, micros in sorted(imported.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<24} {micros / 1000:8.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
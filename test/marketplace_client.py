@@ -0,0 +1,132 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.marketplace.client import MarketplaceClient
+
+
+def fake_agent(i: int) -> dict:
+    return {"id": f"agent-{i}", "name": f"Agent {i}", "version": "1.0.0", "description": f"Test agent number {i}",
+            "author": "stub", "price": 0.0, "download_url": f"/packages/agent-{i}.zip", "capabilities": ["test"],
+            "requirements": {}, "rating": 4.0, "downloads": i}
+
+
+class StubMarketplace:
+    """Local marketplace stand-in serving /agents with ETag and Last-Modified validators."""
+
+    def __init__(self, agents: int, max_age: int = 0):
+        self.catalog = [fake_agent(i) for i in range(agents)]
+        self.max_age = max_age
+        self.hits = {"200": 0, "304": 0}
+        self._publish()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path != "/agents":
+                    self.send_error(404)
+                    return
+                not_modified = self.headers.get("If-None-Match") == stub.etag
+                self.send_response(304 if not_modified else 200)
+                self.send_header("ETag", stub.etag)
+                self.send_header("Last-Modified", stub.last_modified)
+                self.send_header("Cache-Control", f"max-age={stub.max_age}")
+                if not_modified:
+                    stub.hits["304"] += 1
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                stub.hits["200"] += 1
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _publish(self):
+        self.body = json.dumps(self.catalog).encode()
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:16] + '"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def update(self, agent: dict):
+        self.catalog.append(agent)
+        self._publish()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercise MarketplaceClient caching against a local stub server")
+    parser.add_argument("--agents", type=int, default=5000, help="Catalog size")
+    args = parser.parse_args()
+
+    stub = StubMarketplace(args.agents)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = MarketplaceClient(stub.url, cache_dir=cache_dir, max_age=60, stale_while_revalidate=3600)
+
+        agents, ms = timed(lambda: client.get_json("/agents"))
+        assert len(agents) == args.agents and stub.hits["200"] == 1
+        print(f"cold load         {ms:8.2f} ms  ({len(stub.body) / 1024:.0f} KiB)")
+
+        # The server sends max-age=0, so every load revalidates with If-None-Match
+        _, ms = timed(lambda: client.get_json("/agents"))
+        client.wait_for_revalidation()
+        assert stub.hits == {"200": 1, "304": 1}, stub.hits
+        print(f"stale load        {ms:8.2f} ms  (served from cache, revalidated in background: 304)")
+
+        stub.max_age = 60
+        client.get_json("/agents", revalidate=True)
+        requests_before = dict(stub.hits)
+        _, ms = timed(lambda: client.get_json("/agents"))
+        assert stub.hits == requests_before, "a fresh entry must not reach the server"
+        print(f"fresh load        {ms:8.2f} ms  (no request)")
+
+        # A new client reads the on-disk cache written by the first one
+        other = MarketplaceClient(stub.url, cache_dir=cache_dir)
+        _, ms = timed(lambda: other.get_json("/agents"))
+        assert stub.hits == requests_before
+        print(f"new process load  {ms:8.2f} ms  (on-disk cache, no request)")
+
+        stub.update(fake_agent(args.agents))
+        agents, ms = timed(lambda: client.get_json("/agents", revalidate=True))
+        assert len(agents) == args.agents + 1 and stub.hits["200"] == 2
+        print(f"changed catalog   {ms:8.2f} ms  (200 with the new catalog)")
+
+        stub.stop()
+        agents, ms = timed(lambda: client.get_json("/agents", revalidate=True))
+        assert len(agents) == args.agents + 1
+        print(f"server down       {ms:8.2f} ms  (stale copy served)")
+        print(f"client stats: {client.stats}")
+        client.close()
+        other.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import zipfile
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.marketplace.marketplace import compare_versions
+
+WORDS = ("pdf summarizer email inbox calendar scheduler invoice spreadsheet browser research code review "
+         "translate slack meeting notes excel form filler crm sales support ticket jira github deploy test "
+         "screenshot ocr writer social media twitter linkedin image resize photo video transcript").split()
+CAPABILITIES = ("ocr", "browser", "email", "files", "code", "vision", "voice", "calendar")
+RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+# Fixed timestamp for package members, so a rebuilt zip is byte-identical
+ZIP_DATE = (2024, 1, 1, 0, 0, 0)
+
+AGENT_SOURCE = '''from veldaos.core.agent import AgentAction, BaseAgent
+
+VERSION = {version!r}
+
+
+class Agent(BaseAgent):
+    def initialize(self):
+        pass
+
+    def process_screenshot(self, screenshot):
+        return AgentAction(action_type="wait", parameters={{"version": VERSION}}, confidence=1.0)
+
+    def handle_action_result(self, action, success):
+        pass
+
+    def cleanup(self):
+        pass
+'''
+
+
+class InstalledAgent(BaseModel):
+    id: str
+    version: str
+    sha256: Optional[str] = None
+
+
+class UpdateCheck(BaseModel):
+    installed: List[InstalledAgent]
+
+
+class StandInMarketplace:
+    """
+    Local stand-in for the marketplace API, serving a synthetic catalog.
+
+    Implements what MarketplaceClient and Marketplace use:
+        GET /agents[?limit=&cursor=]                 catalog, paginated with Link rel="next"
+        GET /agents/<id>                             one listing
+        POST /agents/updates                         listings of the outdated agents among those sent
+        GET /agents/<id>/versions/<v>/manifest       {"files": {path: sha256}} of a package
+        GET /packages/<id>/<version>.zip             package zip (Range requests supported)
+        GET /blobs/<sha256>                          one package file by content
+
+    JSON responses carry an ETag and answer If-None-Match with 304. Every
+    package holds agent.py, metadata.json, a vendored library shared by all
+    agents and a data file of its own; release() publishes a new version that
+    only changes agent.py and metadata.json, as a small update would.
+    Latency and 503 errors can be injected into every request.
+
+    Example:
+        server = StandInMarketplace(agents=1000, latency=0.02)
+        url = server.start()
+        marketplace = Marketplace(url, "./agents")
+        ...
+        server.stop()
+    """
+
+    def __init__(self, agents: int = 1000, package_kb: int = 64, latency: float = 0.0, error_rate: float = 0.0,
+                 max_age: int = 0, seed: int = 0):
+        """
+        Args:
+            agents: Catalog size
+            package_kb: Size of each agent's own data file (random, so incompressible)
+            latency: Seconds added to every request
+            error_rate: Fraction of requests answered with 503
+            max_age: Cache-Control max-age of JSON responses
+            seed: Seed of the synthetic catalog and of injected errors
+        """
+        self.package_kb = package_kb
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_age = max_age
+        self.seed = seed
+        self.stats: Counter = Counter()
+        self.url: Optional[str] = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._catalog = [self._listing(i) for i in range(agents)]
+        self._positions = {agent["id"]: i for i, agent in enumerate(self._catalog)}
+        self._vendor = self._random_text(random.Random(-1), 64 * 1024)
+        self._digests: Dict[Tuple[str, str], str] = {}
+        self._packages: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._blobs: Dict[str, bytes] = {}
+        self._pages: Dict[Tuple[Optional[int], int], bytes] = {}
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    # Synthetic content
+
+    def _listing(self, i: int) -> Dict:
+        rng = random.Random(self.seed * 1000003 + i)
+        return {
+            "id": f"agent-{i}",
+            "name": " ".join(rng.sample(WORDS, 2)).title() + f" {i}",
+            "version": "1.0.0",
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "author": f"author{rng.randrange(500)}",
+            "price": rng.choice((0.0, 0.0, 1.99, 4.99, 9.99)),
+            "download_url": f"/packages/agent-{i}/1.0.0.zip",
+            "capabilities": rng.sample(CAPABILITIES, rng.randint(1, 3)),
+            "requirements": {},
+            "rating": round(rng.uniform(1, 5), 1),
+            "downloads": rng.randrange(100000),
+            "entry_point": "agent:Agent",
+        }
+
+    @staticmethod
+    def _random_text(rng: random.Random, size: int) -> bytes:
+        return rng.randbytes(size).hex()[:size].encode()
+
+    def _files(self, agent: Dict) -> Dict[str, bytes]:
+        metadata = {key: value for key, value in agent.items() if key != "sha256"}
+        return {
+            "metadata.json": json.dumps(metadata, indent=2, sort_keys=True).encode(),
+            "agent.py": AGENT_SOURCE.format(version=agent["version"]).encode(),
+            "vendor/textlib.py": b"# Vendored helper library\nDATA = '''\n" + self._vendor + b"\n'''\n",
+            "data/model.bin": random.Random(agent["id"]).randbytes(self.package_kb * 1024),
+        }
+
+    def _build_package(self, agent: Dict) -> bytes:
+        buffer = io.BytesIO()
+        # Stored, not deflated: the listing of every agent needs its digest, so packages are built often
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for name, data in self._files(agent).items():
+                archive.writestr(zipfile.ZipInfo(name, ZIP_DATE), data)
+        return buffer.getvalue()
+
+    def package(self, agent_id: str, version: str) -> bytes:
+        """The zip of an agent version (the current one only). The last few are kept in memory."""
+        agent = self._current(agent_id)
+        if agent["version"] != version:
+            raise KeyError(version)
+        key = (agent_id, version)
+        with self._lock:
+            data = self._packages.get(key)
+            if data is not None:
+                self._packages.move_to_end(key)
+                return data
+        data = self._build_package(agent)
+        with self._lock:
+            self._packages[key] = data
+            self._digests[key] = hashlib.sha256(data).hexdigest()
+            while len(self._packages) > 256:
+                self._packages.popitem(last=False)
+        return data
+
+    def _current(self, agent_id: str) -> Dict:
+        try:
+            return self._catalog[self._positions[agent_id]]
+        except KeyError:
+            raise KeyError(agent_id) from None
+
+    def agent(self, agent_id: str) -> Dict:
+        """A catalog listing, with the digest of its package."""
+        agent = self._current(agent_id)
+        key = (agent_id, agent["version"])
+        if key not in self._digests:
+            self.package(agent_id, agent["version"])
+        return {**agent, "sha256": self._digests[key]}
+
+    def release(self, agent_id: str) -> Dict:
+        """Publish the next patch version of an agent and return its listing."""
+        with self._lock:
+            agent = self._current(agent_id)
+            major, minor, patch = (int(part) for part in agent["version"].split("."))
+            version = f"{major}.{minor}.{patch + 1}"
+            agent["version"] = version
+            agent["download_url"] = f"/packages/{agent_id}/{version}.zip"
+            self._pages.clear()
+        return self.agent(agent_id)
+
+    def manifest(self, agent_id: str, version: str) -> Dict[str, str]:
+        agent = self._current(agent_id)
+        if agent["version"] != version:
+            raise KeyError(version)
+        files = {}
+        for name, data in self._files(agent).items():
+            digest = hashlib.sha256(data).hexdigest()
+            with self._lock:
+                self._blobs[digest] = data
+            files[name] = digest
+        return files
+
+    def page(self, limit: Optional[int], cursor: int) -> Tuple[bytes, Optional[int]]:
+        """A page of the catalog as JSON, and the cursor of the next one."""
+        end = len(self._catalog) if limit is None else min(cursor + limit, len(self._catalog))
+        key = (limit, cursor)
+        with self._lock:
+            body = self._pages.get(key)
+        if body is None:
+            body = json.dumps([self.agent(agent["id"]) for agent in self._catalog[cursor:end]]).encode()
+            with self._lock:
+                self._pages[key] = body
+        return body, (end if end < len(self._catalog) else None)
+
+    # HTTP
+
+    def _json(self, request: Request, body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+        etag = '"' + hashlib.sha256(body).hexdigest()[:20] + '"'
+        headers = {"ETag": etag, "Cache-Control": f"max-age={self.max_age}", **(headers or {})}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _ranged(request: Request, data: bytes) -> Response:
+        headers = {"Accept-Ranges": "bytes"}
+        match = RANGE.fullmatch(request.headers.get("range", "").strip())
+        if match is None:
+            return Response(data, media_type="application/octet-stream", headers=headers)
+        start = int(match.group(1))
+        end = min(int(match.group(2)), len(data) - 1) if match.group(2) else len(data) - 1
+        if start >= len(data) or start > end:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(data[start:end + 1], status_code=206, media_type="application/octet-stream", headers=headers)
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="veldaOS marketplace stand-in")
+
+        @app.middleware("http")
+        async def inject_faults(request: Request, call_next):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats["503"] += 1
+                return JSONResponse({"detail": "Injected failure"}, status_code=503)
+            response = await call_next(request)
+            self.stats[str(response.status_code)] += 1
+            self.stats["bytes"] += int(response.headers.get("content-length", 0))
+            return response
+
+        @app.get("/agents")
+        def list_agents(request: Request, limit: Optional[int] = None, cursor: int = 0):
+            if limit is not None and limit < 1:
+                raise HTTPException(status_code=400, detail="limit must be positive")
+            body, next_cursor = self.page(limit, cursor)
+            headers = {}
+            if next_cursor is not None:
+                headers["Link"] = f'</agents?limit={limit}&cursor={next_cursor}>; rel="next"'
+            return self._json(request, body, headers)
+
+        @app.post("/agents/updates")
+        def check_updates(check: UpdateCheck):
+            updates = []
+            for installed in check.installed:
+                try:
+                    agent = self.agent(installed.id)
+                except KeyError:
+                    continue
+                order = compare_versions(agent["version"], installed.version)
+                if order > 0 or (order == 0 and installed.sha256 and agent["sha256"] != installed.sha256):
+                    updates.append(agent)
+            return updates
+
+        @app.get("/agents/{agent_id}")
+        def get_agent(request: Request, agent_id: str):
+            try:
+                return self._json(request, json.dumps(self.agent(agent_id)).encode())
+            except KeyError:
+                raise HTTPException(status_code=404, detail="Agent not found")
+
+        @app.get("/agents/{agent_id}/versions/{version}/manifest")
+        def get_manifest(request: Request, agent_id: str, version: str):
+            try:
+                return self._json(request, json.dumps({"files": self.manifest(agent_id, version)}).encode())
+            except KeyError:
+                raise HTTPException(status_code=404, detail="Version not found")
+
+        @app.get("/packages/{agent_id}/{version}.zip")
+        def get_package(request: Request, agent_id: str, version: str):
+            try:
+                return self._ranged(request, self.package(agent_id, version))
+            except KeyError:
+                raise HTTPException(status_code=404, detail="Package not found")
+
+        @app.get("/blobs/{digest}")
+        def get_blob(request: Request, digest: str):
+            with self._lock:
+                data = self._blobs.get(digest)
+            if data is None:
+                raise HTTPException(status_code=404, detail="Blob not found")
+            return self._ranged(request, data)
+
+        return app
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on a background thread and return the base URL (port 0 picks a free port)."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Accepted connections inherit this; without it small responses wait out delayed ACKs
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.bind((host, port))
+        config = uvicorn.Config(self.app, log_level="warning", lifespan="off", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]},
+                                        name="marketplace-stand-in", daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Marketplace stand-in failed to start")
+            time.sleep(0.01)
+        self.url = f"http://{host}:{sock.getsockname()[1]}"
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic marketplace for offline runs of veldaOS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--agents", type=int, default=1000, help="Catalog size")
+    parser.add_argument("--package-kb", type=int, default=64, help="Size of each agent's own data file")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--max-age", type=int, default=0, help="Cache-Control max-age of JSON responses")
+    args = parser.parse_args()
+
+    server = StandInMarketplace(args.agents, args.package_kb, args.latency_ms / 1000, args.error_rate, args.max_age)
+    print(f"Serving {args.agents} agents on http://{args.host}:{args.port}")
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
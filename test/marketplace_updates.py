@@ -0,0 +1,93 @@
+import os
+import stat
+import sys
+import tempfile
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from marketplace_server import StandInMarketplace
+from veldaos.marketplace.marketplace import Marketplace
+
+
+def requests_served(server: StandInMarketplace) -> int:
+    return sum(count for key, count in server.stats.items() if key.isdigit())
+
+
+def check_delta_update(server: StandInMarketplace, agents_dir: str, extract: bool) -> None:
+    marketplace = Marketplace(server.url, agents_dir, extract_packages=extract)
+    assert all(marketplace.install_agents(["agent-0", "agent-1"]).values())
+    server.release("agent-0")
+
+    assert marketplace.update_agent("agent-0")
+    assert marketplace.registry.get("agent-0").version == "1.0.1"
+    stored = marketplace.store.versions("agent-0")["1.0.1"]
+    assert stored["package"] != server.agent("agent-0")["sha256"], "expected a locally rebuilt package"
+
+    # A delta-built version must not look outdated against its own listing
+    assert marketplace.check_updates() == [], marketplace.check_updates()
+    marketplace.get_available_agents(revalidate=True)
+    assert marketplace.check_updates(local_only=True) == []
+    before = requests_served(server)
+    assert marketplace.update_agent("agent-0")
+    assert requests_served(server) - before == 1, "an up-to-date agent was downloaded again"
+
+    if extract:
+        # A stored file that no longer matches the manifest fails the update and keeps the installed version
+        server.release("agent-1")
+        digest = marketplace.store.versions("agent-1")["1.0.0"]["files"]["vendor/textlib.py"]
+        blob = marketplace.store.blob_path(digest)
+        os.chmod(blob, stat.S_IRUSR | stat.S_IWUSR)
+        blob.write_bytes(b"corrupt")
+        assert not marketplace.update_agent("agent-1"), "a package that fails its manifest was installed"
+        assert marketplace.registry.get("agent-1").version == "1.0.0"
+    print(f"ok: delta update {'extracted' if extract else 'zip'}")
+    marketplace.client.close()
+
+
+def check_extracted_disk_use(server: StandInMarketplace, agents_dir: str) -> None:
+    marketplace = Marketplace(server.url, agents_dir, extract_packages=True)
+    assert marketplace.install_agents(["agent-2"])["agent-2"]
+    version_size = sum(len(data) for data in server._files(server._current("agent-2")).values())
+    server.release("agent-2")
+    assert marketplace.update_agent("agent-2")
+
+    # Both versions are kept; only the files the release changed are stored twice
+    stored = marketplace.store.versions("agent-2")
+    assert sorted(stored) == ["1.0.0", "1.0.1"], sorted(stored)
+    used = marketplace.store.usage()["bytes"]
+    assert used < version_size * 1.2, f"{used} bytes stored for two versions of {version_size} bytes"
+    for entry in stored.values():
+        assert not marketplace.store.has(entry["package"]), "the package zip is stored next to its files"
+
+    # The installed files are the stored blobs themselves
+    location = marketplace.registry.get("agent-2").path
+    for name, digest in stored["1.0.1"]["files"].items():
+        installed = os.stat(os.path.join(location, *name.split("/")))
+        assert installed.st_ino == marketplace.store.blob_path(digest).stat().st_ino, name
+    print(f"ok: two extracted versions use {used / version_size:.2f}x the disk of one")
+    marketplace.client.close()
+
+
+def main():
+    for extract in (False, True):
+        server = StandInMarketplace(20, package_kb=16)
+        server.start()
+        try:
+            with tempfile.TemporaryDirectory() as agents_dir:
+                check_delta_update(server, agents_dir, extract)
+        finally:
+            server.stop()
+
+    server = StandInMarketplace(20, package_kb=256)
+    server.start()
+    try:
+        with tempfile.TemporaryDirectory() as agents_dir:
+            check_extracted_disk_use(server, agents_dir)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
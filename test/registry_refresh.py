@@ -0,0 +1,70 @@
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.marketplace.marketplace import Marketplace
+from veldaos.marketplace.registry import AgentRegistry
+
+
+def build_package(agents_dir: Path, agent_id: str, version: str = "1.0.0") -> Path:
+    path = agents_dir / agent_id / f"{agent_id}-{version}.zip"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("metadata.json", json.dumps({
+            "id": agent_id, "name": agent_id.title(), "version": version, "description": "", "author": "test",
+            "price": 0.0, "download_url": "", "capabilities": [], "requirements": {}, "rating": 0.0, "downloads": 0,
+        }))
+        archive.writestr("agent.py", "class Agent:\n    pass\n")
+    return path
+
+
+def register_in_child(agents_dir: str, agent_id: str) -> None:
+    AgentRegistry(agents_dir).register(build_package(Path(agents_dir), agent_id))
+
+
+def other_process(agents_dir: Path, agent_id: str) -> None:
+    process = multiprocessing.Process(target=register_in_child, args=(str(agents_dir), agent_id))
+    process.start()
+    process.join()
+    assert process.exitcode == 0, f"registering {agent_id} in another process failed"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        agents_dir = Path(tmp)
+        marketplace = Marketplace("http://127.0.0.1:9", str(agents_dir))
+        registry = marketplace.registry
+
+        # Several saves, so the registry generation is ahead of any entry's generation
+        for _ in range(3):
+            registry.register(build_package(agents_dir, "a1"))
+        registry.resolve("a1")  # A loaded class must not leak its generation into the registry's
+        assert [agent.id for agent in marketplace.get_installed_agents()] == ["a1"]
+        generation = registry.generation
+
+        other_process(agents_dir, "a2")
+        installed = sorted(agent.id for agent in marketplace.get_installed_agents())
+        assert installed == ["a1", "a2"], f"stale installed list after another process registered: {installed}"
+        assert registry.generation == generation + 1, (generation, registry.generation)
+
+        # Writes from this process continue from the other process's generation
+        registry.register(build_package(agents_dir, "a3"))
+        with open(registry.path) as f:
+            saved = json.load(f)["generation"]
+        assert saved == generation + 2, f"generation went from {generation + 1} to {saved}"
+
+        other_process(agents_dir, "a4")
+        assert len(marketplace.get_installed_agents()) == 4
+        print(f"ok: generation {registry.generation}, installed {[entry.id for entry in registry.list()]}")
+
+
+if __name__ == "__main__":
+    main()
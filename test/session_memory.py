@@ -0,0 +1,75 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from veldaos.core.elements import TextElement
+from veldaos.core.memory import SessionMemory
+from veldaos.core.screen_analyzer import ScreenAnalyzer
+
+
+class ScriptedOCR:
+    """Returns whatever elements the test put on screen."""
+
+    def __init__(self):
+        self.elements = []
+
+    def perform_ocr(self, screenshot):
+        return list(self.elements)
+
+
+class RecordingLLM:
+    """Stateless like the real model: each call sees only what it is sent."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_response(self, prompt, screenshot, goal=None, context=None):
+        self.calls.append((screenshot, context or ""))
+
+        class Message:
+            content = '{"action": "click", "parameters": {"element": 0}}'
+        return Message()
+
+
+def encode(frame: np.ndarray) -> bytes:
+    return cv2.imencode('.png', frame)[1].tobytes()
+
+
+def main():
+    screen = np.full((600, 800, 3), 230, np.uint8)
+    ocr = ScriptedOCR()
+    llm = RecordingLLM()
+    analyzer = ScreenAnalyzer(None, ocr_handler=ocr, llm_handler=llm)
+    memory = SessionMemory(keyframe_interval=3)
+
+    ocr.elements = [TextElement("Inbox", 20, 20, 60, 20), TextElement("Compose", 20, 60, 80, 20)]
+    analyzer.analyze_screenshot(encode(screen), "send the draft", memory=memory)
+
+    # A small change: only a crop is sent, but the prompt still names the elements outside it
+    screen[500:540, 600:700] = 0
+    ocr.elements.append(TextElement("Send", 610, 510, 60, 20))
+    analyzer.analyze_screenshot(encode(screen), "send the draft", memory=memory)
+    image, context = llm.calls[-1]
+    assert cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR).shape[:2] != screen.shape[:2]
+    for line in ("[0] Inbox", "[1] Compose", "[2] Send"):
+        assert line in context, f"{line!r} missing from the prompt:\n{context}"
+    print("ok: unchanged elements are listed next to a cropped frame")
+
+    # Every keyframe_interval steps the whole screen is sent again
+    sizes = []
+    for step in range(4):
+        screen[100 + step * 40:120 + step * 40, 300:340] = step * 50
+        analyzer.analyze_screenshot(encode(screen), "send the draft", memory=memory)
+        sizes.append(cv2.imdecode(np.frombuffer(llm.calls[-1][0], np.uint8), cv2.IMREAD_COLOR).shape[:2])
+    assert sizes.count(screen.shape[:2]) == 1, sizes
+    print(f"ok: full frame after {memory.keyframe_interval} cropped steps")
+
+
+if __name__ == "__main__":
+    main()
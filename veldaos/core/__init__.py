@@ -1,33 +1,126 @@
-from typing import Optional, Callable, Any
-from datetime import datetime, time
+from __future__ import annotations
+
+from typing import Optional, Callable, Any, List, Dict, Tuple, Union, TYPE_CHECKING
+from datetime import datetime, time, timedelta
+from concurrent.futures import ThreadPoolExecutor, Future
 import asyncio
+import functools
+import importlib
+import threading
 from loguru import logger
 import os
 
 from .agent import BaseAgent
-from .os_interaction import OSInteraction
-from .screen_analyzer import ScreenAnalyzer
+from .frame import Frame
+from .elements import Action, TextElement
+
+# Everything below pulls in pyautogui, cv2, numpy, PIL, OpenAI or tesseract, so
+# it is imported on first use instead of with the package (see __getattr__).
+if TYPE_CHECKING:
+    from .os_interaction import OSInteraction
+    from .screen_analyzer import ScreenAnalyzer
+    from .memory import SessionMemory
+    from .replay import SessionRecorder
+    from .workers import WorkerPool, WorkerTask, WorkerResult
+    from .scheduler import Scheduler, Schedule, Job
+
+_LAZY_EXPORTS = {
+    "OSInteraction": ".os_interaction",
+    "ScreenAnalyzer": ".screen_analyzer",
+    "SessionMemory": ".memory",
+    "SessionRecorder": ".replay",
+    "WorkerPool": ".workers",
+    "WorkerTask": ".workers",
+    "WorkerResult": ".workers",
+    "Scheduler": ".scheduler",
+    "Schedule": ".scheduler",
+    "Job": ".scheduler",
+    "SQLiteJobStore": ".jobstore",
+    "DispatchPool": ".dispatch",
+    "VeldaDaemon": ".daemon",
+    "DaemonClient": ".daemon",
+    "SandboxedAgent": ".sandbox",
+    "SandboxLimits": ".sandbox",
+}
+
+_instance_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    # The global `veldaos` instance is only built when first used
+    if name == "veldaos":
+        with _instance_lock:
+            if "veldaos" not in globals():
+                globals()["veldaos"] = VeldaOS()
+        return globals()["veldaos"]
+
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
 
 class VeldaOS:
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, job_store: Optional[str] = None,
+                 misfire_policy: str = "coalesce", misfire_grace: Optional[float] = None,
+                 max_concurrent_runs: int = 1, max_queue: int = 100, overflow_policy: str = "defer",
+                 per_agent_limit: int = 1):
+        from .os_interaction import OSInteraction
+        from .screen_analyzer import ScreenAnalyzer
+        from .scheduler import Scheduler
+        from .jobstore import SQLiteJobStore
+        from .dispatch import DispatchPool
+        
+        self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.os_interaction = OSInteraction()
         self.active_agents = {}
-        self.scheduled_tasks = []
-        self.screen_analyzer = ScreenAnalyzer(
-            openai_api_key or os.getenv("OPENAI_API_KEY")
+        # Pass job_store (an SQLite path) to keep schedules and run history across restarts
+        # Due jobs share the screen and LLM quota, so they go through a bounded pool
+        self.dispatch_pool = DispatchPool(
+            max_workers=max_concurrent_runs,
+            max_queue=max_queue,
+            per_agent_limit=per_agent_limit,
+            overflow_policy=overflow_policy
         )
+        self.scheduler = Scheduler(
+            store=SQLiteJobStore(job_store) if job_store else None,
+            misfire_policy=misfire_policy,
+            misfire_grace=misfire_grace,
+            pool=self.dispatch_pool
+        )
+        self.screen_analyzer = ScreenAnalyzer(self.openai_api_key)
     
-    def open(self, app_name: str) -> 'AgentSession':
+    def open(self, app_name: str, record_to: Optional[str] = None) -> 'AgentSession':
         """
         Open a new agent session for a specific application.
         
+        The application is launched when the session is entered, with either
+        "with" or "async with". In an async context the session's loop() is a
+        coroutine and blocking stages run in an executor.
+        
+        Pass record_to to save the session's frames, OCR output, LLM responses
+        and actions for offline replay (see veldaos.core.replay).
+        
         Example:
             with veldaos.open("chrome") as agent:
                 agent.loop("Find and click the login button")
+            
+            async with veldaos.open("chrome") as agent:
+                await agent.loop("Find and click the login button", timeout=60)
         """
         logger.info(f"Opening new agent session for {app_name}")
         
+        session = AgentSession(app_name, self.os_interaction, self.screen_analyzer,
+                               launcher=lambda: self._launch_app(app_name))
+        if record_to:
+            from .replay import SessionRecorder
+            SessionRecorder(record_to).attach(session)
+        return session
+    
+    def _launch_app(self, app_name: str) -> None:
+        """Launch an application through the Start menu search."""
         # Press Windows key to open Start menu
         self.os_interaction.press_key("win")
         
@@ -40,90 +133,387 @@ class VeldaOS:
         # Press Enter to launch Command Prompt
         self.os_interaction.press_key("enter")
         self.os_interaction.wait(0.8)
-        
-        return AgentSession(app_name, self.os_interaction, self.screen_analyzer)
     
-    def schedule(self, time: time) -> 'TaskScheduler':
+    def schedule(self, when: Union[time, timedelta, str, Schedule], name: Optional[str] = None,
+                 misfire_policy: Optional[str] = None, priority: str = "normal",
+                 agent: Optional[str] = None, deadline: Optional[float] = None,
+                 timeout: Optional[float] = None) -> 'TaskScheduler':
         """
-        Schedule tasks to run at specific times.
+        Schedule tasks to run at specific times or intervals.
+        
+        Accepts a time of day, a timedelta, "every 30s"/"every 5m" style
+        intervals or a five-field cron expression. Due runs are queued by
+        priority ("high", "normal", "low"); runs sharing an agent key are
+        capped in concurrency, and a run still queued after deadline seconds
+        is dropped. A run that takes longer than timeout seconds is cancelled.
+        Async tasks are cancelled at their next await; for sync tasks the
+        timeout is cooperative: their session's loop() returns False after
+        its current step, and the run keeps its slot until the function
+        returns.
         
         Example:
             @veldaos.schedule(time(14, 30))  # Run at 2:30 PM
             def daily_task(agent):
                 agent.loop("Check emails")
+            
+            @veldaos.schedule("0 9 * * 1-5")  # Weekdays at 9:00
+            async def standup(agent):
+                await agent.loop("Open the standup notes")
+        """
+        return TaskScheduler(when, self.os_interaction, self.screen_analyzer, self.scheduler,
+                             name=name, misfire_policy=misfire_policy, priority=priority,
+                             agent=agent, deadline=deadline, timeout=timeout)
+    
+    @property
+    def scheduled_tasks(self) -> List[Job]:
+        """Jobs currently registered with the scheduler."""
+        return list(self.scheduler.jobs.values())
+    
+    def worker_pool(self, pool_size: int = 2, **kwargs) -> WorkerPool:
+        """
+        Create a pool of worker processes, each with its own Xvfb display.
+        
+        Example:
+            with veldaos.worker_pool(pool_size=4) as pool:
+                pool.submit(WorkerTask(app="gedit", prompt="Write a note",
+                                       launch_command="gedit"))
+                ...
         """
-        return TaskScheduler(time, self.os_interaction, self.screen_analyzer)
+        from .workers import WorkerPool
+        return WorkerPool(pool_size=pool_size, openai_api_key=self.openai_api_key, **kwargs)
+    
+    def run_parallel(self, tasks: List[WorkerTask], pool_size: int = 2, **kwargs) -> List[WorkerResult]:
+        """
+        Run independent automations in parallel, one process and display per worker.
+        
+        Example:
+            results = veldaos.run_parallel([
+                WorkerTask(app="firefox", prompt="Check the news", launch_command="firefox"),
+                WorkerTask(app="gedit", prompt="Write a note", launch_command="gedit"),
+            ], pool_size=2)
+        """
+        with self.worker_pool(pool_size=pool_size, **kwargs) as pool:
+            return pool.run(tasks)
+    
+    def scheduler_metrics(self) -> Dict[str, float]:
+        """Queue depth, running count and wait times of scheduled runs."""
+        return self.dispatch_pool.metrics()
+    
+    async def check_scheduled_tasks(self) -> List[Job]:
+        """Dispatch every scheduled task that is due now."""
+        return self.scheduler.run_pending()
     
     async def run_forever(self):
         """Run the VeldaOS event loop forever."""
-        while True:
-            await self.check_scheduled_tasks()
-            await asyncio.sleep(1)
+        await self.scheduler.run()
+
+# Pipelined loops compare frames on a grid of every SIGNATURE_STEP-th pixel, and
+# keep a speculative frame if at most SIGNATURE_TOLERANCE of the grid changed by
+# more than SIGNATURE_THRESHOLD (sum of RGB); a cursor or a clock stays below that
+SIGNATURE_STEP = 4
+SIGNATURE_THRESHOLD = 48
+SIGNATURE_TOLERANCE = 0.001
+# A larger change than this fraction of the frame is OCRed whole, not just where it changed
+PARTIAL_OCR_MAX_AREA = 0.5
+
+
+def _frame_signature(frame: Frame):
+    import numpy as np
+    
+    return np.asarray(frame.pixels[::SIGNATURE_STEP, ::SIGNATURE_STEP], dtype=np.int16).sum(axis=2)
+
+
+def _signatures_match(expected, actual) -> bool:
+    import numpy as np
+    
+    if expected.shape != actual.shape:
+        return False
+    changed = np.count_nonzero(np.abs(expected - actual) > SIGNATURE_THRESHOLD)
+    return changed <= SIGNATURE_TOLERANCE * expected.size
+
+
+def _changed_box(expected, actual, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Frame box (x, y, width, height) around the signature cells that changed, or None."""
+    import numpy as np
+    
+    changed = np.abs(expected - actual) > SIGNATURE_THRESHOLD
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    # A changed pixel can lie up to a grid step away from the cell that saw it
+    left = max((int(cols[0]) - 1) * SIGNATURE_STEP, 0)
+    top = max((int(rows[0]) - 1) * SIGNATURE_STEP, 0)
+    right = min((int(cols[-1]) + 2) * SIGNATURE_STEP, width)
+    bottom = min((int(rows[-1]) + 2) * SIGNATURE_STEP, height)
+    return left, top, right - left, bottom - top
+
+
+def _split_elements(text_elements: List[TextElement], box: Tuple[int, int, int, int]):
+    """
+    Split OCR elements into those clear of box and those touching it. The box
+    grows to cover every element it touches, so no text is cut in half.
+    Returns (kept elements, grown box).
+    """
+    left, top, right, bottom = box[0], box[1], box[0] + box[2], box[1] + box[3]
+    kept = list(text_elements)
+    while True:
+        touching = [elem for elem in kept
+                    if elem['x'] < right and elem['x'] + elem['width'] > left
+                    and elem['y'] < bottom and elem['y'] + elem['height'] > top]
+        if not touching:
+            return kept, (left, top, right - left, bottom - top)
+        for elem in touching:
+            left, top = min(left, elem['x']), min(top, elem['y'])
+            right, bottom = max(right, elem['x'] + elem['width']), max(bottom, elem['y'] + elem['height'])
+        kept = [elem for elem in kept if not any(elem is other for other in touching)]
 
 class AgentSession:
-    def __init__(self, app_name: str, os_interaction: OSInteraction, screen_analyzer: ScreenAnalyzer):
+    def __init__(self, app_name: str, os_interaction: OSInteraction, screen_analyzer: ScreenAnalyzer,
+                 memory: Optional[SessionMemory] = None, launcher: Optional[Callable[[], None]] = None):
         self.app_name = app_name
         self.os_interaction = os_interaction
         self.screen_analyzer = screen_analyzer
+        # Action/observation history shared by every loop() call in this session
+        if memory is None:
+            from .memory import SessionMemory
+            memory = SessionMemory()
+        self.memory = memory
+        self.recorder: Optional[SessionRecorder] = None
+        # Launches the app on first use; None once launched (or if nothing to launch)
+        self._launcher = launcher
+        self._cancelled = threading.Event()
         
     def __enter__(self):
         logger.info(f"Starting session for {self.app_name}")
+        self._ensure_launched()
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         logger.info(f"Closing session for {self.app_name}")
+        if self.recorder is not None:
+            self.recorder.close()
+    
+    async def __aenter__(self) -> 'AsyncAgentSession':
+        logger.info(f"Starting async session for {self.app_name}")
+        await asyncio.get_running_loop().run_in_executor(None, self._ensure_launched)
+        return AsyncAgentSession(self)
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__exit__(exc_type, exc_val, exc_tb)
+    
+    def cancel(self) -> None:
+        """Make loop() return False after its current step, from any thread."""
+        self._cancelled.set()
+    
+    def _ensure_launched(self) -> None:
+        launcher, self._launcher = self._launcher, None
+        if launcher is not None:
+            launcher()
     
     def loop(self, prompt: str, max_attempts: int = 1, 
-             success_condition: Optional[Callable] = None) -> bool:
+             success_condition: Optional[Callable] = None,
+             pipelined: bool = False, settle_time: float = 0.0) -> bool:
         """
         Loop until the prompt is achieved or max attempts reached.
         
+        With pipelined=True, the next step's capture and OCR run in the
+        background while success_condition is checked, which is the only work
+        they can overlap; without a success_condition the loop runs
+        sequentially. Before the speculative result is used, the screen is
+        captured again without PNG encoding and compared with it on a
+        downsampled grid. Changes to a small part of the screen (a cursor, a
+        clock) keep it. Anything larger replaces it with the new capture, but
+        only the changed box (grown to cover the OCR elements it touches) is
+        OCRed again; elements elsewhere are kept. So a change that lands
+        after the speculative capture costs a raw capture, a PNG encode and
+        OCR of the changed area on the critical path, where a sequential
+        loop would OCR the whole frame; a change over more than half the
+        frame costs a full OCR on top of the wasted speculative one, and is
+        slower than sequential by the capture and encode (about 15 ms at
+        1080p). Pipelining pays off when success_condition takes about as
+        long as capture and OCR.
+        settle_time delays the speculative capture and is only used when
+        pipelined.
+        
         Example:
             agent.loop("Click the login button", 
                       success_condition=lambda: is_logged_in())
         """
+        self._ensure_launched()
+        success_condition = self._start_loop(prompt, max_attempts, pipelined, success_condition)
+        pipelined = pipelined and success_condition is not None
+        
         attempts = 0
-        while attempts < max_attempts:
-            try:
-                # Take screenshot
-                screenshot = self.os_interaction.take_screenshot()
-                
-                # Process screenshot and determine action using OCR and LLM
-                action = self.screen_analyzer.analyze_screenshot(screenshot, prompt)
-                
-                # Execute action
-                success = self._execute_action(action)
-                
-                # Check if goal achieved
-                if success and (success_condition is None or success_condition()):
-                    logger.info(f"Successfully completed prompt: {prompt}")
-                    return True
-                
-                attempts += 1
-            except Exception as e:
-                logger.error(f"Error in loop: {e}")
-                attempts += 1
+        executor = ThreadPoolExecutor(max_workers=1) if pipelined else None
+        speculative: Optional[Future] = None
+        try:
+            while attempts < max_attempts:
+                if self._cancelled.is_set():
+                    logger.info(f"Loop cancelled: {prompt}")
+                    return False
+                try:
+                    if pipelined:
+                        # Take screenshot, reusing the speculative OCR if the screen still matches
+                        screenshot, text_elements = self._claim_observation(speculative)
+                        speculative = None
+                    else:
+                        # Take screenshot
+                        screenshot = self.os_interaction.take_screenshot()
+                        text_elements = None
+                    
+                    # Process screenshot and determine action using OCR and LLM
+                    action = self.screen_analyzer.analyze_screenshot(
+                        screenshot, prompt, text_elements=text_elements, memory=self.memory
+                    )
+                    
+                    # Execute action
+                    success = self._execute_action(action)
+                    self.memory.record(action, success)
+                    
+                    # Start observing the next step while the goal is checked
+                    if pipelined and attempts + 1 < max_attempts:
+                        speculative = executor.submit(self._observe, settle_time)
+                    
+                    # Check if goal achieved
+                    if success and (success_condition is None or success_condition()):
+                        logger.info(f"Successfully completed prompt: {prompt}")
+                        return True
+                    
+                    attempts += 1
+                except Exception as e:
+                    logger.error(f"Error in loop: {e}")
+                    attempts += 1
+        finally:
+            if speculative is not None:
+                speculative.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
         
         logger.warning(f"Failed to complete prompt after {max_attempts} attempts")
         return False
     
-    def _execute_action(self, action: dict) -> bool:
+    def run_agent(self, agent: BaseAgent, max_steps: int = 10, burst: int = 1, interval: float = 0.0) -> bool:
+        """
+        Let an agent (e.g. a SandboxedAgent from the marketplace) drive this session's app.
+        
+        Each step captures a Frame and passes it to agent.process_frame, or,
+        with burst > 1, captures that many frames interval seconds apart and
+        passes them to agent.process_screenshots, acting on the last action.
+        Its x/y are frame pixels and are mapped to screen coordinates. The
+        result is reported through agent.handle_action_result. Returns True
+        once the agent answers "done", False after max_steps.
+        
+        Example:
+            agent = marketplace.load_agent("summarizer")
+            agent.initialize()
+            session.run_agent(agent, max_steps=20)
+        """
+        self._ensure_launched()
+        for _ in range(max_steps):
+            if self._cancelled.is_set():
+                logger.info(f"Agent run cancelled in {self.app_name}")
+                return False
+            if burst > 1:
+                capture_frames = getattr(self.os_interaction, "capture_frames", None)
+                frames = capture_frames(burst, interval) if capture_frames is not None \
+                    else [self._capture() for _ in range(burst)]
+                agent_action = agent.process_screenshots(frames)[-1]
+                frame = frames[-1]
+            else:
+                frame = self._capture()
+                agent_action = agent.process_frame(frame)
+            if agent_action is None or agent_action.action_type == "done":
+                return True
+            
+            parameters = dict(agent_action.parameters)
+            if "x" in parameters and "y" in parameters:
+                parameters["x"], parameters["y"] = frame.to_screen(parameters["x"], parameters["y"])
+            success = self._execute_action(Action(agent_action.action_type, parameters))
+            agent.handle_action_result(agent_action, success)
+        logger.warning(f"Agent did not finish in {self.app_name} after {max_steps} steps")
+        return False
+    
+    def _start_loop(self, prompt: str, max_attempts: int, pipelined: bool,
+                    success_condition: Optional[Callable]) -> Optional[Callable]:
+        """Record the start of a loop; returns the success condition to use."""
+        if self.recorder is None:
+            return success_condition
+        self.recorder.record_event("loop", prompt=prompt, max_attempts=max_attempts,
+                                   pipelined=pipelined, has_condition=success_condition is not None)
+        if success_condition is not None:
+            success_condition = self.recorder.wrap_condition(success_condition)
+        return success_condition
+    
+    def _capture(self) -> Frame:
+        """Capture the screen as a Frame, without PNG encoding where the OS interaction allows it."""
+        capture_frame = getattr(self.os_interaction, "capture_frame", None)
+        if capture_frame is not None:
+            return capture_frame()
+        return Frame.from_png(self.os_interaction.take_screenshot())
+    
+    def _observe(self, settle_time: float = 0.0) -> Tuple[Frame, Any, List[TextElement]]:
+        """Wait for the screen to settle, then capture it and run OCR. Returns (frame, signature, OCR)."""
+        if settle_time > 0:
+            self.os_interaction.wait(settle_time)
+        frame = self._capture()
+        return frame, _frame_signature(frame), self.screen_analyzer.extract_text(frame.png)
+    
+    def _claim_observation(self, speculative: Optional[Future]) -> Tuple[bytes, List[TextElement]]:
+        """Return the current frame and its OCR, reusing a speculative result when the screen still matches."""
+        if speculative is None:
+            frame = self._capture()
+            return frame.png, self.screen_analyzer.extract_text(frame.png)
+        
+        try:
+            frame, signature, text_elements = speculative.result()
+        except Exception as e:
+            logger.debug(f"Discarding failed speculative observation: {e}")
+            frame = self._capture()
+            return frame.png, self.screen_analyzer.extract_text(frame.png)
+        
+        # A raw capture is enough to tell whether the screen changed; it is only encoded if it did
+        current = self._capture()
+        current_signature = _frame_signature(current)
+        if _signatures_match(signature, current_signature):
+            return frame.png, text_elements
+        
+        box = None
+        if frame.shape == current.shape:
+            box = _changed_box(signature, current_signature, current.width, current.height)
+        if box is not None:
+            kept, box = _split_elements(text_elements, box)
+            x, y, width, height = box
+            if width * height <= PARTIAL_OCR_MAX_AREA * current.width * current.height:
+                logger.debug(f"Screen changed after speculative capture; re-running OCR on "
+                             f"{width}x{height} at {x},{y}")
+                crop = Frame.from_array(current.pixels[y:y + height, x:x + width])
+                found = [TextElement(elem['text'], elem['x'] + x, elem['y'] + y, elem['width'], elem['height'])
+                         for elem in self.screen_analyzer.extract_text(crop.png)]
+                return current.png, sorted(kept + found, key=lambda elem: (elem['y'], elem['x']))
+        
+        logger.debug("Screen changed after speculative capture; re-running OCR")
+        return current.png, self.screen_analyzer.extract_text(current.png)
+    
+    def _execute_action(self, action: Action) -> bool:
         """Execute the determined action."""
         try:
-            if action["action"] == "click":
+            kind = action.action
+            parameters = action.parameters
+            if kind == "click":
                 return self.os_interaction.click(
-                    action["parameters"]["x"],
-                    action["parameters"]["y"]
+                    parameters["x"],
+                    parameters["y"]
                 )
-            elif action["action"] == "type":
+            elif kind == "type":
                 return self.os_interaction.type_text(
-                    action["parameters"]["text"],
+                    parameters["text"],
                     interval=0.1
                 )
-            elif action["action"] == "scroll":
+            elif kind == "scroll":
                 # Implement scroll action
                 pass
-            elif action["action"] == "wait":
+            elif kind == "wait":
                 # Implement wait action
                 pass
             return False
@@ -131,22 +521,155 @@ class AgentSession:
             logger.error(f"Error executing action: {e}")
             return False
 
+class AsyncAgentSession:
+    """
+    Async view of an AgentSession, returned by "async with veldaos.open(...)".
+    
+    Screen capture, OCR, the LLM call and input actions run in an executor,
+    so many sessions and the scheduler can share one event loop. Cancelling
+    loop() stops it between stages; a stage already running in a thread
+    finishes in the background.
+    """
+    
+    def __init__(self, session: AgentSession, executor: Optional[ThreadPoolExecutor] = None):
+        self.session = session
+        self.executor = executor
+    
+    @property
+    def app_name(self) -> str:
+        return self.session.app_name
+    
+    @property
+    def memory(self) -> SessionMemory:
+        return self.session.memory
+    
+    async def _run(self, func: Callable, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+    
+    async def loop(self, prompt: str, max_attempts: int = 1,
+                   success_condition: Optional[Callable] = None,
+                   timeout: Optional[float] = None, settle_time: float = 0.3,
+                   on_step: Optional[Callable[[int, Action, bool], None]] = None) -> bool:
+        """
+        Loop until the prompt is achieved, max attempts are used or timeout expires.
+        
+        success_condition may be a plain function or a coroutine function.
+        on_step is called on the event loop with (attempt, action, success)
+        after every executed action.
+        
+        Example:
+            async with veldaos.open("chrome") as agent:
+                await agent.loop("Click the login button", max_attempts=5, timeout=60)
+        """
+        try:
+            return await asyncio.wait_for(
+                self._loop(prompt, max_attempts, success_condition, settle_time, on_step), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Prompt timed out after {timeout}s: {prompt}")
+            return False
+    
+    async def _loop(self, prompt: str, max_attempts: int, success_condition: Optional[Callable],
+                    settle_time: float, on_step: Optional[Callable[[int, Action, bool], None]] = None) -> bool:
+        session = self.session
+        success_condition = session._start_loop(prompt, max_attempts, False, success_condition)
+        
+        attempts = 0
+        while attempts < max_attempts:
+            try:
+                # Take screenshot
+                screenshot = await self._run(session.os_interaction.take_screenshot)
+                
+                # Process screenshot and determine action using OCR and LLM
+                action = await self._run(
+                    session.screen_analyzer.analyze_screenshot, screenshot, prompt, memory=session.memory
+                )
+                
+                # Execute action
+                success = await self._run(session._execute_action, action)
+                session.memory.record(action, success)
+                if on_step is not None:
+                    on_step(attempts + 1, action, success)
+                
+                # Check if goal achieved, once the screen has settled
+                if success:
+                    if settle_time > 0:
+                        await asyncio.sleep(settle_time)
+                    done = True if success_condition is None else success_condition()
+                    if asyncio.iscoroutine(done):
+                        done = await done
+                    if done:
+                        logger.info(f"Successfully completed prompt: {prompt}")
+                        return True
+                
+                attempts += 1
+            except asyncio.CancelledError:
+                logger.info(f"Loop cancelled: {prompt}")
+                raise
+            except Exception as e:
+                logger.error(f"Error in loop: {e}")
+                attempts += 1
+        
+        logger.warning(f"Failed to complete prompt after {max_attempts} attempts")
+        return False
+
 class TaskScheduler:
-    def __init__(self, schedule_time: time, os_interaction: OSInteraction, screen_analyzer: ScreenAnalyzer):
-        self.schedule_time = schedule_time
+    def __init__(self, when: Union[time, timedelta, str, Schedule], os_interaction: OSInteraction,
+                 screen_analyzer: ScreenAnalyzer, scheduler: Scheduler, name: Optional[str] = None,
+                 misfire_policy: Optional[str] = None, priority: str = "normal",
+                 agent: Optional[str] = None, deadline: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        self.when = when
         self.os_interaction = os_interaction
         self.screen_analyzer = screen_analyzer
+        self.scheduler = scheduler
+        self.name = name
+        self.misfire_policy = misfire_policy
+        self.priority = priority
+        self.agent = agent
+        self.deadline = deadline
+        self.timeout = timeout
     
     def __call__(self, func: Callable):
-        async def wrapper(*args, **kwargs):
-            while True:
-                now = datetime.now().time()
-                if now.hour == self.schedule_time.hour and \
-                   now.minute == self.schedule_time.minute:
-                    with AgentSession("scheduled_task", self.os_interaction, self.screen_analyzer) as agent:
-                        await func(agent)
-                await asyncio.sleep(60)  # Check every minute
-        return wrapper
-
-# Create a global instance
-veldaos = VeldaOS() 
\ No newline at end of file
+        async def run_job():
+            session = AgentSession("scheduled_task", self.os_interaction, self.screen_analyzer)
+            if asyncio.iscoroutinefunction(func):
+                # Async tasks get an AsyncAgentSession and share the event loop
+                async with session as agent:
+                    await func(agent)
+            else:
+                def run_sync():
+                    with session as agent:
+                        func(agent)
+                future = asyncio.get_running_loop().run_in_executor(None, run_sync)
+                try:
+                    await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # A thread cannot be interrupted: stop the session between steps and
+                    # keep this run's dispatch slot until the task has actually returned
+                    session.cancel()
+                    await asyncio.gather(future, return_exceptions=True)
+                    raise
+        
+        async def run_job_with_timeout():
+            try:
+                await asyncio.wait_for(run_job(), self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Scheduled task timed out after {self.timeout}s")
+        
+        # A stable id lets a persistent job store match this job after a restart
+        self.scheduler.add_job(
+            run_job_with_timeout if self.timeout else run_job,
+            self.when,
+            name=self.name or func.__name__,
+            job_id=f"{func.__module__}.{func.__qualname__}",
+            misfire_policy=self.misfire_policy,
+            priority=self.priority,
+            agent=self.agent,
+            deadline=self.deadline
+        )
+        return func
+
+# The global instance, `veldaos`, is created lazily by __getattr__ above 
\ No newline at end of file
@@ -1,7 +1,10 @@
+import os
+import sys
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence
 from pydantic import BaseModel
 from loguru import logger
+from .frame import Frame
 
 class AgentMetadata(BaseModel):
     """Metadata for an AI agent."""
@@ -20,9 +23,18 @@ class AgentAction(BaseModel):
     confidence: float
 
 class BaseAgent(ABC):
-    """Base class for all AI agents in the VeldaOS system."""
+    """
+    Base class for all AI agents in the VeldaOS system.
+    
+    Agents implement either process_frame, which receives a read-only Frame
+    (decoded pixels plus region and scale), or the older process_screenshot,
+    which receives PNG bytes. Each has a default that adapts to the other, so
+    existing agents keep working unchanged. Agents that can vectorize over a
+    burst of frames can also override process_screenshots.
+    """
     
     def __init__(self):
+        self._check_processing()
         self.metadata: Optional[AgentMetadata] = None
         self.is_running: bool = False
         self.current_task: Optional[str] = None
@@ -32,10 +44,30 @@ class BaseAgent(ABC):
         """Initialize the agent with necessary resources."""
         pass
     
-    @abstractmethod
+    def _check_processing(self) -> None:
+        # Also checked by the defaults, which would otherwise call each other
+        # forever in an agent that skipped super().__init__()
+        if (type(self).process_frame is BaseAgent.process_frame
+                and type(self).process_screenshot is BaseAgent.process_screenshot):
+            raise TypeError(f"{type(self).__name__} must implement process_frame or process_screenshot")
+    
     def process_screenshot(self, screenshot: bytes) -> AgentAction:
-        """Process a screenshot and determine the next action."""
-        pass
+        """Process a PNG screenshot and determine the next action."""
+        self._check_processing()
+        return self.process_frame(Frame.from_png(screenshot))
+    
+    def process_frame(self, frame: Frame) -> AgentAction:
+        """Process a read-only frame and determine the next action."""
+        self._check_processing()
+        return self.process_screenshot(frame.png)
+    
+    def process_screenshots(self, frames: Sequence[Frame]) -> List[AgentAction]:
+        """
+        Process a burst of frames, returning one action per frame.
+        
+        The default handles frames one at a time; override it to batch the work.
+        """
+        return [self.process_frame(frame) for frame in frames]
     
     @abstractmethod
     def handle_action_result(self, action: AgentAction, success: bool) -> None:
@@ -71,6 +103,24 @@ class BaseAgent(ABC):
         self.current_task = task
         logger.info(f"Agent {self.metadata.name} received new task: {task}")
     
+    def read_resource(self, name: str) -> bytes:
+        """
+        Read a data file shipped alongside the agent's module.
+        
+        Works whether the agent was extracted or is running in place from its
+        package zip, so agents should use this instead of open().
+        
+        Example:
+            prompt = self.read_resource("prompts/system.txt").decode()
+        """
+        module = sys.modules[type(self).__module__]
+        path = os.path.join(os.path.dirname(module.__file__), *name.split("/"))
+        loader = getattr(module, "__loader__", None)
+        if loader is not None and hasattr(loader, "get_data"):
+            return loader.get_data(path)
+        with open(path, "rb") as f:
+            return f.read()
+    
     def get_status(self) -> Dict[str, Any]:
         """Get the current status of the agent."""
         return {
@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from loguru import logger
+
+
+class DaemonError(Exception):
+    """Raised by DaemonClient when the daemon is unreachable or reports an error."""
+
+
+def default_socket_path() -> str:
+    """Per-user socket path: $XDG_RUNTIME_DIR/veldaos.sock, else a uid-tagged file in the temp dir."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "veldaos.sock")
+    return os.path.join(tempfile.gettempdir(), f"veldaos-{os.getuid()}.sock")
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message, default=str) + "\n").encode()
+
+
+class VeldaDaemon:
+    """
+    Long-lived process that keeps VeldaOS warm and runs tasks sent over a Unix socket.
+
+    The OCR engine, the LLM client and its connection pool, the capture backend
+    and every app session opened by a task stay alive between tasks, so a task
+    only pays for its own loop. The protocol is one JSON object per line:
+
+        {"op": "run", "app": "chrome", "prompt": "...", "max_attempts": 5, "timeout": 60}
+        {"op": "ping"} | {"op": "status"} | {"op": "close", "app": "chrome"} | {"op": "shutdown"}
+
+    A run answers with "accepted", one "step" event per executed action and a
+    final "done" (or "error") event, then the connection is closed. Closing
+    the connection early cancels the run. A close is refused with an error
+    while a run is using that app's session.
+
+    Example:
+        python -m veldaos.core.daemon serve
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, openai_api_key: Optional[str] = None,
+                 max_concurrent_runs: int = 1, warm: bool = True):
+        self.socket_path = socket_path or default_socket_path()
+        self.openai_api_key = openai_api_key
+        self.warm = warm
+        self.veldaos = None
+        self.sessions: Dict[str, Any] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self.max_concurrent_runs = max_concurrent_runs
+        self._run_slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._started = time.time()
+        self._stats = {"runs": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+        self._active_runs = 0
+
+    async def start(self) -> None:
+        """Build and warm up VeldaOS, then listen on the socket."""
+        from . import VeldaOS
+
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        # All sessions share one screen, so runs are serialized by default
+        self._run_slots = asyncio.Semaphore(self.max_concurrent_runs)
+        self.veldaos = await loop.run_in_executor(None, lambda: VeldaOS(openai_api_key=self.openai_api_key))
+        if self.warm:
+            await loop.run_in_executor(None, self._warm_up)
+
+        if os.path.exists(self.socket_path):
+            if self._socket_in_use():
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"VeldaOS daemon listening on {self.socket_path}")
+
+    def _socket_in_use(self) -> bool:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+
+    def _warm_up(self) -> None:
+        """Take one frame and OCR it so the capture backend and tesseract pipeline are loaded."""
+        start = time.perf_counter()
+        try:
+            screenshot = self.veldaos.os_interaction.take_screenshot()
+            if screenshot:
+                self.veldaos.screen_analyzer.extract_text(screenshot)
+            logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """Stop listening, close open sessions and remove the socket."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for app_name in list(self.sessions):
+            await self._close_session(app_name)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        logger.info("VeldaOS daemon stopped")
+
+    async def _session(self, app_name: str):
+        """Return the open session for an app, launching it on first use."""
+        session = self.sessions.get(app_name)
+        if session is None:
+            session = await self.veldaos.open(app_name).__aenter__()
+            self.sessions[app_name] = session
+        return session
+
+    async def _close_session(self, app_name: str) -> bool:
+        session = self.sessions.pop(app_name, None)
+        if session is None:
+            return False
+        await session.session.__aexit__(None, None, None)
+        return True
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    writer.write(_encode({"event": "error", "message": "invalid JSON"}))
+                    await writer.drain()
+                    continue
+
+                if request.get("op") == "run":
+                    # The rest of the connection belongs to the run's event stream
+                    await self._handle_run(request, reader, writer)
+                    break
+                else:
+                    writer.write(_encode(await self._handle_control(request)))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_control(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            return {"event": "pong", "pid": os.getpid(), "uptime": time.time() - self._started}
+        if op == "status":
+            return {
+                "event": "status",
+                "pid": os.getpid(),
+                "uptime": time.time() - self._started,
+                "sessions": sorted(self.sessions),
+                "active_runs": self._active_runs,
+                **self._stats,
+            }
+        if op == "close":
+            app_name = request.get("app", "")
+            lock = self._session_locks.setdefault(app_name, asyncio.Lock())
+            if lock.locked():
+                # Closing the app under a running loop would break it mid-step
+                return {"event": "error", "message": f"a run is in progress on {app_name!r}"}
+            async with lock:
+                return {"event": "closed", "closed": await self._close_session(app_name)}
+        if op == "shutdown":
+            self._stopped.set()
+            return {"event": "shutting_down"}
+        return {"event": "error", "message": f"unknown op {op!r}"}
+
+    async def _handle_run(self, request: Dict[str, Any], reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+        run_id = request.get("id") or f"run-{self._stats['runs'] + 1}"
+        self._stats["runs"] += 1
+
+        def send(event: str, **data: Any) -> None:
+            writer.write(_encode({"id": run_id, "event": event, **data}))
+
+        send("accepted")
+        await writer.drain()
+
+        run = asyncio.ensure_future(self._run(request, send))
+        # A client that hangs up no longer wants the result
+        hangup = asyncio.ensure_future(self._wait_for_hangup(reader))
+        await asyncio.wait({run, hangup}, return_when=asyncio.FIRST_COMPLETED)
+
+        if not run.done():
+            run.cancel()
+            self._stats["cancelled"] += 1
+            logger.info(f"Client disconnected; cancelled {run_id}")
+            return
+        hangup.cancel()
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    async def _wait_for_hangup(reader: asyncio.StreamReader) -> None:
+        try:
+            await reader.read()
+        except ConnectionError:
+            pass
+
+    async def _run(self, request: Dict[str, Any], send: Callable[..., None]) -> None:
+        app_name = request.get("app")
+        prompt = request.get("prompt")
+        if not app_name or not prompt:
+            send("error", message="run needs 'app' and 'prompt'")
+            return
+
+        start = time.perf_counter()
+        steps = 0
+
+        def on_step(attempt: int, action: Any, success: bool) -> None:
+            nonlocal steps
+            steps += 1
+            send("step", attempt=attempt, action=dict(action), success=success)
+
+        if self._run_slots.locked():
+            send("queued")
+        try:
+            async with self._run_slots:
+                lock = self._session_locks.setdefault(app_name, asyncio.Lock())
+                async with lock:
+                    self._active_runs += 1
+                    try:
+                        reused = app_name in self.sessions
+                        session = await self._session(app_name)
+                        send("started", reused_session=reused)
+                        success = await session.loop(
+                            prompt,
+                            max_attempts=request.get("max_attempts", 1),
+                            timeout=request.get("timeout"),
+                            settle_time=request.get("settle_time", 0.3),
+                            on_step=on_step,
+                        )
+                    finally:
+                        self._active_runs -= 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Run on {app_name} failed: {e}")
+            self._stats["failed"] += 1
+            send("error", message=str(e))
+            return
+
+        self._stats["succeeded" if success else "failed"] += 1
+        send("done", success=success, steps=steps, elapsed=time.perf_counter() - start)
+
+
+class DaemonClient:
+    """
+    Thin blocking client for a running VeldaDaemon.
+
+    Example:
+        client = DaemonClient()
+        client.run("chrome", "Type 'python --version' and read the output",
+                   on_progress=lambda event: print(event))
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f"Cannot reach the VeldaOS daemon at {self.socket_path}: {e}") from e
+        return sock
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with self._connect() as sock:
+            sock.sendall(_encode(message))
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+        if not line:
+            raise DaemonError("Daemon closed the connection")
+        return json.loads(line)
+
+    def stream(self, app: str, prompt: str, max_attempts: int = 1, timeout: Optional[float] = None,
+               settle_time: float = 0.3) -> Iterator[Dict[str, Any]]:
+        """Submit a task and yield its events up to and including "done" or "error"."""
+        with self._connect() as sock:
+            sock.sendall(_encode({"op": "run", "app": app, "prompt": prompt, "max_attempts": max_attempts,
+                                  "timeout": timeout, "settle_time": settle_time}))
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    event = json.loads(line)
+                    yield event
+                    if event["event"] in ("done", "error"):
+                        return
+        raise DaemonError("Daemon closed the connection before the task finished")
+
+    def run(self, app: str, prompt: str, max_attempts: int = 1, timeout: Optional[float] = None,
+            settle_time: float = 0.3, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> bool:
+        """Run a task on the daemon and return whether it succeeded."""
+        for event in self.stream(app, prompt, max_attempts, timeout, settle_time):
+            if on_progress is not None:
+                on_progress(event)
+            if event["event"] == "error":
+                raise DaemonError(event["message"])
+            if event["event"] == "done":
+                return event["success"]
+        return False
+
+    def ping(self) -> Dict[str, Any]:
+        return self._request({"op": "ping"})
+
+    def status(self) -> Dict[str, Any]:
+        return self._request({"op": "status"})
+
+    def close_session(self, app: str) -> bool:
+        """Close an app's session. Raises DaemonError while a run is using it."""
+        response = self._request({"op": "close", "app": app})
+        if response["event"] == "error":
+            raise DaemonError(response["message"])
+        return response["closed"]
+
+    def shutdown(self) -> None:
+        self._request({"op": "shutdown"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VeldaOS daemon and client")
+    parser.add_argument("--socket", default=None, help="Unix socket path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the daemon in the foreground")
+    serve.add_argument("--max-concurrent-runs", type=int, default=1)
+    serve.add_argument("--no-warm", action="store_true", help="Skip the capture/OCR warm-up")
+
+    run = commands.add_parser("run", help="Submit a task and stream its progress")
+    run.add_argument("app")
+    run.add_argument("prompt")
+    run.add_argument("--max-attempts", type=int, default=1)
+    run.add_argument("--timeout", type=float, default=None)
+
+    commands.add_parser("status", help="Show daemon status")
+    commands.add_parser("stop", help="Stop the daemon")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        daemon = VeldaDaemon(args.socket, max_concurrent_runs=args.max_concurrent_runs, warm=not args.no_warm)
+        try:
+            asyncio.run(daemon.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    client = DaemonClient(args.socket)
+    try:
+        if args.command == "run":
+            success = client.run(args.app, args.prompt, max_attempts=args.max_attempts, timeout=args.timeout,
+                                 on_progress=lambda event: print(json.dumps(event)))
+            sys.exit(0 if success else 1)
+        elif args.command == "status":
+            print(json.dumps(client.status(), indent=2))
+        elif args.command == "stop":
+            client.shutdown()
+    except DaemonError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
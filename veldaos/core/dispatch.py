@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+OVERFLOW_POLICIES = ("drop", "defer")
+
+
+class _QueuedRun:
+    __slots__ = ("run", "priority", "agent", "deadline", "enqueued", "on_drop", "name")
+
+    def __init__(self, run: Callable[[], Awaitable], priority: int, agent: Optional[str],
+                 deadline: Optional[float], name: str, on_drop: Optional[Callable[[str], None]]):
+        self.run = run
+        self.priority = priority
+        self.agent = agent
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.name = name
+        self.on_drop = on_drop
+
+
+class DispatchPool:
+    """
+    Bounded pool that runs scheduled work with priorities and backpressure.
+
+    Runs wait in a priority queue (high, normal, low; FIFO within a class) and
+    at most max_workers execute at once, with at most per_agent_limit runs of
+    the same agent at a time. Runs still queued past their deadline are
+    dropped. When the queue is full the overflow policy applies:
+
+        drop   reject the new run, or evict the newest lower-priority run
+        defer  hold the run back and offer it again after defer_delay seconds
+    """
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 100, per_agent_limit: int = 1,
+                 overflow_policy: str = "defer", defer_delay: float = 5.0,
+                 default_deadline: Optional[float] = None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r}")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.per_agent_limit = per_agent_limit
+        self.overflow_policy = overflow_policy
+        self.defer_delay = defer_delay
+        self.default_deadline = default_deadline
+
+        self._queue: List[Tuple[int, int, _QueuedRun]] = []
+        self._counter = itertools.count()
+        self._running: Dict[Optional[str], int] = defaultdict(int)
+        self._active = 0
+        self._tasks = set()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._deferred = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "dropped": 0, "expired": 0, "deferred": 0}
+
+    def submit(self, run: Callable[[], Awaitable], priority: str = "normal", agent: Optional[str] = None,
+               deadline: Optional[float] = None, name: str = "run",
+               on_drop: Optional[Callable[[str], None]] = None) -> bool:
+        """
+        Queue a coroutine factory. Returns False if the run was dropped.
+
+        Args:
+            run: Callable returning the awaitable to execute
+            priority: "high", "normal" or "low"
+            agent: Key for the per-agent concurrency cap
+            deadline: Seconds the run may wait in the queue before it is dropped
+            name: Label used in logs
+            on_drop: Called with the reason if the run never executes
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}")
+        deadline = deadline if deadline is not None else self.default_deadline
+        item = _QueuedRun(run, PRIORITIES[priority], agent,
+                          time.monotonic() + deadline if deadline is not None else None, name, on_drop)
+        self._stats["submitted"] += 1
+        return self._enqueue(item)
+
+    def _enqueue(self, item: _QueuedRun) -> bool:
+        if len(self._queue) >= self.max_queue and not self._make_room(item):
+            return False
+        heapq.heappush(self._queue, (item.priority, next(self._counter), item))
+        self._pump()
+        return True
+
+    def _make_room(self, item: _QueuedRun) -> bool:
+        """Apply the overflow policy. Returns True if the item may be queued now."""
+        if self.overflow_policy == "defer":
+            self._stats["deferred"] += 1
+            self._deferred += 1
+            logger.info(f"Queue full; deferring {item.name} for {self.defer_delay}s")
+            asyncio.get_running_loop().call_later(self.defer_delay, self._retry_deferred, item)
+            return False
+
+        # Evict the newest run of the lowest priority class, if it ranks below the new one
+        victim_index = max(range(len(self._queue)), key=lambda i: self._queue[i][:2])
+        victim = self._queue[victim_index][2]
+        if victim.priority <= item.priority:
+            self._drop(item, "queue full")
+            return False
+        self._queue[victim_index] = self._queue[-1]
+        self._queue.pop()
+        heapq.heapify(self._queue)
+        self._drop(victim, "evicted by higher priority run")
+        return True
+
+    def _retry_deferred(self, item: _QueuedRun) -> None:
+        self._deferred -= 1
+        if self._expired(item):
+            self._drop(item, "deadline passed while deferred", expired=True)
+            return
+        self._enqueue(item)
+
+    def _expired(self, item: _QueuedRun) -> bool:
+        return item.deadline is not None and time.monotonic() > item.deadline
+
+    def _drop(self, item: _QueuedRun, reason: str, expired: bool = False) -> None:
+        self._stats["expired" if expired else "dropped"] += 1
+        logger.warning(f"Dropped {item.name}: {reason}")
+        if item.on_drop is not None:
+            item.on_drop(reason)
+
+    def _next_runnable(self) -> Optional[_QueuedRun]:
+        """Pop the best queued run whose agent is under its concurrency cap."""
+        blocked = []
+        found = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            item = entry[2]
+            if self._expired(item):
+                self._drop(item, "deadline passed in queue", expired=True)
+                continue
+            if item.agent is not None and self._running[item.agent] >= self.per_agent_limit:
+                blocked.append(entry)
+                continue
+            found = item
+            break
+        for entry in blocked:
+            heapq.heappush(self._queue, entry)
+        return found
+
+    def _pump(self) -> None:
+        while self._active < self.max_workers:
+            item = self._next_runnable()
+            if item is None:
+                return
+            self._active += 1
+            self._running[item.agent] += 1
+            self._waits.append(time.monotonic() - item.enqueued)
+            task = asyncio.ensure_future(self._execute(item))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, item: _QueuedRun) -> None:
+        try:
+            await item.run()
+            self._stats["completed"] += 1
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.error(f"{item.name} failed: {e}")
+        finally:
+            self._active -= 1
+            self._running[item.agent] -= 1
+            if not self._running[item.agent]:
+                del self._running[item.agent]
+            self._pump()
+
+    def _purge_expired(self) -> None:
+        """Drop every queued run past its deadline, not only those reached by _next_runnable."""
+        kept = []
+        for entry in self._queue:
+            if self._expired(entry[2]):
+                self._drop(entry[2], "deadline passed in queue", expired=True)
+            else:
+                kept.append(entry)
+        if len(kept) != len(self._queue):
+            heapq.heapify(kept)
+            self._queue = kept
+
+    def metrics(self) -> Dict[str, float]:
+        """Queue depth, concurrency and queue wait-time statistics."""
+        # Runs blocked behind a busy agent may have expired without being popped
+        self._purge_expired()
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": len(self._queue),
+            "deferred_now": self._deferred,
+            "running": self._active,
+            **self._stats,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        }
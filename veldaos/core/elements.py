@@ -0,0 +1,118 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Action types AgentSession knows how to execute
+ACTION_TYPES = ("click", "type", "scroll", "wait")
+
+
+class TextElement:
+    """
+    One OCR text box in screen pixels.
+
+    A plain __slots__ object, since a dense screen yields thousands of these
+    per step. It also answers elem["text"], elem.get(...) and dict(elem), so
+    code written against the old per-element dicts keeps working.
+    """
+
+    __slots__ = ("text", "x", "y", "width", "height")
+
+    def __init__(self, text: str, x: int, y: int, width: int, height: int):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, TextElement):
+            return (self.text, self.x, self.y, self.width, self.height) == \
+                   (other.text, other.x, other.y, other.width, other.height)
+        if isinstance(other, dict):
+            return dict(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TextElement({self.text!r}, x={self.x}, y={self.y}, width={self.width}, height={self.height})"
+
+
+class Action:
+    """
+    An action chosen by the LLM.
+
+    Built once per step by from_llm(), which is the only place the model's
+    JSON is validated. Like TextElement it supports action["parameters"],
+    action.get(...) and dict(action); keys other than "action" and
+    "parameters" (e.g. the model's reasoning) are kept in extra.
+    """
+
+    __slots__ = ("action", "parameters", "extra")
+
+    def __init__(self, action: str, parameters: Optional[Dict[str, Any]] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.action = action
+        self.parameters = parameters if parameters is not None else {}
+        self.extra = extra if extra is not None else {}
+
+    @classmethod
+    def from_llm(cls, data: Any) -> 'Action':
+        """Validate parsed LLM JSON; raises ValueError if it is not a usable action."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Action must be a JSON object, got {type(data).__name__}")
+        action = data.get("action")
+        if not isinstance(action, str) or not action.strip():
+            raise ValueError("Action is missing an 'action' name")
+        parameters = data.get("parameters") or {}
+        if not isinstance(parameters, dict):
+            raise ValueError("Action 'parameters' must be a JSON object")
+        for key in ("x", "y"):
+            if key in parameters:
+                try:
+                    parameters[key] = int(round(float(parameters[key])))
+                except (TypeError, ValueError):
+                    raise ValueError(f"Action parameter {key!r} is not a number: {parameters[key]!r}") from None
+        extra = {key: value for key, value in data.items() if key not in ("action", "parameters")}
+        return cls(action.strip().lower(), parameters, extra)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "action":
+            return self.action
+        if key == "parameters":
+            return self.parameters
+        return self.extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> Iterator[str]:
+        yield "action"
+        yield "parameters"
+        yield from self.extra
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"action": self.action, "parameters": dict(self.parameters), **self.extra}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (Action, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Action({self.action!r}, {self.parameters!r})"
@@ -0,0 +1,116 @@
+import io
+import time
+from typing import Any, Optional, Tuple
+
+
+class Frame:
+    """
+    Read-only view of one captured screen frame.
+
+    Pixels are an RGB numpy array of shape (height, width, 3) that is shared,
+    not copied, between everyone holding the frame in one process; it is
+    marked read-only so an agent cannot corrupt another's view. PNG bytes and
+    pixels are each produced at most once, on first use, from whichever the
+    frame was built from.
+
+    A frame sent to another process (a SandboxedAgent) is pickled, so it is
+    copied: as its PNG bytes if it has them, else as raw pixels. The copy is
+    read-only too.
+
+    Attributes:
+        region: (left, top, width, height) of the capture in screen coordinates,
+            or None for the full screen
+        scale: Frame pixels per screen coordinate (2.0 on a HiDPI display)
+        timestamp: time.time() at capture
+        index: Position of the frame in a burst, 0 for single frames
+    """
+
+    __slots__ = ("_pixels", "_png", "region", "scale", "timestamp", "index")
+
+    def __init__(self, pixels: Any = None, png: Optional[bytes] = None,
+                 region: Optional[Tuple[int, int, int, int]] = None, scale: float = 1.0,
+                 timestamp: Optional[float] = None, index: int = 0):
+        if pixels is None and png is None:
+            raise ValueError("Frame needs pixels or PNG bytes")
+        if pixels is not None:
+            pixels = _read_only(pixels)
+        self._pixels = pixels
+        self._png = png
+        self.region = region
+        self.scale = scale
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.index = index
+
+    @classmethod
+    def from_png(cls, png: bytes, **kwargs) -> 'Frame':
+        """Wrap encoded PNG bytes; they are decoded only if pixels are requested."""
+        return cls(png=png, **kwargs)
+
+    @classmethod
+    def from_array(cls, pixels: Any, **kwargs) -> 'Frame':
+        """Wrap an RGB array without copying it; it is encoded only if PNG bytes are requested."""
+        return cls(pixels=pixels, **kwargs)
+
+    @property
+    def pixels(self):
+        """Read-only RGB numpy array, decoded from PNG on first access."""
+        if self._pixels is None:
+            import numpy as np
+            from PIL import Image
+
+            with Image.open(io.BytesIO(self._png)) as image:
+                self._pixels = _read_only(np.asarray(image.convert("RGB")))
+        return self._pixels
+
+    def memoryview(self) -> memoryview:
+        """Read-only buffer over the pixel data, for consumers that do not use numpy."""
+        return memoryview(self.pixels)
+
+    @property
+    def png(self) -> bytes:
+        """PNG-encoded frame, for code written against raw screenshot bytes."""
+        if self._png is None:
+            from PIL import Image
+
+            buffer = io.BytesIO()
+            Image.fromarray(self._pixels).save(buffer, format="PNG")
+            self._png = buffer.getvalue()
+        return self._png
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.pixels.shape
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """Map a pixel position in this frame to screen coordinates for clicking."""
+        left, top = (self.region[0], self.region[1]) if self.region else (0, 0)
+        return int(left + x / self.scale), int(top + y / self.scale)
+
+    def __reduce__(self):
+        # Through __init__, so unpickled pixels are read-only again; send only the smaller form at hand
+        if self._png is not None:
+            return Frame, (None, self._png, self.region, self.scale, self.timestamp, self.index)
+        return Frame, (self._pixels, None, self.region, self.scale, self.timestamp, self.index)
+
+    def __repr__(self) -> str:
+        size = f"{self.width}x{self.height}" if self._pixels is not None else "encoded"
+        return f"Frame({size}, region={self.region}, scale={self.scale}, index={self.index})"
+
+
+def _read_only(pixels):
+    import numpy as np
+
+    array = np.asarray(pixels)
+    if array.flags.writeable:
+        # A read-only view; the caller's array itself stays writable
+        array = array.view()
+        array.flags.writeable = False
+    return array
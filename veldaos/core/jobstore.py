@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+class StoredJob(BaseModel):
+    """Persisted state of a scheduled job."""
+    id: str
+    name: str
+    expression: str
+    next_run: float
+    last_run: Optional[float] = None
+    last_result: Optional[str] = None
+    last_error: Optional[str] = None
+    run_count: int = 0
+
+
+class SQLiteJobStore:
+    """
+    Durable store for scheduled jobs: schedules, next/last run times and results.
+
+    Jobs are keyed by a stable id (the decorated function's qualified name by
+    default), so re-registering the same functions after a restart picks up
+    where the previous process left off. The store is read once at startup
+    (load_all) and then only written; the Scheduler's heap decides what is due.
+    """
+
+    def __init__(self, path: str = "veldaos_jobs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                expression TEXT NOT NULL,
+                next_run REAL NOT NULL,
+                last_run REAL,
+                last_result TEXT,
+                last_error TEXT,
+                run_count INTEGER NOT NULL DEFAULT 0
+            );
+            -- The scheduler keeps due times in memory; an index here only slowed down save_runs
+            DROP INDEX IF EXISTS idx_jobs_next_run;
+        """)
+
+    _COLUMNS = "id, name, expression, next_run, last_run, last_result, last_error, run_count"
+
+    def _row_to_job(self, row: Tuple) -> StoredJob:
+        # Rows were validated when written; skip re-validation on the startup path
+        return StoredJob.model_construct(**dict(zip(StoredJob.model_fields, row)))
+
+    def load_all(self) -> Dict[str, StoredJob]:
+        """Load every stored job in a single query."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self._COLUMNS} FROM jobs").fetchall()
+        return {row[0]: self._row_to_job(row) for row in rows}
+
+    def save(self, job: StoredJob) -> None:
+        """Insert or replace a job's schedule and state."""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.name, job.expression, job.next_run, job.last_run,
+                 job.last_result, job.last_error, job.run_count),
+            )
+
+    def save_runs(self, runs: Iterable[Tuple[str, float, Optional[float]]]) -> None:
+        """Persist (job_id, next_run, last_run) for a batch of fired jobs in one transaction."""
+        runs = list(runs)
+        if not runs:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE jobs SET next_run = ?, last_run = ?, run_count = run_count + 1 WHERE id = ?",
+                [(next_run, last_run, job_id) for job_id, next_run, last_run in runs],
+            )
+            self._conn.execute("COMMIT")
+
+    def update_next_run(self, job_id: str, next_run: float) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET next_run = ? WHERE id = ?", (next_run, job_id))
+
+    def record_result(self, job_id: str, success: bool, error: Optional[str] = None) -> None:
+        """Store the outcome of a job's latest run."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET last_result = ?, last_error = ? WHERE id = ?",
+                ("success" if success else "failed", error, job_id),
+            )
+
+    def remove(self, job_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,45 @@
+import importlib
+import sys
+import types
+
+AGENTS_PACKAGE = "veldaos_agents"
+
+
+def agent_package_name(agent_id: str) -> str:
+    """Package an agent's modules are imported under: veldaos_agents.<id>."""
+    return f"{AGENTS_PACKAGE}." + "".join(c if c.isalnum() else "_" for c in agent_id)
+
+
+def load_agent_class(agent_id: str, path: str, entry_point: str) -> type:
+    """
+    Import an agent's entry point ("module:Class") and return the class.
+
+    The agent's directory, or its package zip, becomes the package
+    veldaos_agents.<id>, so agents cannot shadow each other's modules and
+    import their own with relative imports (from . import helper). The host
+    process and the sandbox both load agents through this function.
+    """
+    if AGENTS_PACKAGE not in sys.modules:
+        root = types.ModuleType(AGENTS_PACKAGE)
+        root.__path__ = []
+        sys.modules[AGENTS_PACKAGE] = root
+    package_name = agent_package_name(agent_id)
+    package = types.ModuleType(package_name)
+    # A zip on __path__ is handled by zipimport, so archived agents import in place
+    package.__path__ = [path]
+    sys.modules[package_name] = package
+
+    module_name, _, class_name = entry_point.partition(":")
+    importlib.invalidate_caches()
+    module = importlib.import_module(f"{package_name}.{module_name}")
+    return getattr(module, class_name)
+
+
+def unload_agent(agent_id: str) -> None:
+    """Drop an agent's modules, so the next load_agent_class imports them again."""
+    prefix = agent_package_name(agent_id)
+    for name in [name for name in sys.modules if name == prefix or name.startswith(prefix + ".")]:
+        module = sys.modules.pop(name)
+        # Forget zipimport's cached directory of a replaced archive
+        for path in getattr(module, "__path__", None) or []:
+            sys.path_importer_cache.pop(path, None)
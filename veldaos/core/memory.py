@@ -0,0 +1,203 @@
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from pydantic import BaseModel
+
+from .elements import Action, TextElement
+
+
+class Observation(BaseModel):
+    """What the model is shown for one step: the full frame or only what changed."""
+    image: Optional[bytes] = None
+    region: Optional[Tuple[int, int, int, int]] = None
+    is_delta: bool = False
+    # Every text element on screen, in OCR order, so unchanged ones stay visible to the model
+    elements: List[str] = []
+    new_text: List[str] = []
+    removed_text: List[str] = []
+
+
+class StepRecord:
+    """A compact record of one executed step."""
+
+    __slots__ = ("step", "action", "success", "new_text")
+
+    def __init__(self, step: int, action: Action, success: bool, new_text: Optional[List[str]] = None):
+        self.step = step
+        self.action = action
+        self.success = success
+        self.new_text = new_text if new_text is not None else []
+
+
+class SessionMemory:
+    """
+    Action/observation history for an AgentSession.
+
+    Keeps the last frame and its OCR text so each step only needs to send the
+    changed region of the screen. The model is called without chat history,
+    so the full list of text elements is sent every step, and the full frame
+    every keyframe_interval steps or when most of the screen changed. Older
+    steps are folded into a bounded one-line-per-step summary.
+
+    An observation becomes the baseline for the next one only once commit()
+    is called, after the model has answered it; if the call fails, the next
+    step is compared with the last frame the model actually saw.
+    """
+
+    def __init__(self, max_steps: int = 8, max_summary_chars: int = 2000,
+                 max_text_items: int = 40, diff_threshold: int = 24,
+                 padding: int = 16, full_frame_ratio: float = 0.5,
+                 keyframe_interval: int = 5, max_screen_items: int = 200):
+        self.max_steps = max_steps
+        self.max_summary_chars = max_summary_chars
+        self.max_text_items = max_text_items
+        self.diff_threshold = diff_threshold
+        self.padding = padding
+        self.full_frame_ratio = full_frame_ratio
+        self.keyframe_interval = keyframe_interval
+        self.max_screen_items = max_screen_items
+
+        self.steps: Deque[StepRecord] = deque()
+        self.summary = ""
+        self._step = 0
+        self._last_frame: Optional[np.ndarray] = None
+        self._last_text: List[str] = []
+        self._pending_text: List[str] = []
+        self._deltas = 0
+        self._observed: Optional[Tuple[np.ndarray, List[str], List[str], bool]] = None
+
+    def reset(self) -> None:
+        """Forget all history, so the next observation sends a full frame."""
+        self.steps.clear()
+        self.summary = ""
+        self._step = 0
+        self._last_frame = None
+        self._last_text = []
+        self._pending_text = []
+        self._deltas = 0
+        self._observed = None
+
+    def observe(self, screenshot: bytes, text_elements: List[TextElement]) -> Observation:
+        """Compare a new frame with the last committed one and return what changed."""
+        frame = cv2.imdecode(np.frombuffer(screenshot, dtype=np.uint8), cv2.IMREAD_COLOR)
+        texts = [elem['text'] for elem in text_elements]
+
+        previous_text = set(self._last_text)
+        current_text = set(texts)
+        new_text = [text for text in texts if text not in previous_text][:self.max_text_items]
+        removed_text = [text for text in self._last_text if text not in current_text][:self.max_text_items]
+
+        elements = texts[:self.max_screen_items]
+        observation = self._diff(screenshot, frame, elements, new_text, removed_text)
+        self._observed = (frame, texts, new_text, not observation.is_delta)
+        return observation
+
+    def _diff(self, screenshot: bytes, frame: np.ndarray, elements: List[str],
+              new_text: List[str], removed_text: List[str]) -> Observation:
+        previous_frame = self._last_frame
+        if previous_frame is None or previous_frame.shape != frame.shape:
+            return Observation(image=screenshot, elements=elements, new_text=new_text)
+        if self._deltas >= self.keyframe_interval:
+            # Refresh the model's picture of the whole screen now and then
+            return Observation(image=screenshot, elements=elements, new_text=new_text, removed_text=removed_text)
+
+        region = self._changed_region(previous_frame, frame)
+        if region is None:
+            return Observation(is_delta=True, elements=elements, new_text=new_text, removed_text=removed_text)
+
+        x, y, w, h = region
+        frame_h, frame_w = frame.shape[:2]
+        if w * h >= self.full_frame_ratio * frame_w * frame_h:
+            return Observation(image=screenshot, elements=elements, new_text=new_text, removed_text=removed_text)
+
+        _, buffer = cv2.imencode('.png', frame[y:y + h, x:x + w])
+        return Observation(
+            image=buffer.tobytes(),
+            region=region,
+            is_delta=True,
+            elements=elements,
+            new_text=new_text,
+            removed_text=removed_text,
+        )
+
+    def commit(self) -> None:
+        """Make the last observation the baseline for the next; call once the model has answered it."""
+        if self._observed is None:
+            return
+        self._last_frame, self._last_text, self._pending_text, full_frame = self._observed
+        self._deltas = 0 if full_frame else self._deltas + 1
+        self._observed = None
+
+    def _changed_region(self, before: np.ndarray, after: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """Bounding box (x, y, w, h) of pixels that changed, padded, or None."""
+        diff = cv2.absdiff(before, after).max(axis=2)
+        changed = diff > self.diff_threshold
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.size == 0:
+            return None
+        cols = np.flatnonzero(changed.any(axis=0))
+
+        height, width = changed.shape
+        top = max(int(rows[0]) - self.padding, 0)
+        bottom = min(int(rows[-1]) + 1 + self.padding, height)
+        left = max(int(cols[0]) - self.padding, 0)
+        right = min(int(cols[-1]) + 1 + self.padding, width)
+        return (left, top, right - left, bottom - top)
+
+    def record(self, action: Action, success: bool) -> None:
+        """Append an executed action, compacting the oldest steps if needed."""
+        self._step += 1
+        self.steps.append(StepRecord(
+            step=self._step,
+            action=action,
+            success=success,
+            new_text=self._pending_text[:5],
+        ))
+        self._pending_text = []
+        while len(self.steps) > self.max_steps:
+            self._compact(self.steps.popleft())
+
+    def _compact(self, record: StepRecord) -> None:
+        line = self._describe(record)
+        self.summary = f"{self.summary}\n{line}" if self.summary else line
+        if len(self.summary) > self.max_summary_chars:
+            # Keep the most recent part, starting at a line boundary
+            tail = self.summary[-self.max_summary_chars:]
+            self.summary = tail[tail.find("\n") + 1:]
+
+    def _describe(self, record: StepRecord) -> str:
+        params = ", ".join(f"{key}={value}" for key, value in record.action.get("parameters", {}).items())
+        outcome = "ok" if record.success else "failed"
+        line = f"step {record.step}: {record.action.get('action', '?')}({params}) {outcome}"
+        if record.new_text:
+            line += f"; saw: {' | '.join(record.new_text)}"
+        return line
+
+    def context(self, observation: Optional[Observation] = None) -> str:
+        """Render the history and the current delta as text for the LLM."""
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier steps:\n{self.summary}")
+        if self.steps:
+            parts.append("Recent steps:\n" + "\n".join(self._describe(record) for record in self.steps))
+
+        if observation is not None:
+            if observation.is_delta and observation.region is not None:
+                x, y, w, h = observation.region
+                parts.append(f"The image shows only the changed region of the screen, {w}x{h} pixels "
+                             f"with its top-left corner at x={x}, y={y}; the rest of the screen is "
+                             f"unchanged. Give x and y relative to the image, not the screen.")
+            elif observation.is_delta:
+                parts.append("The screen did not change since the last step.")
+            if observation.elements:
+                parts.append("Text elements on screen; to act on one, give its number as \"element\" "
+                             "instead of x and y:\n"
+                             + "\n".join(f"[{index}] {text}" for index, text in enumerate(observation.elements)))
+            if observation.new_text:
+                parts.append("New text on screen: " + " | ".join(observation.new_text))
+            if observation.removed_text:
+                parts.append("Text no longer on screen: " + " | ".join(observation.removed_text))
+
+        return "\n\n".join(parts)
@@ -1,18 +1,18 @@
 import pyautogui
-import keyboard
-import mouse
-import numpy as np
-import cv2
-from PIL import Image
 import io
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 from loguru import logger
+from .frame import Frame
 import time
 
 class OSInteraction:
     """Handles OS-level interactions like screenshots, clicks, and keyboard input."""
     
-    def __init__(self):
+    def __init__(self, isolated: bool = False):
+        # Isolated instances run on their own X display (see workers.py) and must
+        # not use the keyboard module, which injects into the host's input devices.
+        self.isolated = isolated
+        
         # Safety settings
         pyautogui.FAILSAFE = True
         pyautogui.PAUSE = 0.5
@@ -28,6 +28,36 @@ class OSInteraction:
             logger.error(f"Failed to take screenshot: {e}")
             raise
     
+    def capture_frame(self, region: Optional[Tuple[int, int, int, int]] = None, index: int = 0) -> Frame:
+        """
+        Capture the screen as a read-only Frame without PNG encoding.
+        
+        Use this instead of take_screenshot when the consumer wants pixels.
+        """
+        import numpy as np
+        
+        try:
+            timestamp = time.time()
+            screenshot = pyautogui.screenshot(region=region)
+            # HiDPI displays capture more pixels than there are screen coordinates
+            logical_width = region[2] if region else pyautogui.size()[0]
+            scale = screenshot.width / logical_width if logical_width else 1.0
+            return Frame.from_array(np.asarray(screenshot.convert("RGB")), region=region,
+                                    scale=scale, timestamp=timestamp, index=index)
+        except Exception as e:
+            logger.error(f"Failed to capture frame: {e}")
+            raise
+    
+    def capture_frames(self, count: int, interval: float = 0.0,
+                       region: Optional[Tuple[int, int, int, int]] = None) -> List[Frame]:
+        """Capture a burst of frames, interval seconds apart, for BaseAgent.process_screenshots."""
+        frames = []
+        for index in range(count):
+            if index and interval > 0:
+                time.sleep(interval)
+            frames.append(self.capture_frame(region=region, index=index))
+        return frames
+    
     def click(self, x: int, y: int, button: str = 'left', double: bool = False) -> bool:
         """Click at the specified coordinates."""
         try:
@@ -52,7 +82,11 @@ class OSInteraction:
     def press_key(self, key: str) -> bool:
         """Press a single key."""
         try:
-            keyboard.press_and_release(key)
+            if self.isolated:
+                pyautogui.hotkey(*key.split("+"))
+            else:
+                import keyboard
+                keyboard.press_and_release(key)
             return True
         except Exception as e:
             logger.error(f"Failed to press key {key}: {e}")
@@ -73,6 +107,10 @@ class OSInteraction:
     
     def find_on_screen(self, template: bytes, confidence: float = 0.9) -> Optional[Tuple[int, int, int, int]]:
         """Find a template image on screen and return its location."""
+        import cv2
+        import numpy as np
+        from PIL import Image
+        
         try:
             # Convert template bytes to numpy array
             template_img = Image.open(io.BytesIO(template))
@@ -0,0 +1,330 @@
+import argparse
+import copy
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .elements import TextElement
+from .frame import Frame
+
+# OSInteraction methods that change the screen and are recorded as actions
+RECORDED_ACTIONS = ("click", "type_text", "press_key", "move_mouse")
+
+
+class ReplayExhausted(Exception):
+    """Raised when a replay asks for more recorded data than the session has."""
+
+
+class SessionRecorder:
+    """
+    Records frames, OCR output, LLM responses and executed actions of a session.
+
+    Example:
+        with veldaos.open("chrome", record_to="recordings/login") as agent:
+            agent.loop("Click the login button", max_attempts=5)
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.frames_dir = self.path / "frames"
+        self.frames_dir.mkdir(parents=True, exist_ok=True)
+        self._events = open(self.path / "events.jsonl", "a")
+        self._frame_count = len(list(self.frames_dir.glob("*.png")))
+        self._lock = threading.Lock()
+
+    def attach(self, session) -> None:
+        """Wrap a session's OS interaction and analyzer handlers with recording proxies."""
+        with open(self.path / "session.json", "w") as f:
+            json.dump({"app_name": session.app_name, "created": datetime.now().isoformat()}, f)
+
+        session.os_interaction = _RecordingOSInteraction(session.os_interaction, self)
+        # Copy the analyzer so other sessions sharing it are not recorded
+        analyzer = copy.copy(session.screen_analyzer)
+        analyzer.ocr_handler = _RecordingOCR(analyzer.ocr_handler, self)
+        analyzer.llm_handler = _RecordingLLM(analyzer.llm_handler, self)
+        session.screen_analyzer = analyzer
+        session.recorder = self
+
+    def record_event(self, kind: str, **data: Any) -> None:
+        with self._lock:
+            self._events.write(json.dumps({"type": kind, "time": time.time(), **data}) + "\n")
+            self._events.flush()
+
+    def wrap_condition(self, condition: Callable[[], bool]) -> Callable[[], bool]:
+        """Record every result of a loop's success condition."""
+        def recorded() -> bool:
+            result = bool(condition())
+            self.record_event("condition", result=result)
+            return result
+        return recorded
+
+    def record_frame(self, screenshot: bytes) -> None:
+        with self._lock:
+            name = f"{self._frame_count:06d}.png"
+            self._frame_count += 1
+            (self.frames_dir / name).write_bytes(screenshot)
+        self.record_event("frame", file=name)
+
+    def close(self) -> None:
+        with self._lock:
+            self._events.close()
+
+
+class _RecordingOSInteraction:
+    def __init__(self, inner, recorder: SessionRecorder):
+        self._inner = inner
+        self._recorder = recorder
+
+    def take_screenshot(self, *args, **kwargs) -> bytes:
+        screenshot = self._inner.take_screenshot(*args, **kwargs)
+        self._recorder.record_frame(screenshot)
+        return screenshot
+
+    def capture_frame(self, *args, **kwargs) -> Frame:
+        capture_frame = getattr(self._inner, "capture_frame", None)
+        if capture_frame is None:
+            return Frame.from_png(self.take_screenshot(*args, **kwargs))
+        frame = capture_frame(*args, **kwargs)
+        self._recorder.record_frame(frame.png)
+        return frame
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._inner, name)
+        if name not in RECORDED_ACTIONS:
+            return attr
+
+        def recorded(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            self._recorder.record_event("action", name=name, args=list(args), kwargs=kwargs, result=result)
+            return result
+        return recorded
+
+
+class _RecordingOCR:
+    def __init__(self, inner, recorder: SessionRecorder):
+        self._inner = inner
+        self._recorder = recorder
+
+    def perform_ocr(self, screenshot: bytes, *args, **kwargs) -> List[Dict]:
+        elements = self._inner.perform_ocr(screenshot, *args, **kwargs)
+        self._recorder.record_event("ocr", elements=[dict(elem) for elem in elements])
+        return elements
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+
+class _RecordingLLM:
+    def __init__(self, inner, recorder: SessionRecorder):
+        self._inner = inner
+        self._recorder = recorder
+
+    def get_response(self, *args, **kwargs):
+        response = self._inner.get_response(*args, **kwargs)
+        self._recorder.record_event("llm", content=response.content)
+        return response
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+
+class Recording:
+    """A recorded session loaded from disk."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "session.json") as f:
+            self.session = json.load(f)
+        with open(self.path / "events.jsonl") as f:
+            self.events = [json.loads(line) for line in f if line.strip()]
+
+    def of_type(self, kind: str) -> List[Dict]:
+        return [event for event in self.events if event["type"] == kind]
+
+    def load_frames(self) -> List[bytes]:
+        return [(self.path / "frames" / event["file"]).read_bytes() for event in self.of_type("frame")]
+
+
+class _ReplayMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class ReplayOSInteraction:
+    """Serves recorded frames and acknowledges actions without touching the display."""
+
+    def __init__(self, frames: List[bytes], actions: List[Dict]):
+        self._frames = frames
+        self._actions = actions
+        self._frame_index = 0
+        self._action_index = 0
+        self.divergences = 0
+        self._lock = threading.Lock()
+
+    def take_screenshot(self, region=None) -> bytes:
+        with self._lock:
+            if self._frame_index >= len(self._frames):
+                raise ReplayExhausted("No more recorded frames")
+            frame = self._frames[self._frame_index]
+            self._frame_index += 1
+            return frame
+
+    def capture_frame(self, region=None) -> Frame:
+        return Frame.from_png(self.take_screenshot(region))
+
+    def _replay_action(self, name: str, *args, **kwargs):
+        with self._lock:
+            if self._action_index >= len(self._actions):
+                raise ReplayExhausted("No more recorded actions")
+            recorded = self._actions[self._action_index]
+            self._action_index += 1
+        if recorded["name"] != name or recorded["args"] != list(args):
+            self.divergences += 1
+            logger.warning(f"Replay diverged: expected {recorded['name']}{tuple(recorded['args'])}, "
+                           f"got {name}{args}")
+        return recorded["result"]
+
+    def click(self, x: int, y: int, *args, **kwargs) -> bool:
+        return self._replay_action("click", x, y, *args, **kwargs)
+
+    def type_text(self, text: str, *args, **kwargs) -> bool:
+        return self._replay_action("type_text", text, *args, **kwargs)
+
+    def press_key(self, key: str) -> bool:
+        return self._replay_action("press_key", key)
+
+    def move_mouse(self, x: int, y: int, *args, **kwargs) -> bool:
+        return self._replay_action("move_mouse", x, y, *args, **kwargs)
+
+    def wait(self, seconds: float) -> None:
+        pass
+
+
+class ReplayOCR:
+    """Returns recorded OCR output in order."""
+
+    def __init__(self, results: List[List[Dict]]):
+        self._results = results
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def perform_ocr(self, screenshot: bytes, *args, **kwargs) -> List[TextElement]:
+        with self._lock:
+            if self._index >= len(self._results):
+                raise ReplayExhausted("No more recorded OCR results")
+            result = self._results[self._index]
+            self._index += 1
+            return [TextElement(**elem) for elem in result]
+
+
+class ReplayLLM:
+    """Returns recorded LLM responses in order."""
+
+    def __init__(self, responses: List[str]):
+        self._responses = responses
+        self._index = 0
+        self.calls = 0
+
+    def get_response(self, *args, **kwargs) -> _ReplayMessage:
+        if self._index >= len(self._responses):
+            raise ReplayExhausted("No more recorded LLM responses")
+        content = self._responses[self._index]
+        self._index += 1
+        self.calls += 1
+        return _ReplayMessage(content)
+
+
+class ReplayReport(BaseModel):
+    """Timing and consistency summary of one replay run."""
+    loops: int
+    steps: int
+    successes: int
+    divergences: int
+    total_seconds: float
+    seconds_per_step: float
+
+
+def replay_session(path: str, live_ocr: bool = False, pipelined: Optional[bool] = None) -> ReplayReport:
+    """
+    Replay a recorded session at full speed through stand-in OS and LLM handlers.
+
+    Args:
+        path: Directory written by SessionRecorder
+        live_ocr: Run the real OCR engine on recorded frames instead of replaying its output
+        pipelined: Check that the loops were recorded in this mode. The modes take
+            a different number of frames per step, so a recording can only be
+            replayed in the mode it was made in.
+
+    Returns:
+        ReplayReport with end-to-end loop timings
+
+    Raises:
+        ValueError: If pipelined does not match the recorded mode of every loop
+    """
+    from . import AgentSession
+    from .screen_analyzer import ScreenAnalyzer
+
+    recording = Recording(path)
+    loops = recording.of_type("loop")
+    if pipelined is not None and any(loop["pipelined"] != pipelined for loop in loops):
+        raise ValueError(f"{path} was not recorded with pipelined={pipelined}; pipelined loops capture "
+                         f"the screen a different number of times, so the recorded frames would not line up")
+    os_interaction = ReplayOSInteraction(recording.load_frames(), recording.of_type("action"))
+    llm = ReplayLLM([event["content"] for event in recording.of_type("llm")])
+    ocr = None if live_ocr else ReplayOCR([event["elements"] for event in recording.of_type("ocr")])
+    analyzer = ScreenAnalyzer(None, ocr_handler=ocr, llm_handler=llm)
+
+    session = AgentSession(recording.session["app_name"], os_interaction, analyzer)
+    conditions = iter([event["result"] for event in recording.of_type("condition")])
+    successes = 0
+
+    start = time.perf_counter()
+    for loop in loops:
+        if session.loop(
+            loop["prompt"],
+            max_attempts=loop["max_attempts"],
+            success_condition=(lambda: next(conditions, False)) if loop["has_condition"] else None,
+            pipelined=loop["pipelined"],
+            settle_time=0,
+        ):
+            successes += 1
+    total = time.perf_counter() - start
+
+    steps = llm.calls
+    return ReplayReport(
+        loops=len(loops),
+        steps=steps,
+        successes=successes,
+        divergences=os_interaction.divergences,
+        total_seconds=total,
+        seconds_per_step=total / steps if steps else 0.0,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded VeldaOS session offline")
+    parser.add_argument("path", help="Recording directory")
+    parser.add_argument("--live-ocr", action="store_true", help="Run OCR on recorded frames")
+    parser.add_argument("--pipelined", action="store_true", default=None,
+                        help="Fail unless the session was recorded with pipelined loops")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of replay runs")
+    args = parser.parse_args()
+
+    for run in range(args.repeat):
+        try:
+            report = replay_session(args.path, live_ocr=args.live_ocr, pipelined=args.pipelined)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"run {run + 1}: {report.steps} steps in {report.total_seconds * 1000:.1f} ms "
+              f"({report.seconds_per_step * 1000:.2f} ms/step), "
+              f"{report.successes}/{report.loops} loops succeeded, {report.divergences} divergences")
+
+
+if __name__ == "__main__":
+    main()
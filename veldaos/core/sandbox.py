@@ -0,0 +1,445 @@
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .agent import AgentAction, BaseAgent
+from .frame import Frame
+from .loader import load_agent_class
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the watchdog applies
+    resource = None
+
+# BaseAgent methods a host may invoke inside the sandbox
+SANDBOX_METHODS = (
+    "initialize", "start", "stop", "set_task", "process_screenshot", "process_frame",
+    "process_screenshots", "handle_action_result", "cleanup", "get_status",
+)
+
+DEFAULT_ENTRY_POINT = "agent:Agent"
+
+
+class SandboxError(Exception):
+    """Raised when a sandboxed agent was killed, crashed or failed to start."""
+
+
+class SandboxLimits(BaseModel):
+    """Resource limits for one sandboxed agent. None disables a limit."""
+    max_memory_mb: Optional[int] = 1024       # cgroup memory.max, else RLIMIT_AS
+    max_rss_mb: Optional[int] = None          # watchdog kill threshold on resident memory
+    cpu_percent: Optional[int] = None         # cgroup cpu.max quota, in percent of one CPU
+    max_cpu_seconds: Optional[int] = None     # RLIMIT_CPU: total CPU time before SIGXCPU
+    max_open_files: Optional[int] = 256       # RLIMIT_NOFILE
+    nice: int = 10                            # keep agents below the desktop app in the run queue
+    call_timeout: Optional[float] = 60.0      # watchdog kill if a single call runs longer
+    startup_timeout: float = 30.0
+    poll_interval: float = 0.5
+    cgroup_parent: Optional[str] = None       # delegated cgroup v2 directory; default is our own cgroup
+
+
+class AgentUsage(BaseModel):
+    """Resource usage of one sandboxed agent, reported back to the host."""
+    agent_id: str
+    pid: Optional[int] = None
+    calls: int = 0
+    cpu_seconds: float = 0.0
+    rss_bytes: int = 0
+    max_rss_bytes: int = 0
+    llm_requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    restarts: int = 0
+    killed: Optional[str] = None
+
+
+def _apply_rlimits(limits: SandboxLimits, memory_in_cgroup: bool) -> None:
+    if limits.nice:
+        try:
+            os.nice(limits.nice)
+        except OSError as e:
+            logger.debug(f"Could not lower agent priority: {e}")
+    if resource is None:
+        return
+
+    def set_limit(kind: int, value: Optional[int]) -> None:
+        if value is None:
+            return
+        _, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        resource.setrlimit(kind, (value, value))
+
+    if limits.max_cpu_seconds is not None:
+        # Soft limit sends SIGXCPU; the hard limit a few seconds later kills the process
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.max_cpu_seconds, limits.max_cpu_seconds + 5))
+    if limits.max_memory_mb is not None and not memory_in_cgroup:
+        set_limit(resource.RLIMIT_AS, limits.max_memory_mb * 1024 * 1024)
+    set_limit(resource.RLIMIT_NOFILE, limits.max_open_files)
+
+
+def _current_rss(pid: Optional[int] = None) -> int:
+    """Resident set size in bytes from /proc, or 0 where /proc is not available."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    """User plus system CPU time of a process from /proc/<pid>/stat."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; utime and stime are the 12th and 13th
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _usage_snapshot() -> Dict[str, Any]:
+    """Usage as seen from inside the sandbox process."""
+    snapshot: Dict[str, Any] = {"rss_bytes": _current_rss()}
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        snapshot["cpu_seconds"] = usage.ru_utime + usage.ru_stime
+        # ru_maxrss is in KiB on Linux
+        snapshot["max_rss_bytes"] = usage.ru_maxrss * 1024
+    # Only report tokens if the agent actually used the LLM client
+    llm = sys.modules.get("veldaos.core.utils.callLLM")
+    if llm is not None:
+        snapshot.update(llm_requests=llm.token_usage["requests"],
+                        prompt_tokens=llm.token_usage["prompt_tokens"],
+                        completion_tokens=llm.token_usage["completion_tokens"])
+    return snapshot
+
+
+def _join_cgroup(cgroup: Optional[str]) -> bool:
+    """Move the calling process into a cgroup; False if there is none or it cannot be joined."""
+    if cgroup is None:
+        return False
+    try:
+        # "0" stands for the writing process
+        (Path(cgroup) / "cgroup.procs").write_text("0")
+        return True
+    except OSError as e:
+        logger.warning(f"Sandbox could not join {cgroup} ({e}); falling back to rlimits")
+        return False
+
+
+def _sandbox_main(conn, agent_id: str, agent_dir: str, entry_point: str, limits: SandboxLimits,
+                  cgroup: Optional[str]) -> None:
+    """Entry point of the sandbox process: load the agent and serve calls until told to stop."""
+    # Join the cgroup before any agent code runs; RLIMIT_AS caps memory unless that worked
+    _apply_rlimits(limits, memory_in_cgroup=_join_cgroup(cgroup))
+    try:
+        # Loaded as in the host process (AgentRegistry.resolve), under veldaos_agents.<id>
+        agent = load_agent_class(agent_id, agent_dir, entry_point)()
+    except BaseException as e:
+        conn.send(("error", f"Failed to load {entry_point}: {type(e).__name__}: {e}", _usage_snapshot()))
+        return
+    conn.send(("ready", getattr(agent, "metadata", None), _usage_snapshot()))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args, kwargs = request
+        try:
+            result = getattr(agent, method)(*args, **kwargs)
+            conn.send(("ok", result, _usage_snapshot()))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}", _usage_snapshot()))
+
+
+class _CGroup:
+    """A cgroup v2 leaf for one sandbox, when the host has delegated one to us."""
+
+    ROOT = Path("/sys/fs/cgroup")
+
+    def __init__(self, name: str, parent: Optional[str]):
+        self.path: Optional[Path] = None
+        base = Path(parent) if parent else self._own_cgroup()
+        # Only a cgroup v2 directory has cgroup.controllers; anything else is a plain filesystem
+        if base is None or not (base / "cgroup.controllers").exists():
+            return
+        path = base / name
+        try:
+            path.mkdir(exist_ok=True)
+        except OSError as e:
+            logger.debug(f"cgroup v2 not available for sandbox ({e}); using rlimits only")
+            return
+        self.path = path
+
+    @classmethod
+    def _own_cgroup(cls) -> Optional[Path]:
+        try:
+            with open("/proc/self/cgroup") as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        return cls.ROOT / line[3:].strip().lstrip("/")
+        except OSError:
+            pass
+        return None
+
+    def configure(self, limits: SandboxLimits) -> bool:
+        if self.path is None:
+            return False
+        try:
+            if limits.max_memory_mb is not None:
+                (self.path / "memory.max").write_text(str(limits.max_memory_mb * 1024 * 1024))
+            if limits.cpu_percent is not None:
+                (self.path / "cpu.max").write_text(f"{limits.cpu_percent * 1000} 100000")
+            return True
+        except OSError as e:
+            logger.debug(f"Could not configure cgroup {self.path}: {e}")
+            self.remove()
+            return False
+
+    def remove(self) -> None:
+        if self.path is not None:
+            try:
+                self.path.rmdir()
+            except OSError:
+                pass
+            self.path = None
+
+
+class SandboxedAgent(BaseAgent):
+    """
+    Runs an installed agent in its own process, behind resource limits and a watchdog.
+
+    The agent's class is loaded from entry_point ("module:Class", relative to
+    agent_dir) in a spawned process. Memory and CPU are capped through a cgroup
+    v2 leaf when one can be created, otherwise through rlimits, and the process
+    runs at a lower priority. The process joins its cgroup itself before the
+    agent is loaded; if it cannot, memory is capped with RLIMIT_AS instead. A watchdog thread kills the process when a call
+    overruns call_timeout or resident memory passes max_rss_mb. CPU, RSS and
+    LLM-token usage are reported back with every call (see usage()).
+    Arguments are pickled over a pipe, so frames passed to process_frame and
+    process_screenshots are copied into the sandbox (see Frame).
+
+    Example:
+        agent = SandboxedAgent.from_installed("agents/summarizer",
+                                              limits=SandboxLimits(max_memory_mb=512, cpu_percent=50))
+        agent.initialize()
+        action = agent.process_screenshot(screenshot)
+        print(agent.usage())
+        agent.shutdown()
+    """
+
+    def __init__(self, agent_id: str, agent_dir: str, entry_point: str = DEFAULT_ENTRY_POINT,
+                 limits: Optional[SandboxLimits] = None,
+                 on_usage: Optional[Callable[[AgentUsage], None]] = None):
+        super().__init__()
+        self.agent_id = agent_id
+        self.agent_dir = str(Path(agent_dir).resolve())
+        self.entry_point = entry_point
+        self.limits = limits or SandboxLimits()
+        self.on_usage = on_usage
+
+        self._ctx = mp.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._cgroup: Optional[_CGroup] = None
+        self._usage = AgentUsage(agent_id=agent_id)
+        self._call_lock = threading.Lock()
+        self._call_started: Optional[float] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_watchdog = threading.Event()
+
+    @classmethod
+    def from_installed(cls, agent_dir: str, **kwargs) -> 'SandboxedAgent':
+        """Build a sandbox for an installed agent from its metadata.json (agent_dir may be its package zip)."""
+        agent_dir = Path(agent_dir)
+        if agent_dir.suffix == ".zip":
+            # Run from the archive in place; zipimport handles a zip on a package __path__
+            with zipfile.ZipFile(agent_dir) as archive:
+                metadata = json.loads(archive.read("metadata.json"))
+            default_id = agent_dir.parent.name
+        else:
+            metadata = json.loads((agent_dir / "metadata.json").read_text())
+            default_id = agent_dir.name
+        return cls(metadata.get("id", default_id), str(agent_dir),
+                   entry_point=metadata.get("entry_point", DEFAULT_ENTRY_POINT), **kwargs)
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def launch(self) -> None:
+        """Start the sandbox process and wait until the agent is loaded."""
+        if self.alive:
+            return
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._cgroup = _CGroup(f"veldaos-{self.agent_id}-{os.getpid()}", self.limits.cgroup_parent)
+        use_cgroup = self._cgroup.configure(self.limits)
+
+        process = self._ctx.Process(
+            target=_sandbox_main,
+            # The child joins the cgroup itself, before it loads the agent
+            args=(child_conn, self.agent_id, self.agent_dir, self.entry_point, self.limits,
+                  str(self._cgroup.path) if use_cgroup else None),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+
+        self._process = process
+        self._conn = parent_conn
+        self._usage.pid = process.pid
+        self._usage.killed = None
+
+        if not parent_conn.poll(self.limits.startup_timeout):
+            self._kill("did not start in time")
+            raise SandboxError(f"Agent {self.agent_id} did not start within {self.limits.startup_timeout}s")
+        try:
+            status, payload, usage = parent_conn.recv()
+        except EOFError:
+            raise SandboxError(f"Agent {self.agent_id} exited during startup (code {process.exitcode})")
+        self._update_usage(usage)
+        if status != "ready":
+            self.shutdown()
+            raise SandboxError(payload)
+        self.metadata = payload
+
+        self._stop_watchdog.clear()
+        self._watchdog = threading.Thread(target=self._watch, daemon=True)
+        self._watchdog.start()
+        logger.info(f"Started sandbox for {self.agent_id} (pid {process.pid})")
+
+    def restart(self) -> None:
+        """Replace a killed or crashed sandbox process with a fresh one."""
+        self.shutdown()
+        self._usage.restarts += 1
+        self.launch()
+
+    def _watch(self) -> None:
+        process = self._process
+        limits = self.limits
+        while not self._stop_watchdog.wait(limits.poll_interval) and process.is_alive():
+            cpu = _cpu_seconds(process.pid)
+            if cpu is not None:
+                self._usage.cpu_seconds = cpu
+            rss = _current_rss(process.pid)
+            if rss:
+                self._usage.rss_bytes = rss
+                self._usage.max_rss_bytes = max(self._usage.max_rss_bytes, rss)
+
+            started = self._call_started
+            if limits.call_timeout is not None and started is not None \
+                    and time.monotonic() - started > limits.call_timeout:
+                self._kill(f"call exceeded {limits.call_timeout}s")
+            elif limits.max_rss_mb is not None and rss > limits.max_rss_mb * 1024 * 1024:
+                self._kill(f"RSS {rss // (1024 * 1024)} MB exceeded {limits.max_rss_mb} MB")
+
+    def _kill(self, reason: str) -> None:
+        self._usage.killed = reason
+        logger.warning(f"Killing sandboxed agent {self.agent_id}: {reason}")
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+
+    def _update_usage(self, snapshot: Dict[str, Any]) -> None:
+        for key, value in snapshot.items():
+            if key == "max_rss_bytes":
+                value = max(value, self._usage.max_rss_bytes)
+            setattr(self._usage, key, value)
+        if self.on_usage is not None:
+            self.on_usage(self.usage())
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        if method not in SANDBOX_METHODS:
+            raise ValueError(f"{method} cannot be called in the sandbox")
+        with self._call_lock:
+            if not self.alive:
+                raise SandboxError(f"Agent {self.agent_id} is not running"
+                                   + (f" (killed: {self._usage.killed})" if self._usage.killed else ""))
+            self._call_started = time.monotonic()
+            try:
+                self._conn.send((method, args, kwargs))
+                status, payload, usage = self._conn.recv()
+            except (EOFError, OSError):
+                self._process.join(1.0)
+                reason = self._usage.killed or f"exited with code {self._process.exitcode}"
+                raise SandboxError(f"Agent {self.agent_id} died during {method}: {reason}") from None
+            finally:
+                self._call_started = None
+            self._usage.calls += 1
+            self._update_usage(usage)
+        if status == "error":
+            raise SandboxError(f"{self.agent_id}.{method} failed: {payload}")
+        return payload
+
+    def usage(self) -> AgentUsage:
+        """Latest usage figures for this agent."""
+        return self._usage.model_copy()
+
+    def initialize(self) -> None:
+        self.launch()
+        self._call("initialize")
+
+    def start(self) -> None:
+        self._call("start")
+        self.is_running = True
+
+    def stop(self) -> None:
+        if self.alive:
+            self._call("stop")
+        self.is_running = False
+        self.shutdown()
+
+    def set_task(self, task: str) -> None:
+        self._call("set_task", task)
+        self.current_task = task
+
+    def process_screenshot(self, screenshot: bytes) -> AgentAction:
+        return self._call("process_screenshot", screenshot)
+
+    def process_frame(self, frame: Frame) -> AgentAction:
+        return self._call("process_frame", frame)
+
+    def process_screenshots(self, frames: Sequence[Frame]) -> List[AgentAction]:
+        return self._call("process_screenshots", list(frames))
+
+    def handle_action_result(self, action: AgentAction, success: bool) -> None:
+        self._call("handle_action_result", action, success)
+
+    def cleanup(self) -> None:
+        if self.alive:
+            self._call("cleanup")
+
+    def get_status(self) -> Dict[str, Any]:
+        status = self._call("get_status") if self.alive else {"name": self.agent_id, "is_running": False}
+        return {**status, "sandbox": self.usage().model_dump()}
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the sandbox process, killing it if it does not exit in time."""
+        self._stop_watchdog.set()
+        if self._process is not None:
+            if self._process.is_alive():
+                try:
+                    self._conn.send(None)
+                except OSError:
+                    pass
+                self._process.join(timeout)
+                if self._process.is_alive():
+                    self._process.kill()
+                    self._process.join()
+            self._conn.close()
+            self._process = None
+        if self._cgroup is not None:
+            self._cgroup.remove()
+            self._cgroup = None
@@ -0,0 +1,440 @@
+import asyncio
+import heapq
+import itertools
+import re
+import uuid
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+from .jobstore import SQLiteJobStore, StoredJob
+from .dispatch import DispatchPool
+
+MISFIRE_POLICIES = ("skip", "coalesce", "all")
+
+
+class Schedule:
+    """When a job fires. Subclasses return the first fire time strictly after a given moment."""
+
+    expression: str
+
+    def next_after(self, moment: datetime) -> datetime:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.expression!r})"
+
+
+class IntervalSchedule(Schedule):
+    """Fires every N seconds, aligned to an anchor time."""
+
+    def __init__(self, seconds: float, anchor: Optional[datetime] = None):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = float(seconds)
+        self.anchor = anchor or datetime.now()
+        self.expression = f"every {self.seconds:g}s"
+
+    def next_after(self, moment: datetime) -> datetime:
+        # Whole microseconds, so float rounding can never return a time <= moment
+        period = max(round(self.seconds * 1_000_000), 1)
+        elapsed = (moment - self.anchor) // timedelta(microseconds=1)
+        periods = elapsed // period + 1 if elapsed >= 0 else 0
+        return self.anchor + timedelta(microseconds=periods * period)
+
+
+class CronSchedule(Schedule):
+    """
+    Standard five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Supports *, lists (1,15), ranges (1-5) and steps (*/10, 0-30/5).
+    Day-of-week uses 0 or 7 for Sunday.
+    """
+
+    _FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(parts)}: {expression!r}")
+        self.expression = " ".join(parts)
+
+        fields = [self._parse_field(part, lo, hi) for part, (lo, hi) in zip(parts, self._FIELDS)]
+        self.minutes = sorted(fields[0])
+        self.hours = fields[1]
+        self.days = fields[2]
+        self.months = fields[3]
+        self.weekdays = frozenset(day % 7 for day in fields[4])
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, lo: int, hi: int) -> FrozenSet[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step in {field!r}")
+            if part == "*":
+                start, end = lo, hi
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(part)
+                end = hi if step > 1 else start
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field {field!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        # Cron semantics: when both are restricted, either one matching is enough
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 8
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                year, month = (candidate.year + 1, 1) if candidate.month == 12 else (candidate.year, candidate.month + 1)
+                candidate = datetime(year, month, 1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = datetime(candidate.year, candidate.month, candidate.day) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            minute = next((m for m in self.minutes if m >= candidate.minute), None)
+            if minute is None:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            return candidate.replace(minute=minute)
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+_INTERVAL_PATTERN = re.compile(
+    r"^every\s+(\d+(?:\.\d+)?)\s*(s|sec|secs|seconds?|m|min|mins|minutes?|h|hours?|d|days?)$"
+)
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_schedule(spec: Union[Schedule, time, timedelta, int, float, str]) -> Schedule:
+    """
+    Build a Schedule from the forms accepted by VeldaOS.schedule.
+
+    Example:
+        parse_schedule(time(14, 30))       # every day at 14:30
+        parse_schedule(timedelta(minutes=5))
+        parse_schedule("every 30s")
+        parse_schedule("0 9 * * 1-5")      # weekdays at 09:00
+    """
+    if isinstance(spec, Schedule):
+        return spec
+    if isinstance(spec, time):
+        return CronSchedule(f"{spec.minute} {spec.hour} * * *")
+    if isinstance(spec, timedelta):
+        return IntervalSchedule(spec.total_seconds())
+    if isinstance(spec, (int, float)):
+        return IntervalSchedule(spec)
+    if isinstance(spec, str):
+        match = _INTERVAL_PATTERN.match(spec.strip().lower())
+        if match:
+            return IntervalSchedule(float(match.group(1)) * _UNIT_SECONDS[match.group(2)[0]])
+        return CronSchedule(spec)
+    raise TypeError(f"Unsupported schedule: {spec!r}")
+
+
+class Job:
+    """A function registered with the scheduler."""
+
+    def __init__(self, job_id: str, name: str, func: Callable, schedule: Schedule, next_run: datetime,
+                 misfire_policy: str = "coalesce", priority: str = "normal",
+                 agent: Optional[str] = None, deadline: Optional[float] = None):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.next_run = next_run
+        self.last_run: Optional[datetime] = None
+        self.misfire_policy = misfire_policy
+        # Dispatch pool settings: priority class, concurrency key and max queue wait
+        self.priority = priority
+        self.agent = agent
+        self.deadline = deadline
+        self.running = False
+        # Fire times still owed under the "all" misfire policy
+        self.missed = 0
+        # Bumped whenever next_run changes, so stale heap entries can be skipped
+        self.generation = 0
+
+    def __repr__(self) -> str:
+        return f"Job({self.name!r}, {self.schedule!r}, next_run={self.next_run})"
+
+
+class Scheduler:
+    """
+    Single scheduler core for all scheduled jobs.
+
+    Jobs sit in a min-heap keyed by their next fire time. The run loop sleeps
+    until the earliest one is due, fires each due job exactly once for that
+    fire time and pushes it back with its following fire time, so the cost
+    does not grow with the number of idle jobs.
+
+    With a job store, schedules and run state survive restarts. Fire times
+    missed while the process was down (or late by more than misfire_grace
+    seconds) are handled by the misfire policy:
+
+        skip      drop missed runs and wait for the next fire time
+        coalesce  run once now for all missed fire times (default)
+        all       run once for every missed fire time, up to max_catchup
+
+    With a dispatch pool, due jobs are queued into it instead of all starting
+    at once, so bursts are bounded by the pool's workers and queue.
+    """
+
+    def __init__(self, dispatcher: Optional[Callable[[Job], None]] = None,
+                 store: Optional[SQLiteJobStore] = None, misfire_policy: str = "coalesce",
+                 misfire_grace: Optional[float] = None, max_catchup: int = 100,
+                 pool: Optional[DispatchPool] = None):
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy {misfire_policy!r}")
+        self.jobs: Dict[str, Job] = {}
+        self.store = store
+        self.misfire_policy = misfire_policy
+        self.misfire_grace = misfire_grace
+        self.max_catchup = max_catchup
+        self.pool = pool
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._counter = itertools.count()
+        self._dispatcher = dispatcher or self._dispatch
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Stored state is loaded once; add_job then restores jobs with dict lookups
+        self._stored: Dict[str, StoredJob] = store.load_all() if store else {}
+
+    def add_job(self, func: Callable, schedule, name: Optional[str] = None,
+                job_id: Optional[str] = None, misfire_policy: Optional[str] = None,
+                priority: str = "normal", agent: Optional[str] = None,
+                deadline: Optional[float] = None) -> Job:
+        """Register a function to run on a schedule, restoring its stored state if any."""
+        schedule = parse_schedule(schedule)
+        job_id = job_id or uuid.uuid4().hex
+        if job_id in self.jobs:
+            raise ValueError(f"Job {job_id} already exists")
+        policy = misfire_policy or self.misfire_policy
+        if policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy {policy!r}")
+
+        now = datetime.now()
+        job = Job(job_id, name or getattr(func, "__name__", job_id), func, schedule,
+                  schedule.next_after(now), misfire_policy=policy, priority=priority,
+                  agent=agent, deadline=deadline)
+
+        stored = self._stored.pop(job_id, None)
+        if stored is not None and stored.expression == schedule.expression:
+            if stored.last_run is not None:
+                job.last_run = datetime.fromtimestamp(stored.last_run)
+            job.next_run = self._catch_up(job, datetime.fromtimestamp(stored.next_run), now)
+
+        unchanged = stored is not None and stored.expression == schedule.expression \
+            and abs(stored.next_run - job.next_run.timestamp()) < 1e-3
+        if self.store is not None and not unchanged:
+            self.store.save(StoredJob(
+                id=job.id,
+                name=job.name,
+                expression=schedule.expression,
+                next_run=job.next_run.timestamp(),
+                last_run=job.last_run.timestamp() if job.last_run else None,
+                last_result=stored.last_result if stored else None,
+                last_error=stored.last_error if stored else None,
+                run_count=stored.run_count if stored else 0,
+            ))
+
+        self.jobs[job_id] = job
+        self._push(job)
+        logger.info(f"Scheduled {job.name} ({schedule.expression}), next run at {job.next_run}")
+        return job
+
+    def _is_too_late(self, fire_time: datetime, now: datetime) -> bool:
+        return self.misfire_grace is not None and (now - fire_time).total_seconds() > self.misfire_grace
+
+    def _catch_up(self, job: Job, stored_next: datetime, now: datetime) -> datetime:
+        """Pick the next run for a restored job according to its misfire policy."""
+        if isinstance(job.schedule, IntervalSchedule):
+            # Keep the interval aligned with the previous process
+            job.schedule.anchor = stored_next
+        if stored_next > now:
+            return stored_next
+
+        if job.misfire_policy == "skip" or self._is_too_late(stored_next, now):
+            logger.info(f"Skipping missed runs of {job.name} since {stored_next}")
+            return job.schedule.next_after(now)
+
+        if job.misfire_policy == "all":
+            missed = 0
+            fire_time = stored_next
+            while fire_time <= now and missed < self.max_catchup:
+                missed += 1
+                fire_time = job.schedule.next_after(fire_time)
+            job.missed = missed - 1
+            logger.info(f"Catching up {missed} missed runs of {job.name}")
+        else:
+            logger.info(f"Running {job.name} once for runs missed since {stored_next}")
+        return stored_next
+
+    def remove_job(self, job_id: str) -> bool:
+        """Unregister a job. Its heap entry is discarded lazily."""
+        if self.store is not None:
+            self.store.remove(job_id)
+        return self.jobs.pop(job_id, None) is not None
+
+    def _push(self, job: Job) -> None:
+        job.generation += 1
+        heapq.heappush(self._heap, (job.next_run.timestamp(), next(self._counter), job.generation, job.id))
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is None or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _peek(self) -> Optional[Tuple[float, Job]]:
+        """Return the earliest live heap entry, dropping stale ones."""
+        while self._heap:
+            fire_at, _, generation, job_id = self._heap[0]
+            job = self.jobs.get(job_id)
+            if job is None or job.generation != generation:
+                heapq.heappop(self._heap)
+                continue
+            return fire_at, job
+        return None
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the earliest job is due, or None if nothing is scheduled."""
+        entry = self._peek()
+        if entry is None:
+            return None
+        now = now or datetime.now()
+        return max(entry[0] - now.timestamp(), 0.0)
+
+    def run_pending(self, now: Optional[datetime] = None) -> List[Job]:
+        """Fire every job that is due and reschedule it. Returns the jobs that fired."""
+        now = now or datetime.now()
+        fired = []
+        runs = []
+        while True:
+            entry = self._peek()
+            if entry is None or entry[0] > now.timestamp():
+                break
+            heapq.heappop(self._heap)
+            job = entry[1]
+            fire_time = job.next_run
+
+            # A late job fires once, then resumes at its next fire time after now
+            job.next_run = job.schedule.next_after(max(fire_time, now))
+            self._push(job)
+
+            if self._is_too_late(fire_time, now) and job.misfire_policy != "all":
+                logger.warning(f"Skipping {job.name}: missed its {fire_time} run by more than the grace time")
+                if self.store is not None:
+                    self.store.update_next_run(job.id, job.next_run.timestamp())
+                continue
+            if job.running:
+                if job.misfire_policy == "all":
+                    job.missed += 1
+                else:
+                    logger.warning(f"Skipping {job.name}: previous run is still in progress")
+                continue
+
+            job.last_run = fire_time
+            runs.append((job.id, job.next_run.timestamp(), fire_time.timestamp()))
+            fired.append(job)
+            self._dispatcher(job)
+
+        if self.store is not None:
+            self.store.save_runs(runs)
+        return fired
+
+    def _dispatch(self, job: Job) -> None:
+        if self.pool is not None:
+            # Queued jobs count as in progress so the next fire time does not queue a duplicate
+            job.running = True
+
+            def dropped(reason: str) -> None:
+                job.running = False
+                if self.store is not None:
+                    self.store.record_result(job.id, False, reason)
+
+            self.pool.submit(lambda: self._invoke(job, raise_errors=True), priority=job.priority,
+                             agent=job.agent, deadline=job.deadline, name=job.name, on_drop=dropped)
+            return
+
+        task = asyncio.ensure_future(self._invoke(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _invoke(self, job: Job, raise_errors: bool = False) -> None:
+        """
+        Run a job, plus any runs it still owes. With raise_errors, the last
+        failure is re-raised once they are done, so the dispatch pool counts it.
+        """
+        job.running = True
+        failure: Optional[Exception] = None
+        try:
+            while True:
+                error = None
+                try:
+                    result = job.func()
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    failure = e
+                    error = str(e)
+                    logger.error(f"Scheduled job {job.name} failed: {e}")
+                if self.store is not None:
+                    self.store.record_result(job.id, error is None, error)
+                if job.missed <= 0:
+                    break
+                job.missed -= 1
+        finally:
+            job.running = False
+        if raise_errors and failure is not None:
+            raise failure
+
+    async def run(self) -> None:
+        """Dispatch jobs forever, sleeping until the next one is due."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                self.run_pending()
+                # Rescheduling above set the event; the heap already reflects it
+                self._wakeup.clear()
+                delay = self.seconds_until_next()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._wakeup = None
+            self._loop = None
@@ -1,41 +1,74 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
 from loguru import logger
 from .utils.screenshot import Screenshot
 from .utils.pytesseractocr import PyTesseractOCR
 from .utils.system_prompt import SystemPrompt
 from .utils.callLLM import CallLLM
 from .utils.interact import Interact
+from .elements import Action, TextElement
+
+if TYPE_CHECKING:
+    from .memory import SessionMemory
 
 class ScreenAnalyzer:
     """Analyzes screen content using OCR and LangChain for action determination."""
     
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: Optional[str], ocr_handler=None, llm_handler=None):
         self.screenshot_handler = Screenshot()
-        self.ocr_handler = PyTesseractOCR()
+        self.ocr_handler = ocr_handler or PyTesseractOCR()
         self.system_prompt = SystemPrompt().get_prompt()
-        self.llm_handler = CallLLM(api_key=openai_api_key)
+        self.llm_handler = llm_handler or CallLLM(api_key=openai_api_key)
         self.interact_handler = Interact()
     
-    def analyze_screenshot(self, screenshot: bytes, prompt: str) -> Dict:
+    def extract_text(self, screenshot: bytes) -> List[TextElement]:
+        """Run OCR on a screenshot and return the merged text elements."""
+        return self.ocr_handler.perform_ocr(screenshot)
+    
+    def analyze_screenshot(self, screenshot: bytes, prompt: str,
+                           text_elements: Optional[List[TextElement]] = None,
+                           memory: Optional['SessionMemory'] = None) -> Action:
         """
         Analyze screenshot using OCR and determine action using LLM.
         
         Args:
             screenshot: Screenshot image bytes
             prompt: User's desired action
+            text_elements: OCR output for this screenshot, if already computed
+            memory: Session history; when given only the changes since the
+                last step are sent to the LLM
             
         Returns:
             Dict containing action details
         """
         try:
             # Perform OCR
-            text_elements = self.ocr_handler.perform_ocr(screenshot)
+            if text_elements is None:
+                text_elements = self.extract_text(screenshot)
             
             # Get LLM response
-            response = self.llm_handler.get_response(self.system_prompt, screenshot)
+            observation = None
+            if memory is not None:
+                observation = memory.observe(screenshot, text_elements)
+                response = self.llm_handler.get_response(
+                    self.system_prompt,
+                    observation.image,
+                    goal=prompt,
+                    context=memory.context(observation)
+                )
+            else:
+                response = self.llm_handler.get_response(self.system_prompt, screenshot, goal=prompt)
             
             # Parse and validate response
-            action = self._parse_llm_response(response['content'])
+            action = self._parse_llm_response(response.content)
+            if memory is not None:
+                memory.commit()
+            
+            # Coordinates on a cropped region are relative to its corner
+            if observation is not None and observation.region is not None:
+                parameters = action.parameters
+                if "x" in parameters and "y" in parameters:
+                    parameters["x"] += observation.region[0]
+                    parameters["y"] += observation.region[1]
             
             # Perform action
             action = self.interact_handler.perform_action(action, text_elements)
@@ -45,7 +78,7 @@ class ScreenAnalyzer:
             logger.error(f"Error analyzing screenshot: {e}")
             raise
     
-    def _parse_llm_response(self, response: str) -> Dict:
+    def _parse_llm_response(self, response: str) -> Action:
         """Parse LLM response into structured action format."""
         try:
             # Extract JSON from response
@@ -55,8 +88,8 @@ class ScreenAnalyzer:
             # Find JSON-like structure in response
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
             if json_match:
-                action = json.loads(json_match.group())
-                return action
+                # The one place model output is validated; the hot path trusts Action
+                return Action.from_llm(json.loads(json_match.group()))
             else:
                 raise ValueError("No valid action format found in response")
                 
@@ -1,31 +1,51 @@
 import base64
-from typing import List, Dict
+from typing import List, Dict, Optional
 import cv2
 import numpy as np
 from PIL import Image
 import io
+import threading
 from openai import OpenAI
 
+# Tokens used by every CallLLM in this process; read by the agent sandbox for usage reports
+token_usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+_usage_lock = threading.Lock()
+
+
+def _record_usage(response) -> None:
+    usage = getattr(response, "usage", None)
+    with _usage_lock:
+        token_usage["requests"] += 1
+        if usage is not None:
+            token_usage["prompt_tokens"] += usage.prompt_tokens or 0
+            token_usage["completion_tokens"] += usage.completion_tokens or 0
+
 class CallLLM:
     def __init__(self, api_key: str, model: str = "gpt-4-vision-preview"):
         self.client = OpenAI(api_key=api_key)
         self.model = model
 
-    def get_response(self, prompt: str, screenshot: bytes) -> Dict:
+    def get_response(self, prompt: str, screenshot: Optional[bytes],
+                     goal: Optional[str] = None, context: Optional[str] = None) -> Dict:
         try:
-            # Convert screenshot to base64
-            image_base64 = base64.b64encode(screenshot).decode('utf-8')
+            content = [
+                {"type": "text", "text": f"User's Goal: {goal}" if goal else "User's Goal: What element should be interacted with to achieve this goal?"}
+            ]
+            if context:
+                content.append({"type": "text", "text": context})
+            if screenshot:
+                # Convert screenshot to base64
+                image_base64 = base64.b64encode(screenshot).decode('utf-8')
+                content.append({"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_base64}"}})
             
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": prompt},
-                    {"role": "user", "content": [
-                        {"type": "text", "text": "User's Goal: What element should be interacted with to achieve this goal?"},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}}
-                    ]}
+                    {"role": "user", "content": content}
                 ]
             )
+            _record_usage(response)
             
             return response.choices[0].message
             
@@ -58,6 +78,7 @@ class CallLLM:
                     ]}
                 ]
             )
+            _record_usage(response)
             
             return response.choices[0].message.content
             
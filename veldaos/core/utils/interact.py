@@ -1,16 +1,30 @@
-import pyautogui
 import time
+from typing import Dict, List
+from veldaos.core.elements import Action, TextElement
 
-class Interact:
-    def __init__(self):
+_pyautogui = None
+
+def _gui():
+    """
+    Import and configure pyautogui on first use.
+    
+    pyautogui needs a display as soon as it is imported, and perform_action
+    (all that replay and headless analysis use) does not touch it.
+    """
+    global _pyautogui
+    if _pyautogui is None:
+        import pyautogui
         # Configure PyAutoGUI settings
         pyautogui.FAILSAFE = True
         pyautogui.PAUSE = 1.0
+        _pyautogui = pyautogui
+    return _pyautogui
 
+class Interact:
     def click(self, x: int, y: int):
         """Click at the specified coordinates."""
         try:
-            pyautogui.click(x, y)
+            _gui().click(x, y)
             return True
         except Exception as e:
             print(f"Error clicking at coordinates ({x}, {y}): {str(e)}")
@@ -19,7 +33,7 @@ class Interact:
     def type_text(self, text: str):
         """Type the specified text."""
         try:
-            pyautogui.typewrite(text)
+            _gui().typewrite(text)
             return True
         except Exception as e:
             print(f"Error typing text: {str(e)}")
@@ -28,7 +42,7 @@ class Interact:
     def press_key(self, key: str):
         """Press a specific key."""
         try:
-            pyautogui.press(key)
+            _gui().press(key)
             return True
         except Exception as e:
             print(f"Error pressing key {key}: {str(e)}")
@@ -37,8 +51,29 @@ class Interact:
     def move_to(self, x: int, y: int):
         """Move the mouse to the specified coordinates."""
         try:
-            pyautogui.moveTo(x, y)
+            _gui().moveTo(x, y)
             return True
         except Exception as e:
             print(f"Error moving to coordinates ({x}, {y}): {str(e)}")
-            return False 
\ No newline at end of file
+            return False 
+
+    def perform_action(self, action: Action, text_elements: List[TextElement]) -> Action:
+        """Resolve an action that targets an OCR element into screen coordinates."""
+        parameters = action.parameters
+        if "x" in parameters and "y" in parameters:
+            return action
+
+        target = None
+        if "element" in parameters:
+            index = int(parameters["element"])
+            if 0 <= index < len(text_elements):
+                target = text_elements[index]
+        elif "text" in parameters and action.action == "click":
+            wanted = str(parameters["text"]).lower()
+            target = next((elem for elem in text_elements if wanted in elem['text'].lower()), None)
+
+        if target is not None:
+            # Subscripts, so OCR handlers that still return dicts keep working
+            parameters["x"] = target['x'] + target['width'] // 2
+            parameters["y"] = target['y'] + target['height'] // 2
+        return action
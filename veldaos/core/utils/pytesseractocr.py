@@ -5,15 +5,18 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import os
 from veldaos.core.utils.preprocess import preprocess_image
+from veldaos.core.elements import TextElement
 
 class PyTesseractOCR:
     def __init__(self, quality=1.0):
-        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+        if os.name == 'nt':
+            pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
         self.quality = quality
         self.gray_mode = True
 
-    def perform_ocr(self, screenshot: bytes, preprocess_method: str = "contrast") -> List[Dict[str, int]]:
+    def perform_ocr(self, screenshot: bytes, preprocess_method: str = "contrast") -> List[TextElement]:
         # Convert screenshot to PIL Image
         image = Image.open(io.BytesIO(screenshot))
         # Preprocess image using the selected method
@@ -23,20 +26,7 @@ class PyTesseractOCR:
         # Perform OCR
         ocr_data = pytesseract.image_to_data(pil_processed, output_type=pytesseract.Output.DICT)
         # Extract text elements
-        text_elements = []
-        for i, text in enumerate(ocr_data['text']):
-            if text.strip():
-                x = ocr_data['left'][i]
-                y = ocr_data['top'][i]
-                w = ocr_data['width'][i]
-                h = ocr_data['height'][i]
-                text_elements.append({
-                    'text': text,
-                    'x': x,
-                    'y': y,
-                    'width': w,
-                    'height': h
-                })
+        text_elements = self.elements_from_data(ocr_data)
         self.draw_boxes("annotated", screenshot, text_elements)
         merged_elements = self.merge_overlapping_boxes(text_elements)
         self.draw_boxes("merged", screenshot, merged_elements)
@@ -44,21 +34,32 @@ class PyTesseractOCR:
         self.draw_boxes("merged_close", screenshot, merged_close_elements)
         return merged_close_elements
 
-    def merge_close_text(self, text_elements: List[Dict[str, int]]) -> List[Dict[str, int]]:
+    def elements_from_data(self, ocr_data: Dict[str, List]) -> List[TextElement]:
+        """Build text elements from pytesseract's image_to_data dict, skipping empty words."""
+        return [
+            TextElement(text, x, y, w, h)
+            for text, x, y, w, h in zip(ocr_data['text'], ocr_data['left'], ocr_data['top'],
+                                        ocr_data['width'], ocr_data['height'])
+            if text.strip()
+        ]
+
+    def merge_close_text(self, text_elements: List[TextElement]) -> List[TextElement]:
         merged_elements = []
         used_indices = set()
 
         for i, elem1 in enumerate(text_elements):
             if i in used_indices:
                 continue
-            x1, y1, w1, h1 = elem1['x'], elem1['y'], elem1['width'], elem1['height']
-            text1 = elem1['text']
+            x1, y1, w1, h1 = elem1.x, elem1.y, elem1.width, elem1.height
+            text1 = elem1.text
+            merged = None
 
-            for j, elem2 in enumerate(text_elements[i+1:], start=i+1):
+            for j in range(i + 1, len(text_elements)):
                 if j in used_indices:
                     continue
-                x2, y2, w2, h2 = elem2['x'], elem2['y'], elem2['width'], elem2['height']
-                text2 = elem2['text']
+                elem2 = text_elements[j]
+                x2, y2, w2, h2 = elem2.x, elem2.y, elem2.width, elem2.height
+                text2 = elem2.text
 
                 # if len(merged_elements) == 22 or len(merged_elements) == 23 or len(merged_elements) == 24:
                 #     logger.info(f"text1: {text1} text2: {text2} x1: {x1} x2: {x2} w1: {w1} w2: {w2} h1: {h1} h2: {h2} y1: {y1} y2: {y2}")
@@ -75,30 +76,32 @@ class PyTesseractOCR:
                         new_h = max(y1 + h1, y2 + h2) - new_y
                         new_text = text1 + ' ' + text2
 
-                        # Update elem1
-                        elem1 = {'text': new_text, 'x': new_x, 'y': new_y, 'width': new_w, 'height': new_h}
+                        # Remember the merge; the element is built once after the scan
+                        merged = (new_text, new_x, new_y, new_w, new_h)
                         used_indices.add(j)
 
-            merged_elements.append(elem1)
+            merged_elements.append(TextElement(*merged) if merged else elem1)
             used_indices.add(i)
 
         return merged_elements
 
-    def merge_overlapping_boxes(self, text_elements: List[Dict[str, int]]) -> List[Dict[str, int]]:
+    def merge_overlapping_boxes(self, text_elements: List[TextElement]) -> List[TextElement]:
         merged_elements = []
         used_indices = set()
 
         for i, elem1 in enumerate(text_elements):
             if i in used_indices:
                 continue
-            x1, y1, w1, h1 = elem1['x'], elem1['y'], elem1['width'], elem1['height']
-            text1 = elem1['text']
+            x1, y1, w1, h1 = elem1.x, elem1.y, elem1.width, elem1.height
+            text1 = elem1.text
+            merged = None
 
-            for j, elem2 in enumerate(text_elements[i+1:], start=i+1):
+            for j in range(i + 1, len(text_elements)):
                 if j in used_indices:
                     continue
-                x2, y2, w2, h2 = elem2['x'], elem2['y'], elem2['width'], elem2['height']
-                text2 = elem2['text']
+                elem2 = text_elements[j]
+                x2, y2, w2, h2 = elem2.x, elem2.y, elem2.width, elem2.height
+                text2 = elem2.text
 
                 # Calculate horizontal overlap
                 # Check if right edge of box1 overlaps left edge of box2 or vice versa
@@ -121,16 +124,16 @@ class PyTesseractOCR:
                             new_h = min(y1 + h1, y2 + h2) -new_y
                             new_text = text1 + ' ' + text2
 
-                            # Update elem1
-                            elem1 = {'text': new_text, 'x': new_x, 'y': new_y, 'width': new_w, 'height': new_h}
+                            # Remember the merge; the element is built once after the scan
+                            merged = (new_text, new_x, new_y, new_w, new_h)
                             used_indices.add(j)
 
-            merged_elements.append(elem1)
+            merged_elements.append(TextElement(*merged) if merged else elem1)
             used_indices.add(i)
 
         return merged_elements
 
-    def draw_boxes(self,name:str, screenshot: bytes, merged_elements: List[Dict[str, int]]) -> None:
+    def draw_boxes(self,name:str, screenshot: bytes, merged_elements: List[TextElement]) -> None:
         # Convert screenshot to PIL Image
         image = Image.open(io.BytesIO(screenshot))
         
@@ -139,8 +142,8 @@ class PyTesseractOCR:
         
         # Draw merged bounding boxes
         for i, elem in enumerate(merged_elements):
-            x, y, w, h = elem['x'], elem['y'], elem['width'], elem['height']
-            text = elem['text']
+            x, y, w, h = elem.x, elem.y, elem.width, elem.height
+            text = elem.text
             
             # Draw bounding box
             padding_up = 0
@@ -0,0 +1,409 @@
+import multiprocessing as mp
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+
+class WorkerTask(BaseModel):
+    """A single automation to run inside a worker process."""
+    id: str = ""
+    app: str
+    prompt: str
+    max_attempts: int = 1
+    launch_command: Optional[str] = None
+    retries: int = 0
+
+
+class WorkerResult(BaseModel):
+    """Outcome of a task reported back to the supervisor."""
+    task_id: str
+    worker_id: int
+    display: int
+    success: bool
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+class DisplayAllocator:
+    """Hands out X display numbers that are not in use on this host."""
+
+    def __init__(self, base: int = 100, limit: int = 1000):
+        self.base = base
+        self.limit = limit
+        self._allocated = set()
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        """Reserve the lowest free display number."""
+        with self._lock:
+            for number in range(self.base, self.base + self.limit):
+                if number in self._allocated:
+                    continue
+                if os.path.exists(f"/tmp/.X{number}-lock"):
+                    continue
+                self._allocated.add(number)
+                return number
+        raise RuntimeError("No free X display numbers available")
+
+    def release(self, number: int) -> None:
+        """Return a display number to the pool."""
+        with self._lock:
+            self._allocated.discard(number)
+
+
+class VirtualDisplay:
+    """An Xvfb server bound to a single display number."""
+
+    def __init__(self, number: int, size: str = "1920x1080x24"):
+        self.number = number
+        self.size = size
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def name(self) -> str:
+        return f":{self.number}"
+
+    def start(self, timeout: float = 5.0) -> None:
+        """Start Xvfb and wait until its socket accepts connections."""
+        if shutil.which("Xvfb") is None:
+            raise RuntimeError("Xvfb is required for worker mode but was not found on PATH")
+
+        self.process = subprocess.Popen(
+            ["Xvfb", self.name, "-screen", "0", self.size, "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        socket_path = f"/tmp/.X11-unix/X{self.number}"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Xvfb exited while starting display {self.name}")
+            if os.path.exists(socket_path):
+                return
+            time.sleep(0.05)
+        self.stop()
+        raise RuntimeError(f"Timed out waiting for display {self.name}")
+
+    def stop(self) -> None:
+        """Terminate the Xvfb server."""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+def _worker_main(worker_id: int, display: int, inbox, results, heartbeat,
+                 openai_api_key: Optional[str], settle_time: float) -> None:
+    """Entry point of a worker process. Runs tasks from its inbox until it gets None."""
+    # veldaos.core no longer imports pyautogui eagerly, so setting DISPLAY here,
+    # before the imports below, binds this worker to its own display.
+    os.environ["DISPLAY"] = f":{display}"
+    from . import AgentSession
+    from .os_interaction import OSInteraction
+    from .screen_analyzer import ScreenAnalyzer
+
+    os_interaction = OSInteraction(isolated=True)
+    screen_analyzer = ScreenAnalyzer(openai_api_key or os.getenv("OPENAI_API_KEY"))
+
+    stop_beating = threading.Event()
+
+    def beat():
+        while not stop_beating.is_set():
+            heartbeat.value = time.time()
+            stop_beating.wait(1.0)
+
+    threading.Thread(target=beat, daemon=True).start()
+
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+
+        start = time.monotonic()
+        app_process = None
+        try:
+            if task.launch_command:
+                app_process = subprocess.Popen(shlex.split(task.launch_command))
+                os_interaction.wait(settle_time)
+            with AgentSession(task.app, os_interaction, screen_analyzer) as agent:
+                success = agent.loop(task.prompt, max_attempts=task.max_attempts)
+            error = None
+        except Exception as e:
+            success = False
+            error = str(e)
+        finally:
+            if app_process and app_process.poll() is None:
+                app_process.terminate()
+
+        results.put(WorkerResult(
+            task_id=task.id,
+            worker_id=worker_id,
+            display=display,
+            success=success,
+            error=error,
+            duration=time.monotonic() - start,
+        ))
+
+    stop_beating.set()
+
+
+class _Worker:
+    """Supervisor-side handle for one worker process and its display."""
+
+    def __init__(self, worker_id: int, slot: int, display: VirtualDisplay, process, inbox, heartbeat):
+        self.id = worker_id
+        # Position in the pool; a restarted worker gets a new id but keeps its slot
+        self.slot = slot
+        self.display = display
+        self.process = process
+        self.inbox = inbox
+        self.heartbeat = heartbeat
+        self.task: Optional[WorkerTask] = None
+        self.task_started: float = 0.0
+
+
+class WorkerPool:
+    """
+    Supervises N worker processes, each running agents on its own Xvfb display.
+
+    A worker that dies is restarted after restart_backoff seconds, doubling
+    for each further crash of the same slot before it completes a task. After
+    max_restarts such crashes the slot is given up; once no slot is left,
+    queued tasks fail with the last crash reason instead of waiting forever.
+
+    Example:
+        with WorkerPool(pool_size=4) as pool:
+            results = pool.run([
+                WorkerTask(app="firefox", prompt="Open the downloads page",
+                           launch_command="firefox"),
+            ])
+    """
+
+    def __init__(self, pool_size: int = 2, openai_api_key: Optional[str] = None,
+                 display_base: int = 100, screen_size: str = "1920x1080x24",
+                 heartbeat_timeout: float = 10.0, task_timeout: float = 600.0,
+                 max_retries: int = 1, settle_time: float = 0.8,
+                 max_restarts: int = 3, restart_backoff: float = 1.0):
+        self.pool_size = pool_size
+        self.openai_api_key = openai_api_key
+        self.screen_size = screen_size
+        self.heartbeat_timeout = heartbeat_timeout
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.settle_time = settle_time
+        self.max_restarts = max_restarts
+        self.restart_backoff = restart_backoff
+
+        self._ctx = mp.get_context("spawn")
+        self._allocator = DisplayAllocator(base=display_base)
+        self._results = self._ctx.Queue()
+        self._workers: Dict[int, _Worker] = {}
+        self._pending: Deque[WorkerTask] = deque()
+        self._completed: Dict[str, WorkerResult] = {}
+        self._next_worker_id = 0
+        # Per slot: crashes since it last completed a task, and when to restart it
+        self._crashes: Dict[int, int] = {}
+        self._restart_due: Dict[int, float] = {}
+        self._failed_slots: Dict[int, str] = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def start(self) -> None:
+        """Start all worker processes, giving slots that were given up another chance."""
+        for slot in self._failed_slots:
+            self._crashes.pop(slot, None)
+        self._failed_slots.clear()
+        occupied = {worker.slot for worker in self._workers.values()}
+        for slot in range(self.pool_size):
+            if slot not in occupied and slot not in self._restart_due and slot not in self._failed_slots:
+                self._start_worker(slot)
+        logger.info(f"Worker pool started with {len(self._workers)} workers")
+
+    def _start_worker(self, slot: int) -> _Worker:
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+
+        display = VirtualDisplay(self._allocator.allocate(), self.screen_size)
+        try:
+            display.start()
+        except Exception:
+            self._allocator.release(display.number)
+            raise
+
+        inbox = self._ctx.Queue()
+        heartbeat = self._ctx.Value("d", time.time())
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, display.number, inbox, self._results, heartbeat,
+                  self.openai_api_key, self.settle_time),
+            daemon=True,
+        )
+
+        process.start()
+
+        worker = _Worker(worker_id, slot, display, process, inbox, heartbeat)
+        self._workers[worker_id] = worker
+        logger.info(f"Started worker {worker_id} on display {display.name}")
+        return worker
+
+    def _stop_worker(self, worker: _Worker, graceful: bool = True) -> None:
+        if graceful and worker.process.is_alive():
+            worker.inbox.put(None)
+            worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=2)
+        worker.display.stop()
+        self._allocator.release(worker.display.number)
+        self._workers.pop(worker.id, None)
+
+    def submit(self, task: WorkerTask) -> str:
+        """Queue a task and return its id."""
+        if not task.id:
+            task.id = uuid.uuid4().hex
+        self._pending.append(task)
+        self._dispatch()
+        return task.id
+
+    def _dispatch(self) -> None:
+        for worker in self._workers.values():
+            if not self._pending:
+                return
+            if worker.task is None and worker.process.is_alive():
+                task = self._pending.popleft()
+                worker.task = task
+                worker.task_started = time.monotonic()
+                worker.inbox.put(task)
+
+    def _collect(self, timeout: float) -> None:
+        try:
+            result = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            self._completed[result.task_id] = result
+            worker = self._workers.get(result.worker_id)
+            if worker:
+                # It got through startup, so earlier crashes of its slot are forgiven
+                self._crashes.pop(worker.slot, None)
+                if worker.task and worker.task.id == result.task_id:
+                    worker.task = None
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return
+
+    def check_health(self) -> Dict[int, str]:
+        """Restart workers that died, stopped heartbeating or overran their task."""
+        status = {}
+        now = time.time()
+        for worker in list(self._workers.values()):
+            if not worker.process.is_alive():
+                reason = f"exited with code {worker.process.exitcode}"
+            elif now - worker.heartbeat.value > self.heartbeat_timeout:
+                reason = "missed heartbeat"
+            elif worker.task and time.monotonic() - worker.task_started > self.task_timeout:
+                reason = "task timed out"
+            else:
+                status[worker.id] = "busy" if worker.task else "idle"
+                continue
+
+            logger.warning(f"Worker {worker.id} on display {worker.display.name} {reason}")
+            task = worker.task
+            self._stop_worker(worker, graceful=False)
+            if task is not None:
+                if task.retries < self.max_retries:
+                    task.retries += 1
+                    self._pending.appendleft(task)
+                else:
+                    self._completed[task.id] = WorkerResult(
+                        task_id=task.id,
+                        worker_id=worker.id,
+                        display=worker.display.number,
+                        success=False,
+                        error=f"Worker {reason}",
+                    )
+            self._schedule_restart(worker.slot, f"Worker {reason}")
+
+        for slot, due in list(self._restart_due.items()):
+            if time.monotonic() < due:
+                continue
+            del self._restart_due[slot]
+            try:
+                replacement = self._start_worker(slot)
+            except Exception as e:
+                self._schedule_restart(slot, f"Worker could not be started: {e}")
+                continue
+            status[replacement.id] = "restarted"
+
+        if not self._workers and not self._restart_due:
+            self._fail_pending()
+        return status
+
+    def _schedule_restart(self, slot: int, reason: str) -> None:
+        crashes = self._crashes.get(slot, 0) + 1
+        self._crashes[slot] = crashes
+        if crashes > self.max_restarts:
+            self._failed_slots[slot] = reason
+            logger.error(f"Giving up on worker slot {slot} after {crashes} crashes: {reason}")
+            return
+        delay = self.restart_backoff * 2 ** (crashes - 1)
+        self._restart_due[slot] = time.monotonic() + delay
+        logger.info(f"Restarting worker slot {slot} in {delay:.1f}s")
+
+    def _fail_pending(self) -> None:
+        """Fail every queued task: no worker is left to run it."""
+        reason = next(reversed(self._failed_slots.values()), "no workers running")
+        while self._pending:
+            task = self._pending.popleft()
+            # No worker or display ever ran the task
+            self._completed[task.id] = WorkerResult(
+                task_id=task.id,
+                worker_id=-1,
+                display=-1,
+                success=False,
+                error=f"No worker available: {reason}",
+            )
+
+    def poll(self, timeout: float = 0.5) -> None:
+        """Collect results, run health checks and hand out pending tasks."""
+        self._collect(timeout)
+        self.check_health()
+        self._dispatch()
+
+    def result(self, task_id: str) -> Optional[WorkerResult]:
+        """Return the result of a finished task, if any."""
+        return self._completed.get(task_id)
+
+    def run(self, tasks: List[WorkerTask]) -> List[WorkerResult]:
+        """Run tasks across the pool and block until all of them finish."""
+        if not self._workers and not self._restart_due:
+            self.start()
+        task_ids = [self.submit(task) for task in tasks]
+        while any(task_id not in self._completed for task_id in task_ids):
+            self.poll()
+        return [self._completed[task_id] for task_id in task_ids]
+
+    def shutdown(self) -> None:
+        """Stop all workers and their displays."""
+        for worker in list(self._workers.values()):
+            self._stop_worker(worker)
+        logger.info("Worker pool stopped")
@@ -34,11 +34,22 @@ from loguru import logger
 
 from veldaos.marketplace.marketplace import Marketplace, AgentPackage
 from veldaos.core.agent import BaseAgent
+from veldaos.core.sandbox import SandboxedAgent
 from veldaos.desktop.ui.agent_grid import AgentGridWidget
 
+# Wait before syncing the catalog again after a failure; doubles per failure up to the max
+CATALOG_RETRY_SECONDS = 5.0
+CATALOG_RETRY_MAX_SECONDS = 300.0
+
 class AgentRunner(QThread):
-    """Thread for running agents to prevent UI freezing."""
+    """
+    Thread for running agents to prevent UI freezing.
+    
+    Pass a SandboxedAgent to run a marketplace agent out of process; its
+    CPU, memory and token usage is emitted through usage_reported.
+    """
     finished = pyqtSignal(bool)
+    usage_reported = pyqtSignal(dict)
     
     def __init__(self, agent: BaseAgent, task: str):
         super().__init__()
@@ -55,6 +66,26 @@ class AgentRunner(QThread):
         except Exception as e:
             logger.error(f"Agent execution failed: {e}")
             self.finished.emit(False)
+        finally:
+            if isinstance(self.agent, SandboxedAgent):
+                self.usage_reported.emit(self.agent.usage().model_dump())
+
+class CatalogLoader(QThread):
+    """Thread that syncs the marketplace catalog into its search index."""
+    loaded = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, marketplace: Marketplace):
+        super().__init__()
+        self.marketplace = marketplace
+    
+    def run(self):
+        try:
+            count = sum(1 for _ in self.marketplace.iter_available_agents())
+            self.loaded.emit(count)
+        except Exception as e:
+            logger.error(f"Failed to load the marketplace catalog: {e}")
+            self.failed.emit(str(e))
 
 class MainWindow(QMainWindow):
     """Main window of the VeldaOS desktop application."""
@@ -100,6 +131,11 @@ class MainWindow(QMainWindow):
             marketplace_url="https://velda.pro",
             local_agents_dir="./agents"
         )
+        self.catalog_loader: Optional[CatalogLoader] = None
+        self.catalog_retry_delay = 0.0
+        self.catalog_retry_timer = QTimer(self)
+        self.catalog_retry_timer.setSingleShot(True)
+        self.catalog_retry_timer.timeout.connect(self.search_agents)
         
         self.setup_ui()
         self.load_agents()
@@ -159,6 +195,7 @@ class MainWindow(QMainWindow):
         search_layout = QHBoxLayout()
         search_input = QLineEdit()
         search_input.setPlaceholderText("Search agents...")
+        search_input.setToolTip("Filters: cap:<capability>  price<5  rating>=4")
         search_input.setStyleSheet("""
             QLineEdit {
                 background: #2c3e50;
@@ -176,6 +213,14 @@ class MainWindow(QMainWindow):
         """)
         search_layout.addWidget(search_input)
         layout.addLayout(search_layout)
+        self.search_input = search_input
+        
+        # Search as the user types, once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.search_agents)
+        search_input.textChanged.connect(self.search_timer.start)
         
         # Create tab widget
         tab_widget = QTabWidget()
@@ -314,6 +359,50 @@ class MainWindow(QMainWindow):
             logger.error(f"Failed to load agents: {e}")
             QMessageBox.warning(self, "Error", f"Failed to load agents: {e}")
     
+    def search_agents(self):
+        """Show the agents matching the search bar in the Available tab."""
+        if not len(self.marketplace.search_index):
+            # Catalog not synced yet; keep the grid until the loader has filled the index
+            self.sync_catalog()
+            return
+        try:
+            agents = self.marketplace.search_agents(self.search_input.text(), fetch=False)
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            return
+        self.uninstalled_grid.update_agents([
+            {"name": agent.name, "desc": agent.description, "icon": "icon.png"}
+            for agent in agents
+        ])
+    
+    def sync_catalog(self):
+        """Fill the search index from the marketplace on a background thread, then search again."""
+        if self.catalog_loader is not None and self.catalog_loader.isRunning():
+            return
+        if self.catalog_retry_timer.isActive():
+            # The last sync failed; don't hit the marketplace again on every keystroke
+            return
+        self.catalog_loader = CatalogLoader(self.marketplace)
+        self.catalog_loader.loaded.connect(self.on_catalog_loaded)
+        self.catalog_loader.failed.connect(self.on_catalog_failed)
+        self.catalog_loader.start()
+    
+    def on_catalog_loaded(self, count: int):
+        """Show search results once the catalog is in the search index."""
+        self.catalog_retry_delay = 0.0
+        self.statusBar().clearMessage()
+        if count:
+            self.search_agents()
+    
+    def on_catalog_failed(self, error: str):
+        """Show why the catalog could not be loaded and back off before the next sync."""
+        self.catalog_retry_delay = min(max(self.catalog_retry_delay * 2, CATALOG_RETRY_SECONDS),
+                                       CATALOG_RETRY_MAX_SECONDS)
+        self.statusBar().showMessage(
+            f"Could not load the marketplace catalog: {error} "
+            f"(retrying in {self.catalog_retry_delay:.0f}s)")
+        self.catalog_retry_timer.start(int(self.catalog_retry_delay * 1000))
+    
     def show_marketplace(self):
         """Show the marketplace page."""
         self.content.setCurrentWidget(self.marketplace_page)
@@ -0,0 +1,497 @@
+import codecs
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CACHE_CONTROL_FIELD = re.compile(r"([\w-]+)\s*(?:=\s*\"?(\d+)\"?)?")
+WHITESPACE = re.compile(r"\s*")
+
+# Read size when streaming a JSON response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class JsonArrayDecoder:
+    """
+    Decodes the elements of a JSON array from a byte stream as they arrive,
+    so a large response can be consumed without holding all of it parsed.
+
+    Example:
+        decoder = JsonArrayDecoder()
+        for chunk in response.iter_content(65536):
+            for item in decoder.feed(chunk):
+                ...
+        decoder.close()
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state = "start"  # start, value, comma, end
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add bytes and return the elements completed by them."""
+        buffer = self._buffer + self._text.decode(chunk)
+        items = []
+        pos = 0
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer) or self._state == "end":
+                break
+            char = buffer[pos]
+            if self._state == "start":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._state = "first"
+                pos += 1
+            elif char == "]" and self._state in ("first", "comma"):
+                self._state = "end"
+                pos += 1
+            elif self._state == "comma":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+                self._state = "value"
+                pos += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # Incomplete element, wait for more bytes
+                if end == len(buffer) or buffer[end] not in " \t\r\n,]":
+                    break  # A number could still continue ("4" of "4.5")
+                items.append(item)
+                self._state = "comma"
+                pos = end
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self) -> None:
+        """Check that the array was complete."""
+        if self._state != "end":
+            raise ValueError("Truncated JSON array")
+        if self._buffer.strip():
+            raise ValueError("Unexpected data after JSON array")
+
+
+class CachedResponse:
+    """A cached response body with the validators needed to revalidate it."""
+
+    __slots__ = ("url", "body", "etag", "last_modified", "fetched_at", "max_age", "stale_while_revalidate",
+                 "next_url", "_parsed")
+
+    def __init__(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 fetched_at: float = 0.0, max_age: float = 0.0, stale_while_revalidate: float = 0.0,
+                 next_url: Optional[str] = None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.next_url = next_url  # Link rel="next" of a paginated response
+        self._parsed: Any = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.age < self.max_age
+
+    @property
+    def usable_stale(self) -> bool:
+        return self.age < self.max_age + self.stale_while_revalidate
+
+    def json(self) -> Any:
+        """The parsed body. It is parsed once and shared between callers, so treat it as read-only."""
+        if self._parsed is None:
+            self._parsed = json.loads(self.body)
+        return self._parsed
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache: <key>.body holds the payload and <key>.json
+    its validators and freshness. Entries are also kept in memory, so a fresh
+    hit in the same process costs a dict lookup.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory: Dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._memory.get(url)
+        if cached is not None:
+            return cached
+        key = self._key(url)
+        try:
+            with open(self.cache_dir / f"{key}.json") as f:
+                meta = json.load(f)
+            body = (self.cache_dir / f"{key}.body").read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.pop("url", None) != url:
+            return None
+        cached = CachedResponse(url, body, **meta)
+        with self._lock:
+            self._memory[url] = cached
+        return cached
+
+    def put(self, cached: CachedResponse, body: bool = True) -> None:
+        """Store an entry; body=False rewrites only its metadata, for an unchanged body."""
+        key = self._key(cached.url)
+        meta = {name: getattr(cached, name) for name in CachedResponse.__slots__ if name not in ("body", "_parsed")}
+        try:
+            # Body first, then metadata, each replaced atomically
+            if body:
+                self._write(self.cache_dir / f"{key}.body", cached.body)
+            self._write(self.cache_dir / f"{key}.json", json.dumps(meta).encode())
+        except OSError as e:
+            logger.warning(f"Failed to write response cache for {cached.url}: {e}")
+        with self._lock:
+            self._memory[cached.url] = cached
+
+    def touch(self, cached: CachedResponse) -> None:
+        """Mark an entry as just revalidated (a 304 from the server), without rewriting its body."""
+        cached.fetched_at = time.time()
+        self.put(cached, body=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        for path in self.cache_dir.iterdir():
+            if path.suffix in (".json", ".body"):
+                path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class MarketplaceClient:
+    """
+    HTTP client for the marketplace API.
+
+    All requests share one pooled requests.Session, so connections are kept
+    alive between calls. GET responses are cached on disk and revalidated
+    with If-None-Match / If-Modified-Since, so an unchanged catalog costs a
+    304 instead of a full download. A fresh entry is returned without
+    contacting the server; once stale, it is still returned immediately while
+    a background request revalidates it (stale-while-revalidate). If the
+    server is unreachable, a cached copy of any age is used.
+
+    The server's Cache-Control max-age and stale-while-revalidate take
+    precedence over the client defaults, and no-store responses are not cached.
+
+    Example:
+        client = MarketplaceClient("http://localhost:8000", cache_dir="./agents/.cache")
+        agents = client.get_json("/agents")
+    """
+
+    def __init__(self, base_url: str, cache_dir: Optional[Union[str, Path]] = None,
+                 timeout: Tuple[float, float] = (3.05, 30.0), max_age: float = 60.0,
+                 stale_while_revalidate: float = 24 * 3600.0, pool_size: int = 10, retries: int = 2,
+                 session: Optional[requests.Session] = None):
+        """
+        Args:
+            base_url: Marketplace API root, e.g. http://localhost:8000
+            cache_dir: Directory of the response cache; None caches in memory only
+            timeout: (connect, read) timeout in seconds for every request
+            max_age: Seconds a response is fresh when the server does not say
+            stale_while_revalidate: Seconds after that a stale response may still be
+                served while it is revalidated in the background
+            pool_size: Keep-alive connections kept per host
+            retries: Retries of failed connections and 502/503/504 responses
+            session: Session to use instead of a new one (e.g. in tests)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.cache = ResponseCache(cache_dir) if cache_dir is not None else None
+        self._memory_only: Dict[str, CachedResponse] = {}
+        self._revalidating: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0, "stale_hits": 0}
+
+        if session is None:
+            session = requests.Session()
+            retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                          allowed_methods=("GET", "HEAD"))
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"Accept": "application/json", "User-Agent": "veldaos-marketplace"})
+        self.session = session
+
+    def url(self, path: str) -> str:
+        return path if path.startswith(("http://", "https://")) else f"{self.base_url}/{path.lstrip('/')}"
+
+    def _cached(self, url: str) -> Optional[CachedResponse]:
+        if self.cache is not None:
+            return self.cache.get(url)
+        return self._memory_only.get(url)
+
+    def _store(self, cached: CachedResponse) -> None:
+        if self.cache is not None:
+            self.cache.put(cached)
+        else:
+            self._memory_only[cached.url] = cached
+
+    def _freshness(self, response: requests.Response) -> Tuple[Optional[float], Optional[float], bool]:
+        """(max_age, stale_while_revalidate, store) from the response's Cache-Control."""
+        directives = {name.lower(): value for name, value in
+                      CACHE_CONTROL_FIELD.findall(response.headers.get("Cache-Control", ""))}
+        if "no-store" in directives:
+            return None, None, False
+        max_age = 0.0 if "no-cache" in directives else (
+            float(directives["max-age"]) if directives.get("max-age") else None)
+        swr = float(directives["stale-while-revalidate"]) if directives.get("stale-while-revalidate") else None
+        return max_age, swr, True
+
+    def _conditional_headers(self, cached: Optional[CachedResponse]) -> Dict[str, str]:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+            elif not cached.etag:
+                headers["If-Modified-Since"] = formatdate(cached.fetched_at, usegmt=True)
+        return headers
+
+    def _not_modified(self, response: requests.Response, cached: CachedResponse) -> CachedResponse:
+        """Refresh a cached entry after a 304."""
+        max_age, swr, _ = self._freshness(response)
+        self.stats["not_modified"] += 1
+        if max_age is not None:
+            cached.max_age = max_age
+        if swr is not None:
+            cached.stale_while_revalidate = swr
+        if self.cache is not None:
+            self.cache.touch(cached)
+        else:
+            cached.fetched_at = time.time()
+        return cached
+
+    def _cache_response(self, url: str, response: requests.Response, body: bytes) -> CachedResponse:
+        max_age, swr, store = self._freshness(response)
+        next_link = response.links.get("next", {}).get("url")
+        fetched = CachedResponse(
+            url, body,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            fetched_at=time.time(),
+            max_age=self.max_age if max_age is None else max_age,
+            stale_while_revalidate=self.stale_while_revalidate if swr is None else swr,
+            next_url=urljoin(url, next_link) if next_link else None,
+        )
+        if store:
+            self._store(fetched)
+        return fetched
+
+    def _fetch(self, url: str, cached: Optional[CachedResponse]) -> CachedResponse:
+        """Send a (conditional) GET and update the cache from the response."""
+        self.stats["requests"] += 1
+        response = self.session.get(url, headers=self._conditional_headers(cached), timeout=self.timeout)
+        if response.status_code == 304 and cached is not None:
+            return self._not_modified(response, cached)
+        response.raise_for_status()
+        return self._cache_response(url, response, response.content)
+
+    def _revalidate_in_background(self, url: str, cached: CachedResponse) -> None:
+        with self._lock:
+            running = self._revalidating.get(url)
+            if running is not None and running.is_alive():
+                return
+
+            def revalidate():
+                try:
+                    self._fetch(url, cached)
+                except Exception as e:
+                    logger.warning(f"Background revalidation of {url} failed: {e}")
+                finally:
+                    with self._lock:
+                        self._revalidating.pop(url, None)
+
+            thread = threading.Thread(target=revalidate, name="marketplace-revalidate", daemon=True)
+            self._revalidating[url] = thread
+        thread.start()
+
+    def get(self, path: str, revalidate: bool = False) -> CachedResponse:
+        """
+        GET a resource through the cache.
+
+        Args:
+            path: API path (e.g. "/agents") or absolute URL
+            revalidate: Always check with the server, even if the cached copy is fresh
+        """
+        url = self.url(path)
+        cached = self._cached(url)
+        if cached is not None and not revalidate:
+            if cached.fresh:
+                self.stats["cache_hits"] += 1
+                return cached
+            if cached.usable_stale:
+                self.stats["stale_hits"] += 1
+                self._revalidate_in_background(url, cached)
+                return cached
+        try:
+            return self._fetch(url, cached)
+        except requests.RequestException as e:
+            if cached is None:
+                raise
+            logger.warning(f"Using cached {url} ({cached.age:.0f}s old), request failed: {e}")
+            return cached
+
+    def get_json(self, path: str, revalidate: bool = False) -> Any:
+        return self.get(path, revalidate=revalidate).json()
+
+    def post_json(self, path: str, payload: Any) -> Any:
+        """POST a JSON body and return the parsed response (never cached)."""
+        self.stats["requests"] += 1
+        response = self.session.post(self.url(path), json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_json_array(self, path: str, revalidate: bool = False) -> Iterator[Any]:
+        """
+        Yield the elements of a JSON array resource while it is being received.
+
+        Paginated resources are followed page by page through their
+        Link: <...>; rel="next" header, each page being fetched only once the
+        previous one has been consumed. Every page is cached and revalidated
+        like get() does, and cached pages are decoded incrementally too, so
+        at most one element is held parsed at a time. An error on a page
+        after some elements were yielded is raised to the caller.
+
+        Example:
+            for agent in client.iter_json_array("/agents?limit=100"):
+                ...
+        """
+        url: Optional[str] = self.url(path)
+        while url:
+            url = yield from self._iter_page(url, revalidate)
+
+    @staticmethod
+    def _decode_body(body: bytes) -> Iterator[Any]:
+        decoder = JsonArrayDecoder()
+        for start in range(0, len(body), STREAM_CHUNK_SIZE):
+            yield from decoder.feed(body[start:start + STREAM_CHUNK_SIZE])
+        decoder.close()
+
+    def _iter_page(self, url: str, revalidate: bool) -> Generator[Any, None, Optional[str]]:
+        """Yield one page's elements and return the URL of the next page, if any."""
+        cached = self._cached(url)
+        if cached is not None and not revalidate:
+            if cached.fresh:
+                self.stats["cache_hits"] += 1
+                yield from self._decode_body(cached.body)
+                return cached.next_url
+            if cached.usable_stale:
+                self.stats["stale_hits"] += 1
+                self._revalidate_in_background(url, cached)
+                yield from self._decode_body(cached.body)
+                return cached.next_url
+
+        self.stats["requests"] += 1
+        try:
+            response = self.session.get(url, headers=self._conditional_headers(cached), timeout=self.timeout,
+                                        stream=True)
+        except requests.RequestException as e:
+            if cached is None:
+                raise
+            logger.warning(f"Using cached {url} ({cached.age:.0f}s old), request failed: {e}")
+            yield from self._decode_body(cached.body)
+            return cached.next_url
+
+        with response:
+            if response.status_code == 304 and cached is not None:
+                cached = self._not_modified(response, cached)
+                yield from self._decode_body(cached.body)
+                return cached.next_url
+            response.raise_for_status()
+            # The raw body is kept for the cache; parsed elements are handed on one by one
+            body = bytearray()
+            decoder = JsonArrayDecoder()
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                body += chunk
+                yield from decoder.feed(chunk)
+            decoder.close()
+        return self._cache_response(url, response, bytes(body)).next_url
+
+    def wait_for_revalidation(self, timeout: Optional[float] = None) -> None:
+        """Block until background revalidations finish (for tests and clean shutdown)."""
+        with self._lock:
+            threads = list(self._revalidating.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def download(self, url: str, on_chunk: Callable[[bytes], None], chunk_size: int = 1 << 20,
+                 on_progress: Optional[Callable[[int, Optional[int]], None]] = None, offset: int = 0,
+                 on_start: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Stream a download (never cached) through the pooled session.
+
+        Args:
+            url: API path or absolute URL
+            on_chunk: Called with each chunk of the body
+            chunk_size: Read size
+            on_progress: Called after each chunk as on_progress(bytes_done, bytes_total);
+                bytes_total is None if the server sent no Content-Length
+            offset: Resume from this byte with a Range request
+            on_start: Called once before the first chunk with the offset the body
+                actually starts at: offset if the server honoured the Range, else 0,
+                in which case the caller must discard what it already has
+
+        Returns:
+            Size of the complete file in bytes (offset included)
+        """
+        self.stats["requests"] += 1
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(self.url(url), stream=True, timeout=self.timeout, headers=headers) as response:
+            if offset and response.status_code == 416:
+                # The range is past the end: what we have is stale, start over
+                return self.download(url, on_chunk, chunk_size, on_progress, 0, on_start)
+            response.raise_for_status()
+            start = offset if offset and response.status_code == 206 else 0
+            if on_start is not None:
+                on_start(start)
+            length = response.headers.get("Content-Length")
+            expected = start + int(length) if length and length.isdigit() else None
+            total = start
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                on_chunk(chunk)
+                total += len(chunk)
+                if on_progress is not None:
+                    on_progress(total, expected)
+        return total
+
+    def close(self) -> None:
+        self.wait_for_revalidation(timeout=5)
+        self.session.close()
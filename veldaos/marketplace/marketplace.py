@@ -1,11 +1,21 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+import asyncio
+import hashlib
+import itertools
 import json
 import os
+import re
 import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import requests
 from pydantic import BaseModel
 from loguru import logger
+from veldaos.marketplace.client import MarketplaceClient
+from veldaos.marketplace.registry import METADATA_FILE, AgentRegistry, RegistryEntry, read_package_metadata
+from veldaos.marketplace.search import SearchIndex, parse_query
+from veldaos.marketplace.store import BlobStore, is_safe_member
 
 class AgentPackage(BaseModel):
     """Represents an agent package in the marketplace."""
@@ -20,31 +30,154 @@ class AgentPackage(BaseModel):
     requirements: Dict[str, Any]
     rating: float
     downloads: int
+    entry_point: str = "agent:Agent"
+    sha256: Optional[str] = None  # Published digest of the package zip
+
+# Read and write size of package downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Agents requested per page of the catalog
+CATALOG_PAGE_SIZE = 100
+
+def compare_versions(a: str, b: str) -> int:
+    """
+    Compare two dotted versions: -1 if a is older than b, 0 if equal, 1 if newer.
+    
+    Numeric parts compare as numbers (1.10 > 1.9), missing parts count as 0
+    (1.0 == 1.0.0), and a text part sorts before a release (1.0-beta < 1.0).
+    """
+    def parts(version: str) -> List[Tuple[int, int, str]]:
+        return [(0, int(part), "") if part.isdigit() else (-1, 0, part)
+                for part in re.split(r"[.+-]", version.strip().lstrip("vV")) if part]
+    
+    for x, y in itertools.zip_longest(parts(a), parts(b), fillvalue=(0, 0, "")):
+        if x != y:
+            return -1 if x < y else 1
+    return 0
+
+class IntegrityError(Exception):
+    """A downloaded package does not match its published digest or is not a valid zip."""
 
 class Marketplace:
     """Handles agent discovery, installation, and management."""
     
-    def __init__(self, marketplace_url: str, local_agents_dir: str):
+    def __init__(self, marketplace_url: str, local_agents_dir: str, extract_packages: bool = False,
+                 client: Optional[MarketplaceClient] = None, keep_versions: int = 2):
+        """
+        Args:
+            marketplace_url: Base URL of the marketplace API
+            local_agents_dir: Where installed agents are kept
+            extract_packages: Unpack every agent instead of running it from its zip.
+                Agents can also ask for this themselves with "zip_safe": false in
+                their metadata.json, e.g. if they open their own files by path.
+                Extracted files are read-only links into the package store, except
+                those matching a "writable" pattern in metadata.json (e.g. ["data/*"]).
+            client: HTTP client to use; by default one with a response cache in
+                <local_agents_dir>/.cache
+            keep_versions: Versions of each agent kept in the package store, so
+                switch_version() can go back without a download
+        """
         self.marketplace_url = marketplace_url
+        self.extract_packages = extract_packages
         self.local_agents_dir = Path(local_agents_dir)
         self.local_agents_dir.mkdir(parents=True, exist_ok=True)
+        # Installed agents are indexed here at install time and imported on first run
+        self.registry = AgentRegistry(self.local_agents_dir)
+        # Packages and files are stored once by content and hard-linked into agents/<id>/
+        self.store = BlobStore(self.local_agents_dir)
+        self.keep_versions = keep_versions
+        self.client = client or MarketplaceClient(marketplace_url, cache_dir=self.local_agents_dir / ".cache")
+        # (registry generation, validated listings) of the last get_installed_agents call
+        self._installed: Optional[Tuple[int, List[AgentPackage]]] = None
+        # Local index of the catalog, kept in step by get_available_agents
+        self.search_index = SearchIndex()
     
-    def get_available_agents(self) -> List[AgentPackage]:
-        """Fetch available agents from the marketplace."""
+    def get_available_agents(self, revalidate: bool = False) -> List[AgentPackage]:
+        """Fetch available agents from the marketplace (revalidate=True skips a fresh cached copy)."""
         try:
-            response = requests.get(f"{self.marketplace_url}/agents")
-            response.raise_for_status()
-            return [AgentPackage(**agent) for agent in response.json()]
+            return list(self.iter_available_agents(revalidate=revalidate))
         except Exception as e:
             logger.error(f"Failed to fetch available agents: {e}")
             return []
     
-    def get_agent_details(self, agent_id: str) -> Optional[AgentPackage]:
-        """Get detailed information about a specific agent."""
+    def iter_available_agents(self, page_size: int = CATALOG_PAGE_SIZE,
+                              revalidate: bool = False) -> Iterator[AgentPackage]:
+        """
+        Yield the catalog's agents as they arrive, one page at a time.
+        
+        Pages are requested as /agents?limit=<page_size> and followed through
+        their Link rel="next" header (a server that does not paginate sends
+        the whole catalog as one page, which is decoded as it streams in).
+        Each AgentPackage is built only when it is reached, so the first ones
+        can be shown before the rest of the catalog is downloaded. The search
+        index is updated page by page; agents gone from the catalog are
+        dropped from it once the last page is read.
+        
+        Errors are raised to the caller, possibly after some agents were yielded.
+        
+        Example:
+            for agent in marketplace.iter_available_agents():
+                grid.add_agent(agent)
+        """
+        seen = set()
+        page: List[AgentPackage] = []
+        for data in self.client.iter_json_array(f"/agents?limit={page_size}", revalidate=revalidate):
+            agent = AgentPackage(**data)
+            seen.add(agent.id)
+            page.append(agent)
+            if len(page) >= page_size:
+                self.search_index.sync(page, prune=False)
+                page = []
+            yield agent
+        self.search_index.sync(page, prune=False)
+        self.search_index.prune(seen)
+    
+    async def aiter_available_agents(self, page_size: int = CATALOG_PAGE_SIZE,
+                                     revalidate: bool = False) -> AsyncIterator[AgentPackage]:
+        """
+        Async version of iter_available_agents: each page is fetched in the
+        default executor so the event loop is never blocked on the network.
+        
+        Example:
+            async for agent in marketplace.aiter_available_agents():
+                ...
+        """
+        loop = asyncio.get_running_loop()
+        agents = self.iter_available_agents(page_size, revalidate)
         try:
-            response = requests.get(f"{self.marketplace_url}/agents/{agent_id}")
-            response.raise_for_status()
-            return AgentPackage(**response.json())
+            while True:
+                page = await loop.run_in_executor(None, lambda: list(itertools.islice(agents, page_size)))
+                if not page:
+                    break
+                for agent in page:
+                    yield agent
+        finally:
+            agents.close()
+    
+    def search_agents(self, query: str = "", limit: int = 50, fetch: bool = True, **filters) -> List[AgentPackage]:
+        """
+        Search the catalog locally.
+        
+        query may contain facet filters as typed in the search bar, e.g.
+        "pdf cap:ocr price<5 rating>=4"; keyword filters (min_price, max_price,
+        min_rating, capabilities) are applied on top. The catalog is fetched
+        first if it has not been loaded yet; that blocks on the network, so UI
+        code passes fetch=False and fills the index in the background with
+        iter_available_agents.
+        
+        Example:
+            marketplace.search_agents("summ", max_price=0)
+        """
+        if fetch and not len(self.search_index):
+            self.get_available_agents()
+        text, parsed = parse_query(query)
+        parsed.update(filters)
+        return self.search_index.search(text, limit=limit, **parsed)
+    
+    def get_agent_details(self, agent_id: str, revalidate: bool = False) -> Optional[AgentPackage]:
+        """Get detailed information about a specific agent (revalidate=True skips a fresh cached copy)."""
+        try:
+            return AgentPackage(**self.client.get_json(f"/agents/{agent_id}", revalidate=revalidate))
         except Exception as e:
             logger.error(f"Failed to fetch agent details: {e}")
             return None
@@ -52,40 +185,342 @@ class Marketplace:
     def install_agent(self, agent_id: str) -> bool:
         """Install an agent from the marketplace."""
         try:
-            agent = self.get_agent_details(agent_id)
+            # Always check with the server, so an update never installs a cached version
+            agent = self.get_agent_details(agent_id, revalidate=True)
             if not agent:
                 return False
+            self._activate_package(agent, self._download_package(agent))
+            logger.info(f"Successfully installed agent {agent.name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to install agent {agent_id}: {e}")
+            return False
+    
+    def install_agents(self, agent_ids: List[str], max_workers: int = 4,
+                       on_progress: Optional[Callable[[str, str, int, Optional[int]], None]] = None) -> Dict[str, bool]:
+        """
+        Install several agents concurrently.
+        
+        Each download worker fetches its agent's listing (a conditional request
+        when it is cached), so only the requested agents are looked up rather
+        than the whole catalog. Downloads run on up to max_workers threads,
+        while unpacking and registration run on a separate thread so they never
+        hold a download slot. A failed agent is reported and skipped; the
+        others carry on.
+        
+        Args:
+            agent_ids: Agents to install
+            max_workers: Concurrent downloads (keep it within the client's pool_size)
+            on_progress: Called from worker threads as on_progress(agent_id, stage,
+                bytes_done, bytes_total), where stage is "queued", "downloading",
+                "installing", "installed" or "failed"
+        
+        Returns:
+            {agent_id: True if installed}
+        
+        Example:
+            results = marketplace.install_agents(["summarizer", "inbox-zero"], max_workers=8)
+        """
+        report = on_progress or (lambda *args: None)
+        agent_ids = list(dict.fromkeys(agent_ids))
+        results = {agent_id: False for agent_id in agent_ids}
+        for agent_id in agent_ids:
+            report(agent_id, "queued", 0, None)
+        
+        def download(agent_id: str):
+            # Always check with the server, as install_agent does
+            agent = self.get_agent_details(agent_id, revalidate=True)
+            if agent is None:
+                raise ValueError("not found in the marketplace")
+            digest = self._download_package(
+                agent, lambda done, total: report(agent_id, "downloading", done, total))
+            return agent, digest
+        
+        def activate(agent: AgentPackage, digest: str) -> None:
+            report(agent.id, "installing", 0, None)
+            self._activate_package(agent, digest)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-download") as downloads, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-install") as installs:
+            pending = {downloads.submit(download, agent_id): agent_id for agent_id in agent_ids}
+            activations = {}
+            for future in as_completed(pending):
+                agent_id = pending[future]
+                try:
+                    activations[installs.submit(activate, *future.result())] = agent_id
+                except Exception as e:
+                    logger.error(f"Failed to download agent {agent_id}: {e}")
+                    report(agent_id, "failed", 0, None)
+            for future in as_completed(activations):
+                agent_id = activations[future]
+                try:
+                    future.result()
+                    results[agent_id] = True
+                    report(agent_id, "installed", 0, None)
+                except Exception as e:
+                    logger.error(f"Failed to install agent {agent_id}: {e}")
+                    report(agent_id, "failed", 0, None)
+        
+        logger.info(f"Installed {sum(results.values())} of {len(results)} agents")
+        return results
+    
+    def _fetch(self, url: str, part_path: Path,
+               on_progress: Optional[Callable[[int, Optional[int]], None]] = None) -> str:
+        """
+        Download url into part_path and return the sha256 of the complete file.
+        
+        Bytes left in part_path by an interrupted attempt are kept and the
+        download resumes after them with a Range request.
+        """
+        digest = hashlib.sha256()
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        with open(part_path, 'a+b', buffering=DOWNLOAD_CHUNK_SIZE) as f:
+            if offset:
+                f.seek(0)
+                while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
             
-            # Download the agent package
-            response = requests.get(agent.download_url, stream=True)
-            response.raise_for_status()
-            
-            # Create agent directory
-            agent_dir = self.local_agents_dir / agent_id
-            agent_dir.mkdir(exist_ok=True)
-            
-            # Save the package
-            package_path = agent_dir / f"{agent_id}-{agent.version}.zip"
-            with open(package_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # Extract the package
-            shutil.unpack_archive(package_path, agent_dir)
+            def start(at: int) -> None:
+                nonlocal digest
+                if at != offset:
+                    # The server ignored the Range; start from scratch
+                    f.seek(0)
+                    f.truncate()
+                    digest = hashlib.sha256()
+                elif offset:
+                    logger.info(f"Resuming {url} at {offset} bytes")
             
-            # Clean up the zip file
-            package_path.unlink()
+            def write(chunk: bytes) -> None:
+                digest.update(chunk)
+                f.write(chunk)
             
-            logger.info(f"Successfully installed agent {agent.name}")
+            self.client.download(url, write, chunk_size=DOWNLOAD_CHUNK_SIZE, on_progress=on_progress,
+                                 offset=offset, on_start=start)
+            f.flush()
+            os.fsync(f.fileno())
+        return digest.hexdigest()
+    
+    def _fetch_verified(self, url: str, part_path: Path, expected: str,
+                        on_progress: Optional[Callable[[int, Optional[int]], None]] = None) -> None:
+        """_fetch a file that must have sha256 expected; a resumed download that fails the check is retried once in full."""
+        for attempt in range(2):
+            resumed = part_path.exists() and part_path.stat().st_size > 0
+            actual = self._fetch(url, part_path, on_progress)
+            if actual == expected.lower():
+                return
+            part_path.unlink(missing_ok=True)
+            if not resumed or attempt:
+                raise IntegrityError(f"sha256 mismatch for {url}: expected {expected}, got {actual}")
+            logger.warning(f"Resumed download of {url} failed verification, downloading it again")
+    
+    def _download_package(self, agent: AgentPackage,
+                          on_progress: Optional[Callable[[int, Optional[int]], None]] = None) -> str:
+        """
+        Download and verify an agent's package into the store, returning its digest.
+        
+        The package is hashed as it arrives and written to a hidden .part file
+        that enters the store only once it matches the published sha256 (or,
+        without one, passes the zip's own CRC checks), so a corrupt download is
+        never used. An interrupted download leaves its .part file behind and
+        the next attempt resumes it. A package whose published digest is
+        already stored is not downloaded at all.
+        """
+        if agent.sha256 and self.store.touch(agent.sha256.lower()):
+            logger.info(f"{agent.id} {agent.version} is already in the package store")
+            return agent.sha256.lower()
+        
+        part_path = self.store.root / f".{agent.id}-{agent.version}.part"
+        if agent.sha256:
+            self._fetch_verified(agent.download_url, part_path, agent.sha256, on_progress)
+            return self.store.add_file(part_path, agent.sha256.lower())
+        
+        logger.warning(f"No published digest for {agent.id} {agent.version}, checking zip CRCs only")
+        digest = self._fetch(agent.download_url, part_path, on_progress)
+        try:
+            with zipfile.ZipFile(part_path) as archive:
+                bad = archive.testzip()
+        except zipfile.BadZipFile as e:
+            part_path.unlink(missing_ok=True)
+            raise IntegrityError(f"not a valid package: {e}") from None
+        if bad is not None:
+            part_path.unlink(missing_ok=True)
+            raise IntegrityError(f"corrupt package member {bad}")
+        return self.store.add_file(part_path, digest)
+    
+    def _download_delta(self, agent: AgentPackage, installed_version: str) -> Optional[str]:
+        """
+        Build a new version's package from the installed one plus only the files that changed.
+        
+        The marketplace publishes each version's files as
+        GET /agents/<id>/versions/<version>/manifest -> {"files": {path: sha256}}
+        and serves any file by content at GET /blobs/<sha256>. Files the
+        installed version already has are taken from it; the rest are
+        downloaded (resumably), and every file of the new version, local or
+        downloaded, is checked against the manifest as the package is
+        assembled; a mismatch raises IntegrityError. The publisher's zip cannot
+        be rebuilt byte for byte, so the result has a digest of its own: the
+        store records it as the version's package, while the version's
+        published sha256 stays in its listing (see _published_digest).
+        
+        Returns:
+            Digest of the assembled package, or None if no delta is possible
+            (no manifest published, or the installed version is not in the store)
+        """
+        installed = self.store.versions(agent.id).get(installed_version)
+        if installed is None:
+            return None
+        try:
+            manifest = self.client.get_json(f"/agents/{agent.id}/versions/{agent.version}/manifest")
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+        files = manifest.get("files") if isinstance(manifest, dict) else None
+        if not isinstance(files, dict) or not all(
+                isinstance(name, str) and is_safe_member(name)
+                and isinstance(digest, str) and re.fullmatch(r"[0-9a-f]{64}", digest)
+                for name, digest in files.items()):
+            logger.warning(f"No usable file manifest for {agent.id} {agent.version}, downloading the full package")
+            return None
+        
+        # Where each file content we already have can be read from
+        local: Dict[str, Tuple[Path, Optional[str]]] = {}
+        if installed.get("files"):
+            for digest in installed["files"].values():
+                local[digest] = (self.store.blob_path(digest), None)
+        else:
+            package_blob = self.store.blob_path(installed["package"])
+            with zipfile.ZipFile(package_blob) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        local[hashlib.sha256(archive.read(info)).hexdigest()] = (package_blob, info.filename)
+        
+        delta_dir = self.store.root / f".delta-{agent.id}-{agent.version}"
+        delta_dir.mkdir(exist_ok=True)
+        missing = sorted({digest for digest in files.values() if digest not in local})
+        logger.info(f"Updating {agent.id} to {agent.version}: {len(missing)} of {len(files)} files changed")
+        for digest in missing:
+            self._fetch_verified(f"/blobs/{digest}", delta_dir / digest, digest)
+        
+        # Assemble the package; stored uncompressed, so this costs one sequential write
+        part_path = self.store.root / f".{agent.id}-{agent.version}.delta.zip"
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_STORED) as package:
+            for name, digest in sorted(files.items()):
+                if digest in local:
+                    source, member = local[digest]
+                    if member is None:
+                        data = source.read_bytes()
+                    else:
+                        with zipfile.ZipFile(source) as archive:
+                            data = archive.read(member)
+                else:
+                    data = (delta_dir / digest).read_bytes()
+                if hashlib.sha256(data).hexdigest() != digest:
+                    part_path.unlink(missing_ok=True)
+                    raise IntegrityError(f"{name} of {agent.id} {agent.version} does not match its manifest")
+                package.writestr(name, data)
+        shutil.rmtree(delta_dir)
+        if METADATA_FILE not in files:
+            part_path.unlink(missing_ok=True)
+            raise IntegrityError(f"manifest of {agent.id} {agent.version} has no {METADATA_FILE}")
+        return self.store.add_file(part_path)
+    
+    def _activate_package(self, agent: AgentPackage, digest: str) -> None:
+        """Make a stored package the installed version of its agent."""
+        package_blob = self.store.blob_path(digest)
+        
+        # Agents normally run from the zip in place; unpack only those that need a real filesystem
+        metadata = read_package_metadata(package_blob)
+        files = None
+        if self.extract_packages or metadata.get("zip_safe", True) is False:
+            files = self.store.add_archive_members(package_blob)
+        self.store.add_version(agent.id, agent.version, digest, files, info=agent.model_dump())
+        self._place_version(agent.id, agent.version)
+        if files is not None:
+            # Its members are stored; keeping the zip too would store the agent twice
+            self.store.discard(digest)
+        
+        # Keep the previous versions around for switch_version, within keep_versions
+        if self.store.prune_versions(agent.id, self.keep_versions, pinned=[agent.version]):
+            self.store.gc()
+    
+    def _place_version(self, agent_id: str, version: str) -> Path:
+        """
+        Link a stored version into agents/<id>/ and register it.
+        
+        A package becomes agents/<id>/<id>-<version>.zip; an extracted version is
+        assembled in a hidden staging directory that is renamed to
+        agents/<id>/<version>/. What the previous version left is removed only
+        after the new one is registered.
+        """
+        entry = self.store.versions(agent_id).get(version)
+        if entry is None:
+            raise KeyError(f"Version {version} of {agent_id} is not in the package store")
+        agent_dir = self.local_agents_dir / agent_id
+        agent_dir.mkdir(exist_ok=True)
+        
+        if entry.get("files") is None:
+            location = agent_dir / f"{agent_id}-{version}.zip"
+            self.store.link(entry["package"], location)
+        else:
+            location = agent_dir / "".join(c if c.isalnum() or c in ".-_" else "_" for c in version)
+            staging_dir = agent_dir / f".staging-{location.name}-{os.getpid()}"
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            try:
+                metadata = json.loads(self.store.blob_path(entry["files"][METADATA_FILE]).read_bytes())
+                self.store.materialize(entry["files"], staging_dir, writable=metadata.get("writable", ()))
+                if location.exists():
+                    # Re-placing the same version: move the old copy aside; _remove_stale deletes it
+                    location.rename(agent_dir / f".old-{location.name}-{os.getpid()}")
+                os.replace(staging_dir, location)
+            except BaseException:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
+        
+        # Index the agent so listing and loading it never walks agents/
+        self.registry.register(location, package=entry.get("info"))
+        self._remove_stale(agent_dir, location)
+        return location
+    
+    def installed_versions(self, agent_id: str) -> List[str]:
+        """Versions of an agent in the package store, newest install first."""
+        versions = self.store.versions(agent_id)
+        return sorted(versions, key=lambda v: versions[v]["installed_at"], reverse=True)
+    
+    def switch_version(self, agent_id: str, version: str) -> bool:
+        """
+        Make a version already in the package store the installed one, without a download.
+        
+        Example:
+            marketplace.update_agent("summarizer")
+            marketplace.switch_version("summarizer", "1.2.0")  # roll back
+        """
+        try:
+            self._place_version(agent_id, version)
+            logger.info(f"Switched agent {agent_id} to version {version}")
             return True
         except Exception as e:
-            logger.error(f"Failed to install agent {agent_id}: {e}")
+            logger.error(f"Failed to switch agent {agent_id} to {version}: {e}")
             return False
     
+    @staticmethod
+    def _remove_stale(agent_dir: Path, keep: Path) -> None:
+        """Delete what a previous version left in agent_dir."""
+        for path in agent_dir.iterdir():
+            if path == keep:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+    
     def uninstall_agent(self, agent_id: str) -> bool:
         """Uninstall an agent."""
         try:
             agent_dir = self.local_agents_dir / agent_id
+            self.registry.unregister(agent_id)
+            self.store.forget(agent_id)
+            self.store.gc()
             if agent_dir.exists():
                 shutil.rmtree(agent_dir)
                 logger.info(f"Successfully uninstalled agent {agent_id}")
@@ -96,29 +531,154 @@ class Marketplace:
             return False
     
     def get_installed_agents(self) -> List[AgentPackage]:
-        """Get list of installed agents."""
+        """
+        Get list of installed agents.
+        
+        Listings are validated once, at install time, and kept in the registry;
+        unless the registry changed since the last call this costs one stat().
+        """
+        entries = self.registry.list()
+        if self._installed is not None and self._installed[0] == self.registry.generation:
+            return list(self._installed[1])
         installed_agents = []
-        for agent_dir in self.local_agents_dir.iterdir():
-            if agent_dir.is_dir():
-                metadata_file = agent_dir / "metadata.json"
-                if metadata_file.exists():
-                    try:
-                        with open(metadata_file) as f:
-                            metadata = json.load(f)
-                            installed_agents.append(AgentPackage(**metadata))
-                    except Exception as e:
-                        logger.error(f"Failed to read agent metadata: {e}")
-        return installed_agents
+        for entry in entries:
+            if entry.package is not None:
+                installed_agents.append(AgentPackage.model_construct(**entry.package))
+                continue
+            try:
+                installed_agents.append(AgentPackage(**entry.metadata))
+            except Exception as e:
+                logger.error(f"Failed to read agent metadata: {e}")
+        self._installed = (self.registry.generation, installed_agents)
+        return list(installed_agents)
+    
+    def load_agent(self, agent_id: str, sandboxed: bool = True, **kwargs):
+        """
+        Create an installed agent, importing its code on first use.
+        
+        By default the agent runs in a SandboxedAgent process; pass
+        sandboxed=False to instantiate it in this process.
+        """
+        if sandboxed:
+            return self.registry.sandboxed(agent_id, **kwargs)
+        return self.registry.create(agent_id, **kwargs)
+    
+    def check_updates(self, local_only: bool = False) -> List[AgentPackage]:
+        """
+        Find installed agents that have a newer version in the marketplace.
+        
+        The installed agents are sent as one request,
+        POST /agents/updates {"installed": [{"id", "version", "sha256"}]},
+        which answers with the current listing of each outdated agent. If the
+        server does not offer it or cannot be reached (or local_only is set),
+        installed versions are compared with the catalog instead: the synced
+        search index, else the cached catalog, which needs no request while
+        the cache is fresh. There, an agent is outdated if the catalog has a
+        newer version (compare_versions), or the same version with a sha256
+        other than the one published when the installed copy was installed. Either way the check is cheap
+        enough to run periodically in the background.
+        
+        Returns:
+            Latest listing of every agent with an update available
+        
+        Example:
+            for agent in marketplace.check_updates():
+                marketplace.update_agent(agent.id)
+        """
+        entries = self.registry.list()
+        if not entries:
+            return []
+        if not local_only:
+            installed = [{"id": entry.id, "version": entry.version, "sha256": self._installed_digest(entry)}
+                         for entry in entries]
+            try:
+                return [AgentPackage(**agent)
+                        for agent in self.client.post_json("/agents/updates", {"installed": installed})]
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code not in (404, 405, 501):
+                    logger.warning(f"Update check failed, comparing with the local catalog: {e}")
+            except Exception as e:
+                logger.warning(f"Update check failed, comparing with the local catalog: {e}")
+        
+        try:
+            if not len(self.search_index):
+                self.get_available_agents()
+            updates = []
+            for entry in entries:
+                latest = self.search_index.get(entry.id)
+                if latest is not None and self._is_update(latest, entry.version, self._installed_digest(entry)):
+                    updates.append(latest)
+            return updates
+        except Exception as e:
+            logger.error(f"Failed to check for updates: {e}")
+            return []
+    
+    @staticmethod
+    def _published_digest(stored: Dict[str, Any]) -> str:
+        """
+        Published sha256 of a stored version. A version built by a delta update
+        is stored under its own digest, so the listing it was installed from
+        is what names the marketplace's package.
+        """
+        return ((stored.get("info") or {}).get("sha256") or stored["package"]).lower()
+    
+    def _installed_digest(self, entry: RegistryEntry) -> Optional[str]:
+        """Published sha256 of an installed agent's package, as recorded when it was installed."""
+        stored = self.store.versions(entry.id).get(entry.version)
+        if stored is not None:
+            return self._published_digest(stored)
+        return (entry.package or {}).get("sha256")
+    
+    @staticmethod
+    def _is_update(latest: AgentPackage, version: str, digest: Optional[str]) -> bool:
+        """
+        Whether a listing updates an installed version: it is newer, or the
+        same version republished with a different package. A listing older
+        than what is installed (a rollback in the catalog) is not an update.
+        """
+        order = compare_versions(latest.version, version)
+        if order:
+            return order > 0
+        return bool(latest.sha256 and digest and latest.sha256.lower() != digest.lower())
     
     def update_agent(self, agent_id: str) -> bool:
-        """Update an installed agent to the latest version."""
+        """
+        Update an installed agent to the latest version.
+        
+        Nothing happens unless the marketplace listing is an update (see
+        check_updates). A version already in the package store, with the
+        published digest, is switched to directly;
+        otherwise only the files that changed are downloaded when the
+        marketplace publishes manifests, else the full package (resuming an
+        interrupted download). The installed version keeps running until
+        the new one is registered, and is put back if activation fails.
+        """
         try:
-            # First uninstall the current version
-            if not self.uninstall_agent(agent_id):
+            entry = self.registry.get(agent_id)
+            if entry is None:
+                logger.error(f"Agent {agent_id} is not installed")
+                return False
+            agent = self.get_agent_details(agent_id, revalidate=True)
+            if agent is None:
                 return False
+            if not self._is_update(agent, entry.version, self._installed_digest(entry)):
+                logger.info(f"Agent {agent_id} is up to date ({entry.version})")
+                return True
+            stored = self.store.versions(agent_id).get(agent.version)
+            if stored is not None and (not agent.sha256 or self._published_digest(stored) == agent.sha256.lower()):
+                return self.switch_version(agent_id, agent.version)
             
-            # Install the latest version
-            return self.install_agent(agent_id)
+            digest = self._download_delta(agent, entry.version) or self._download_package(agent)
+            try:
+                self._activate_package(agent, digest)
+            except Exception:
+                current = self.registry.get(agent_id)
+                if current is None or current.version != entry.version:
+                    logger.warning(f"Rolling agent {agent_id} back to {entry.version}")
+                    self._place_version(agent_id, entry.version)
+                raise
+            logger.info(f"Updated agent {agent_id} from {entry.version} to {agent.version}")
+            return True
         except Exception as e:
             logger.error(f"Failed to update agent {agent_id}: {e}")
-            return False 
\ No newline at end of file
+            return False
@@ -0,0 +1,299 @@
+import json
+import os
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel
+
+from veldaos.core.loader import load_agent_class, unload_agent
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are serialized within a process only
+    fcntl = None
+
+REGISTRY_FILE = "registry.json"
+DEFAULT_ENTRY_POINT = "agent:Agent"
+METADATA_FILE = "metadata.json"
+
+
+def is_archive(path: Path) -> bool:
+    return path.suffix == ".zip" and path.is_file()
+
+
+def read_package_metadata(location: Path) -> Dict[str, Any]:
+    """Read metadata.json from an agent directory or from the root of its package archive."""
+    location = Path(location)
+    if location.is_dir():
+        with open(location / METADATA_FILE) as f:
+            return json.load(f)
+    with zipfile.ZipFile(location) as archive:
+        return json.loads(archive.read(METADATA_FILE))
+
+
+def find_package(agent_dir: Path) -> Optional[Path]:
+    """The installed form of an agent: its extracted directory, else its newest archive or version directory."""
+    if (agent_dir / METADATA_FILE).exists():
+        return agent_dir
+    candidates = [path for path in agent_dir.iterdir() if not path.name.startswith(".")
+                  and (is_archive(path) or (path / METADATA_FILE).exists())]
+    return max(candidates, key=lambda path: path.stat().st_mtime) if candidates else None
+
+
+class RegistryEntry(BaseModel):
+    """Indexed metadata of one installed agent."""
+    id: str
+    name: str
+    version: str
+    entry_point: str = DEFAULT_ENTRY_POINT
+    path: str
+    archive: bool = False
+    generation: int = 1
+    installed_at: float = 0.0
+    metadata: Dict[str, Any] = {}
+    # The agent's marketplace listing, validated once when it was installed
+    package: Optional[Dict[str, Any]] = None
+
+
+class AgentRegistry:
+    """
+    Index of installed agents, kept in <agents_dir>/registry.json.
+
+    Agents are indexed when they are installed, so listing them reads one file
+    instead of walking and parsing every agent directory. An agent's code is
+    imported only when its class is first resolved, under a package name of
+    its own (veldaos_agents.<id>) so agents cannot shadow each other's modules.
+    An entry's path is either an extracted directory or the package zip itself,
+    which zipimport then loads modules from in place.
+    Re-registering an agent on update bumps its generation, and the next
+    resolve imports the new code.
+
+    Every change rewrites registry.json atomically under an inter-process
+    lock and bumps the registry's generation, so readers notice changes made
+    by other processes with a single stat() and otherwise never touch disk.
+
+    Example:
+        registry = AgentRegistry("./agents")
+        for entry in registry.list():
+            print(entry.name, entry.version)
+        agent = registry.create("summarizer")
+    """
+
+    def __init__(self, agents_dir: str):
+        self.agents_dir = Path(agents_dir)
+        self.path = self.agents_dir / REGISTRY_FILE
+        self._entries: Dict[str, RegistryEntry] = {}
+        self._mtime: Optional[Tuple[int, int, int]] = None
+        self.generation = 0
+        self._classes: Dict[str, Tuple[int, type]] = {}
+        self._lock = threading.RLock()
+        self.refresh()
+
+    @staticmethod
+    def _stamp(stat: os.stat_result) -> Tuple[int, int, int]:
+        # os.replace gives every save a new inode, so this changes even within one mtime tick
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Hold the registry lock across processes, with the latest registry.json loaded."""
+        with self._lock:
+            self.agents_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.agents_dir / f"{REGISTRY_FILE}.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.refresh(rebuild_missing=False)
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self, rebuild_missing: bool = True) -> bool:
+        """Re-read registry.json if another process changed it. Returns True if it was reloaded."""
+        with self._lock:
+            try:
+                mtime = self._stamp(self.path.stat())
+            except FileNotFoundError:
+                if rebuild_missing and self._mtime is None and self._has_agent_dirs():
+                    # Agents installed before the registry existed
+                    self.rebuild()
+                    return True
+                return False
+            if mtime == self._mtime:
+                return False
+
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                entries = {agent_id: RegistryEntry.model_construct(**entry)
+                           for agent_id, entry in data.get("agents", {}).items()}
+                generation = data.get("generation", 0)
+            except Exception as e:
+                logger.error(f"Failed to read agent registry {self.path}: {e}")
+                return False
+
+            # Drop cached classes of agents that were updated or removed elsewhere
+            for agent_id, (loaded_generation, _) in list(self._classes.items()):
+                entry = entries.get(agent_id)
+                if entry is None or entry.generation != loaded_generation:
+                    self._unload(agent_id)
+            self._entries = entries
+            self._mtime = mtime
+            self.generation = generation
+            return True
+
+    def _has_agent_dirs(self) -> bool:
+        return self.agents_dir.is_dir() and any(
+            path.is_dir() and not path.name.startswith(".") for path in self.agents_dir.iterdir())
+
+    def _save(self) -> None:
+        """Write registry.json; callers hold _transaction()."""
+        self.generation += 1
+        data = {"version": 1, "generation": self.generation,
+                "agents": {agent_id: entry.model_dump() for agent_id, entry in self._entries.items()}}
+        tmp_path = self.path.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = self._stamp(self.path.stat())
+
+    def _read_metadata(self, location: Path) -> Dict[str, Any]:
+        metadata = read_package_metadata(location)
+        entry_point = metadata.get("entry_point", DEFAULT_ENTRY_POINT)
+        module_name, _, class_name = entry_point.partition(":")
+        if not module_name or not class_name:
+            raise ValueError(f"Invalid entry point {entry_point!r}, expected 'module:Class'")
+        module_path = "/".join(module_name.split("."))
+        if is_archive(location):
+            with zipfile.ZipFile(location) as archive:
+                names = set(archive.namelist())
+            found = f"{module_path}.py" in names or f"{module_path}/__init__.py" in names
+        else:
+            found = (location / f"{module_path}.py").exists() or (location / module_path / "__init__.py").exists()
+        if not found:
+            raise ValueError(f"Entry point module {module_name!r} not found in {location}")
+        return metadata
+
+    def _entry(self, location: Path, metadata: Dict[str, Any], generation: int, installed_at: float) -> RegistryEntry:
+        archive = is_archive(location)
+        # Packages and version directories sit inside agents/<id>/
+        nested = archive or location.parent != self.agents_dir.resolve()
+        agent_id = metadata.get("id", location.parent.name if nested else location.name)
+        return RegistryEntry(
+            id=agent_id,
+            name=metadata.get("name", agent_id),
+            version=str(metadata.get("version", "0")),
+            entry_point=metadata.get("entry_point", DEFAULT_ENTRY_POINT),
+            path=str(location),
+            archive=archive,
+            generation=generation,
+            installed_at=installed_at,
+            metadata=metadata,
+        )
+
+    def register(self, location: str, package: Optional[Dict[str, Any]] = None) -> RegistryEntry:
+        """
+        Index an installed (or updated) agent from the metadata.json of its directory or package zip.
+
+        Args:
+            location: The agent's directory or package zip
+            package: Its validated marketplace listing, stored with the entry
+        """
+        location = Path(location).resolve()
+        metadata = self._read_metadata(location)
+        with self._transaction():
+            entry = self._entry(location, metadata, 1, time.time())
+            entry.package = package
+            previous = self._entries.get(entry.id)
+            if previous is not None:
+                entry.generation = previous.generation + 1
+            agent_id = entry.id
+            self._entries[agent_id] = entry
+            self._save()
+            if previous is not None:
+                self._unload(agent_id)
+        logger.info(f"Registered agent {entry.name} {entry.version}")
+        return entry
+
+    def unregister(self, agent_id: str) -> bool:
+        with self._transaction():
+            if self._entries.pop(agent_id, None) is None:
+                return False
+            self._save()
+            self._unload(agent_id)
+            return True
+
+    def rebuild(self) -> int:
+        """Re-index every agent directory. Returns the number of agents found."""
+        with self._transaction():
+            self._entries = {}
+            for agent_dir in sorted(self.agents_dir.iterdir()):
+                # Skips files and hidden directories such as .cache and .store
+                location = find_package(agent_dir) if agent_dir.is_dir() and not agent_dir.name.startswith(".") \
+                    else None
+                if location is None:
+                    continue
+                try:
+                    metadata = self._read_metadata(location)
+                except Exception as e:
+                    logger.error(f"Skipping agent in {agent_dir}: {e}")
+                    continue
+                entry = self._entry(location.resolve(), metadata, 1, location.stat().st_mtime)
+                self._entries[entry.id] = entry
+            self._save()
+            for agent_id in list(self._classes):
+                self._unload(agent_id)
+            return len(self._entries)
+
+    def list(self) -> List[RegistryEntry]:
+        self.refresh()
+        return list(self._entries.values())
+
+    def get(self, agent_id: str) -> Optional[RegistryEntry]:
+        self.refresh()
+        return self._entries.get(agent_id)
+
+    def resolve(self, agent_id: str) -> type:
+        """Import an agent's entry point on first use and return its class."""
+        with self._lock:
+            entry = self.get(agent_id)
+            if entry is None:
+                raise KeyError(f"Agent {agent_id!r} is not installed")
+            cached = self._classes.get(agent_id)
+            if cached is not None and cached[0] == entry.generation:
+                return cached[1]
+
+            self._unload(agent_id)
+            agent_class = load_agent_class(agent_id, entry.path, entry.entry_point)
+            self._classes[agent_id] = (entry.generation, agent_class)
+            logger.info(f"Loaded agent {entry.name} {entry.version}")
+            return agent_class
+
+    def create(self, agent_id: str, *args, **kwargs):
+        """Instantiate an agent in this process."""
+        return self.resolve(agent_id)(*args, **kwargs)
+
+    def sandboxed(self, agent_id: str, **kwargs):
+        """Build a SandboxedAgent for an agent, without importing its code here."""
+        from veldaos.core.sandbox import SandboxedAgent
+
+        entry = self.get(agent_id)
+        if entry is None:
+            raise KeyError(f"Agent {agent_id!r} is not installed")
+        return SandboxedAgent(entry.id, entry.path, entry_point=entry.entry_point, **kwargs)
+
+    def reload(self, agent_id: str) -> type:
+        """Drop an agent's loaded modules and import them again."""
+        with self._lock:
+            self._unload(agent_id)
+            return self.resolve(agent_id)
+
+    def _unload(self, agent_id: str) -> None:
+        self._classes.pop(agent_id, None)
+        unload_agent(agent_id)
@@ -0,0 +1,373 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from veldaos.marketplace.marketplace import AgentPackage
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# How much a term counts depending on the field it came from
+FIELD_WEIGHTS = (("name", 3.0), ("capabilities", 2.0), ("author", 1.5), ("description", 1.0))
+
+# Score multipliers by how a query term matched an indexed term
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.4
+
+MAX_FIELD_WEIGHT = max(weight for _, weight in FIELD_WEIGHTS)
+
+# Popularity (downloads and rating) only breaks ties: it stays below 0.1, less
+# than the smallest gap between two field weights times any match multiplier,
+# so ordering a term's postings by (field weight, popularity) is also score order
+POPULARITY_WEIGHT = 0.1
+
+# Cap on indexed terms one short prefix may expand to, to bound query time
+MAX_PREFIX_TERMS = 64
+
+# Query syntax for facet filters typed into the search bar
+FILTER = re.compile(r"\b(cap|capability|price|rating)\s*(:|<=|>=|<|>|=)\s*([\w.-]+)", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def _deletes(term: str) -> Set[str]:
+    """Every string one deletion away from term (the symmetric-delete trick for edit distance 1)."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def parse_query(text: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Split search bar text into free text and facet filters.
+
+    Example:
+        parse_query("pdf summarizer cap:ocr price<5 rating>=4")
+        # ("pdf summarizer", {"capabilities": ["ocr"], "max_price": 5.0, "min_rating": 4.0})
+    """
+    filters: Dict[str, Any] = {}
+    for match in FILTER.finditer(text):
+        field, op, value = match.group(1).lower(), match.group(2), match.group(3)
+        if field in ("cap", "capability"):
+            filters.setdefault("capabilities", []).append(value.lower())
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            continue
+        if field == "price":
+            if op in ("<", "<="):
+                filters["max_price"] = number
+            elif op in (">", ">="):
+                filters["min_price"] = number
+            else:
+                filters["min_price"] = filters["max_price"] = number
+        elif field == "rating":
+            filters["min_rating"] = number
+    return " ".join(FILTER.sub(" ", text).split()), filters
+
+
+class SearchIndex:
+    """
+    In-memory search index over marketplace agents.
+
+    An inverted index maps every term of an agent's name, capabilities, author
+    and description to the agents containing it, weighted by field. A query
+    matches terms exactly, by prefix (the last query word, for search-as-you-
+    type) and, for words with no exact match, within one edit through a
+    table of single-character deletions. Every query word must match; hits are
+    ranked by field weight, term rarity, match kind and popularity.
+
+    Each term's postings are kept in score order, so a query walks the rarest
+    word's postings best-first and stops once nothing further down can enter
+    the top results, instead of scoring every matching agent.
+
+    Facet filters (price range, minimum rating, required capabilities) are
+    checked per candidate, and agents are added, replaced or removed one at a
+    time, so syncing a changed catalog only touches what changed.
+
+    Example:
+        index = SearchIndex()
+        index.sync(marketplace.get_available_agents())
+        index.search("summ", max_price=0, capabilities=["pdf"])
+    """
+
+    def __init__(self, agents: Iterable['AgentPackage'] = ()):
+        self._lock = threading.RLock()
+        self._agents: Dict[str, 'AgentPackage'] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        self._capabilities: Dict[str, Set[str]] = {}
+        self._popularity: Dict[str, float] = {}
+        self._ranked: Dict[str, List[Tuple[float, float, str]]] = {}
+        self._sorted_terms: List[str] = []
+        self._by_popularity: List[str] = []
+        self._terms_dirty = False
+        self._popularity_dirty = False
+        self.sync(agents)
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def get(self, agent_id: str) -> Optional['AgentPackage']:
+        return self._agents.get(agent_id)
+
+    @staticmethod
+    def _terms(agent: 'AgentPackage') -> Dict[str, float]:
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS:
+            value = getattr(agent, field)
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for term in tokenize(text):
+                # A term counts once per field, with the weight of its best field
+                terms[term] = max(terms.get(term, 0.0), weight)
+        return terms
+
+    def add(self, agent: 'AgentPackage') -> None:
+        """Index an agent, replacing any earlier version of it."""
+        with self._lock:
+            self._add(agent, bulk=False)
+
+    @staticmethod
+    def _popularity_of(agent: 'AgentPackage') -> float:
+        downloads = max(agent.downloads, 0)
+        rating = min(max(agent.rating, 0.0), 5.0)
+        return POPULARITY_WEIGHT * (0.5 * downloads / (downloads + 1000) + 0.5 * rating / 5.0) * 0.99
+
+    def _add(self, agent: 'AgentPackage', bulk: bool) -> None:
+        if agent.id in self._agents:
+            self._remove(agent.id)
+        terms = self._terms(agent)
+        popularity = self._popularity_of(agent)
+        self._popularity[agent.id] = popularity
+        self._agents[agent.id] = agent
+        self._doc_terms[agent.id] = terms
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                for variant in _deletes(term):
+                    self._deletes.setdefault(variant, set()).add(term)
+                if bulk or self._terms_dirty:
+                    self._terms_dirty = True
+                else:
+                    bisect.insort(self._sorted_terms, term)
+            postings[agent.id] = weight
+            ranked = self._ranked.get(term)
+            if ranked is not None:
+                bisect.insort(ranked, (-weight, -popularity, agent.id))
+        for capability in agent.capabilities:
+            self._capabilities.setdefault(capability.lower(), set()).add(agent.id)
+        self._popularity_dirty = True
+
+    def remove(self, agent_id: str) -> bool:
+        with self._lock:
+            return self._remove(agent_id)
+
+    def _remove(self, agent_id: str) -> bool:
+        agent = self._agents.pop(agent_id, None)
+        if agent is None:
+            return False
+        popularity = self._popularity.pop(agent_id)
+        for term, weight in self._doc_terms.pop(agent_id).items():
+            postings = self._postings[term]
+            del postings[agent_id]
+            ranked = self._ranked.get(term)
+            if ranked is not None:
+                entry = (-weight, -popularity, agent_id)
+                i = bisect.bisect_left(ranked, entry)
+                if i < len(ranked) and ranked[i] == entry:
+                    del ranked[i]
+            if not postings:
+                del self._postings[term]
+                self._ranked.pop(term, None)
+                for variant in _deletes(term):
+                    terms = self._deletes.get(variant)
+                    if terms is not None:
+                        terms.discard(term)
+                        if not terms:
+                            del self._deletes[variant]
+                if not self._terms_dirty:
+                    i = bisect.bisect_left(self._sorted_terms, term)
+                    if i < len(self._sorted_terms) and self._sorted_terms[i] == term:
+                        del self._sorted_terms[i]
+        for capability in agent.capabilities:
+            ids = self._capabilities.get(capability.lower())
+            if ids is not None:
+                ids.discard(agent_id)
+                if not ids:
+                    del self._capabilities[capability.lower()]
+        self._popularity_dirty = True
+        return True
+
+    def sync(self, agents: Iterable['AgentPackage'], prune: bool = True) -> Tuple[int, int]:
+        """
+        Bring the index in line with a catalog, re-indexing only agents that changed.
+
+        Args:
+            agents: Current catalog (or a page of it, with prune=False)
+            prune: Drop indexed agents missing from agents
+
+        Returns:
+            (agents added or updated, agents removed)
+        """
+        with self._lock:
+            changed = removed = 0
+            seen = set()
+            for agent in agents:
+                seen.add(agent.id)
+                indexed = self._agents.get(agent.id)
+                # Comparing field dicts is much cheaper than pydantic's __eq__
+                if indexed is None or indexed.__dict__ != agent.__dict__:
+                    self._add(agent, bulk=True)
+                    changed += 1
+            if prune:
+                removed = self.prune(seen)
+            return changed, removed
+
+    def prune(self, keep: Set[str]) -> int:
+        """Drop every indexed agent whose id is not in keep (after syncing a catalog page by page). Returns how many."""
+        with self._lock:
+            stale = [agent_id for agent_id in self._agents if agent_id not in keep]
+            for agent_id in stale:
+                self._remove(agent_id)
+            return len(stale)
+
+    def _ensure_sorted(self) -> None:
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+
+    def _expand(self, word: str, prefix: bool) -> Dict[str, float]:
+        """Indexed terms a query word matches, with their match multiplier."""
+        matches: Dict[str, float] = {}
+        if word in self._postings:
+            matches[word] = EXACT
+        if prefix and len(word) >= 2:
+            start = bisect.bisect_left(self._sorted_terms, word)
+            for term in self._sorted_terms[start:start + MAX_PREFIX_TERMS]:
+                if not term.startswith(word):
+                    break
+                matches.setdefault(term, PREFIX)
+        if not matches and len(word) >= 4:
+            # Terms within one insertion, deletion or substitution of word
+            candidates = set(self._deletes.get(word, ()))
+            for variant in _deletes(word):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletes.get(variant, ()))
+            for term in candidates:
+                matches[term] = FUZZY
+        return matches
+
+    def _passes(self, agent: 'AgentPackage', min_price: Optional[float], max_price: Optional[float],
+                min_rating: Optional[float]) -> bool:
+        return ((min_price is None or agent.price >= min_price)
+                and (max_price is None or agent.price <= max_price)
+                and (min_rating is None or agent.rating >= min_rating))
+
+    def search(self, query: str = "", limit: int = 20, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, min_rating: Optional[float] = None,
+               capabilities: Optional[Iterable[str]] = None) -> List['AgentPackage']:
+        """
+        Ranked agents matching every word of query and all given filters.
+
+        An empty query returns the most popular agents that pass the filters.
+        """
+        return [agent for _, agent in self.search_scored(query, limit, min_price, max_price, min_rating,
+                                                          capabilities)]
+
+    def _ranked_postings(self, term: str) -> List[Tuple[float, float, str]]:
+        """A term's postings as (-weight, -popularity, agent_id), best first; sorted on first use."""
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            popularity = self._popularity
+            ranked = self._ranked[term] = sorted((-weight, -popularity[agent_id], agent_id)
+                                                 for agent_id, weight in self._postings[term].items())
+        return ranked
+
+    def _scored_postings(self, term: str, mult: float) -> Iterator[Tuple[float, str]]:
+        """(-score, agent_id) for a term's postings, best first."""
+        for weight, popularity, agent_id in self._ranked_postings(term):
+            yield weight * mult + popularity, agent_id
+
+    def search_scored(self, query: str = "", limit: int = 20, min_price: Optional[float] = None,
+                      max_price: Optional[float] = None, min_rating: Optional[float] = None,
+                      capabilities: Optional[Iterable[str]] = None) -> List[Tuple[float, 'AgentPackage']]:
+        """Like search(), with each agent's score."""
+        with self._lock:
+            self._ensure_sorted()
+            allowed: Optional[Set[str]] = None
+            for capability in capabilities or ():
+                ids = self._capabilities.get(capability.lower(), set())
+                allowed = ids if allowed is None else allowed & ids
+                if not allowed:
+                    return []
+
+            words = tokenize(query)
+            if not words:
+                # Popular agents first; stop as soon as enough pass the filters
+                if self._popularity_dirty:
+                    self._by_popularity = sorted(self._popularity, key=self._popularity.__getitem__, reverse=True)
+                    self._popularity_dirty = False
+                results = []
+                for agent_id in self._by_popularity:
+                    if allowed is not None and agent_id not in allowed:
+                        continue
+                    agent = self._agents[agent_id]
+                    if self._passes(agent, min_price, max_price, min_rating):
+                        results.append((self._popularity[agent_id], agent))
+                        if len(results) >= limit:
+                            break
+                return results
+
+            # Each query word becomes its matching terms with their score multipliers
+            total = len(self._agents) or 1
+            per_word: List[List[Tuple[str, float]]] = []
+            for i, word in enumerate(words):
+                matches = [(term, kind * math.log(1.0 + total / len(self._postings[term])))
+                           for term, kind in self._expand(word, prefix=i == len(words) - 1).items()]
+                if not matches:
+                    return []
+                per_word.append(matches)
+
+            # Walk the rarest word's postings best-first and look the other words up per agent
+            per_word.sort(key=lambda matches: sum(len(self._postings[term]) for term, _ in matches))
+            driving, others = per_word[0], per_word[1:]
+            others_bound = sum(max(mult for _, mult in matches) * MAX_FIELD_WEIGHT for matches in others)
+            others = [[(self._postings[term], mult) for term, mult in matches] for matches in others]
+            stream = heapq.merge(*[self._scored_postings(term, mult) for term, mult in driving])
+
+            top: List[Tuple[float, str]] = []
+            seen: Set[str] = set()
+            for key, agent_id in stream:
+                if len(top) >= limit and -key + others_bound <= top[0][0]:
+                    # Nothing further down the postings can make the top results
+                    break
+                if agent_id in seen or (allowed is not None and agent_id not in allowed):
+                    continue
+                seen.add(agent_id)
+                score = -key
+                for matches in others:
+                    best = 0.0
+                    for postings, mult in matches:
+                        weight = postings.get(agent_id)
+                        if weight is not None and weight * mult > best:
+                            best = weight * mult
+                    if not best:
+                        break
+                    score += best
+                else:
+                    if not self._passes(self._agents[agent_id], min_price, max_price, min_rating):
+                        continue
+                    if len(top) < limit:
+                        heapq.heappush(top, (score, agent_id))
+                    elif score > top[0][0]:
+                        heapq.heapreplace(top, (score, agent_id))
+            return [(score, self._agents[agent_id]) for score, agent_id in sorted(top, reverse=True)]
@@ -0,0 +1,254 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+STORE_DIR = ".store"
+HASH_CHUNK_SIZE = 1 << 20
+
+# gc() keeps unreferenced blobs stored or reused this recently: a download
+# waiting to be activated has no version referring to it yet
+GC_GRACE_SECONDS = 3600.0
+
+
+def is_safe_member(name: str) -> bool:
+    """Whether a package path stays inside the directory it is extracted to."""
+    return bool(name) and not name.startswith("/") and ".." not in name.split("/")
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store for agent packages and files, in <agents_dir>/.store.
+
+    Each distinct file is kept once as blobs/<sha256[:2]>/<sha256> and is
+    hard-linked wherever it is installed: package zips, and every file of
+    an extracted agent, so versions that share files share disk space.
+    Blobs are read-only, since a change through one link would show up in
+    every other; the files an extracted agent declares writable are copied
+    out instead (materialize). An extracted version keeps only its files,
+    not its package zip as well.
+
+    refs/<agent_id>.json records, per installed version, the digest of its
+    package and (for extracted agents) of every file, so switching to a
+    version already in the store needs no download. Blobs no version refers
+    to are deleted by gc() once they are older than a grace period.
+
+    Example:
+        store = BlobStore("./agents")
+        digest = store.add_file(Path("download.part"))
+        store.link(digest, Path("agents/summarizer/summarizer-1.2.zip"))
+    """
+
+    def __init__(self, agents_dir: str):
+        self.root = Path(agents_dir) / STORE_DIR
+        self.blobs_dir = self.root / "blobs"
+        self.refs_dir = self.root / "refs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.refs_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    def touch(self, digest: str) -> bool:
+        """Mark a stored blob as just used, so gc() keeps it through the grace period. False if it is not stored."""
+        try:
+            os.utime(self.blob_path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def add_file(self, path: Path, digest: Optional[str] = None) -> str:
+        """
+        Move a file into the store and return its digest.
+
+        If the content is already stored, the file is simply deleted. Pass
+        digest when it is already known (e.g. hashed while downloading).
+        """
+        digest = digest or sha256_file(path)
+        blob = self.blob_path(digest)
+        if self.touch(digest):
+            path.unlink()
+        else:
+            blob.parent.mkdir(exist_ok=True)
+            os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(path, blob)
+        return digest
+
+    def add_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(digest)
+        if not self.touch(digest):
+            blob.parent.mkdir(exist_ok=True)
+            tmp_path = blob.with_name(f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, blob)
+        return digest
+
+    def link(self, digest: str, dest: Path, copy: bool = False) -> None:
+        """
+        Place a stored blob at dest, as a read-only hard link where the
+        filesystem allows it, else (or with copy=True) as a writable copy.
+        """
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.link")
+        tmp_path.unlink(missing_ok=True)
+        linked = False
+        if not copy:
+            try:
+                os.link(self.blob_path(digest), tmp_path)
+                linked = True
+            except OSError:
+                pass
+        if not linked:
+            # copyfile leaves the blob's read-only mode behind
+            shutil.copyfile(self.blob_path(digest), tmp_path)
+        os.replace(tmp_path, dest)
+
+    def add_archive_members(self, package_path: Path) -> Dict[str, str]:
+        """Store every file of a zip and return {relative path: digest}."""
+        files = {}
+        with zipfile.ZipFile(package_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                name = os.path.normpath(info.filename).replace(os.sep, "/")
+                if not is_safe_member(name):
+                    raise ValueError(f"Unsafe path in package: {info.filename}")
+                files[name] = self.add_bytes(archive.read(info))
+        return files
+
+    def materialize(self, files: Dict[str, str], dest: Path, writable: Iterable[str] = ()) -> None:
+        """
+        Build a directory tree of read-only links to stored blobs. Files
+        matching a writable pattern (e.g. "data/*.db") are copied instead.
+        """
+        writable = list(writable)
+        for name, digest in files.items():
+            copy = any(fnmatch.fnmatchcase(name, pattern) for pattern in writable)
+            self.link(digest, dest.joinpath(*name.split("/")), copy=copy)
+
+    # Version references
+
+    def _refs_path(self, agent_id: str) -> Path:
+        return self.refs_dir / f"{agent_id}.json"
+
+    def versions(self, agent_id: str) -> Dict[str, Dict[str, Any]]:
+        """{version: {"package": digest, "files": {path: digest} or None, "info": dict or None, "installed_at": time}}"""
+        try:
+            with open(self._refs_path(agent_id)) as f:
+                return json.load(f).get("versions", {})
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.error(f"Corrupt store refs for {agent_id}: {e}")
+            return {}
+
+    def _write_versions(self, agent_id: str, versions: Dict[str, Dict[str, Any]]) -> None:
+        path = self._refs_path(agent_id)
+        if not versions:
+            path.unlink(missing_ok=True)
+            return
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"versions": versions}, f)
+        os.replace(tmp_path, path)
+
+    def add_version(self, agent_id: str, version: str, package: str,
+                    files: Optional[Dict[str, str]] = None, info: Optional[Dict[str, Any]] = None) -> None:
+        """Record a stored version; info is kept alongside (e.g. its marketplace listing)."""
+        with self._lock:
+            versions = self.versions(agent_id)
+            versions[version] = {"package": package, "files": files, "info": info, "installed_at": time.time()}
+            self._write_versions(agent_id, versions)
+
+    def prune_versions(self, agent_id: str, keep: int, pinned: Iterable[str] = ()) -> List[str]:
+        """Forget all but the newest keep versions of an agent (and any pinned ones). Returns the dropped versions."""
+        with self._lock:
+            versions = self.versions(agent_id)
+            newest = sorted(versions, key=lambda v: versions[v]["installed_at"], reverse=True)
+            dropped = [v for v in newest[keep:] if v not in set(pinned)]
+            for version in dropped:
+                del versions[version]
+            self._write_versions(agent_id, versions)
+            return dropped
+
+    def forget(self, agent_id: str) -> None:
+        with self._lock:
+            self._write_versions(agent_id, {})
+
+    def referenced(self) -> Set[str]:
+        digests = set()
+        for path in self.refs_dir.glob("*.json"):
+            for entry in self.versions(path.stem).values():
+                if entry.get("files") is None:
+                    digests.add(entry["package"])
+                else:
+                    # Extracted versions are rebuilt from their files; the package zip is not needed
+                    digests.update(entry["files"].values())
+        return digests
+
+    def discard(self, digest: str) -> bool:
+        """Delete a blob right away, unless a recorded version refers to it. Returns True if deleted."""
+        with self._lock:
+            if digest in self.referenced():
+                return False
+            try:
+                self.blob_path(digest).unlink()
+                return True
+            except FileNotFoundError:
+                return False
+
+    def gc(self, grace: float = GC_GRACE_SECONDS) -> int:
+        """
+        Delete blobs no recorded version refers to, unless they were stored or
+        reused within the last grace seconds. Returns the bytes freed.
+        """
+        with self._lock:
+            live = self.referenced()
+            cutoff = time.time() - grace
+            freed = 0
+            for blob in self.blobs_dir.glob("*/*"):
+                if blob.name in live or blob.name.startswith("."):
+                    continue
+                try:
+                    info = blob.stat()
+                    if info.st_mtime > cutoff:
+                        continue
+                    blob.unlink()
+                except FileNotFoundError:
+                    continue
+                freed += info.st_size
+            if freed:
+                logger.info(f"Freed {freed / 1024 / 1024:.1f} MiB from the package store")
+            return freed
+
+    def usage(self) -> Dict[str, int]:
+        """Number and total size of stored blobs."""
+        count = size = 0
+        for blob in self.blobs_dir.glob("*/*"):
+            count += 1
+            size += blob.stat().st_size
+        return {"blobs": count, "bytes": size}